@@ -0,0 +1,124 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Benchmark of inheritance filtering: classifies the variants of a synthetic
+# proband in known genes gene by gene and in one batch, checks that both
+# give the same candidates and inheritance report and reports the best of
+# several runs of each.
+#
+# python3 benchmarks/inheritance.py [--variants N] [--repeats N] [--seed N]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from preinheritance import create_variants
+from family.families import Person, Family
+from filtering.inheritance_filtering import InheritanceFiltering
+from filtering.inheritance_report import InheritanceReport
+from variants.trio_genotype import add_trio_genotypes
+
+MODES = ["Biallelic", "Monoallelic", "Hemizygous", "X-linked dominant", "Imprinted", "Mosaic"]
+
+
+def create_genes(variants, rng):
+    """
+    A known gene for each gene with variants, on the chromosome of its first
+    variant, with one or two modes
+    """
+    genes = {}
+    for v in variants["child"].keys():
+        var = variants["child"][v]
+        if var.hgnc_id not in genes:
+            genes[var.hgnc_id] = {"chr": var.chrom, "symbol": "GENE", "mode": set(rng.sample(MODES, rng.randint(1, 2)))}
+    return genes
+
+
+def variants_per_gene(variants):
+    per_gene = {}
+    for v in variants["child"].keys():
+        hgncid = variants["child"][v].hgnc_id
+        if hgncid not in per_gene:
+            per_gene[hgncid] = {}
+        per_gene[hgncid][v] = {"child": variants["child"][v]}
+        for parent in ["mum", "dad"]:
+            if v in variants[parent]:
+                per_gene[hgncid][v][parent] = variants[parent][v]
+    return per_gene
+
+
+def run(per_gene, family, genes, batch):
+    candidates = {"single_variants": {}, "compound_hets": {}}
+    report = InheritanceReport()
+    start = time.perf_counter()
+    InheritanceFiltering(per_gene, family, genes, None, None, candidates, report, batch).inheritance_filter_genes()
+    return time.perf_counter() - start, candidates, report.inheritance_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inheritance filtering benchmark")
+    parser.add_argument("--variants", type=int, default=20000, help="Proband SNVs in known genes (default 20000)")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs, the fastest is reported (default 5)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    variants = create_variants(args.variants, rng)
+    child = Person("fam", "child", "dad", "mum", "XX", "2", "child.vcf")
+    mum = Person("fam", "mum", "0", "0", "XX", "1", "mum.vcf")
+    dad = Person("fam", "dad", "0", "0", "XY", "1", "dad.vcf")
+    family = Family(child, mum, dad)
+    add_trio_genotypes(family, variants)
+    genes = create_genes(variants, rng)
+    per_gene = variants_per_gene(variants)
+
+    print(("\t").join(["method", "variants", "single", "compound_het_genes", "seconds", "us_per_variant"]))
+    results = {}
+    for method, batch in [("per_gene", False), ("batch", True)]:
+        times = []
+        for i in range(args.repeats):
+            seconds, candidates, report = run(per_gene, family, genes, batch)
+            times.append(seconds)
+        results[method] = (candidates, report)
+        print(
+            ("\t").join(
+                [
+                    method,
+                    str(args.variants),
+                    str(len(candidates["single_variants"])),
+                    str(len(candidates["compound_hets"])),
+                    "%.4f" % min(times),
+                    "%.2f" % (min(times) * 1000000 / args.variants),
+                ]
+            )
+        )
+    if results["per_gene"] != results["batch"]:
+        sys.exit("batch and per gene inheritance filtering differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Exhaustive check of the inheritance decision table against the per-mode
+# autosomal and allosomal filters it replaced. The old filters are read from
+# git history, from the commit before they were removed unless --revision is
+# given. Every combination of gene and variant chromosome, proband sex, child
+# genotype, VAF, DNM, parent genotypes and affected status, parents present
+# and gene modes is run through the old filters, TableInheritanceFilter and
+# BatchInheritanceFilter, which must give the same candidates, log lines and
+# inheritance report. Combinations where the old filters exit or raise are
+# counted but not compared.
+#
+# python3 benchmarks/inheritance_equivalence.py [--revision REV]
+
+import argparse
+import itertools
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+from tests.test_utils import create_test_person, create_test_family, create_test_variants_per_gene
+from filtering.inheritance_report import InheritanceReport
+from filtering.inheritance_table import TableInheritanceFilter, BatchInheritanceFilter
+
+OLD_MODULES = ["inheritance_autosomal", "inheritance_allosomal"]
+MODES = [
+    ["Biallelic"],
+    ["Monoallelic"],
+    ["Mosaic"],
+    ["Imprinted"],
+    ["Hemizygous"],
+    ["X-linked dominant"],
+    ["X-linked over-dominance"],
+    ["monoallelic_Y_hem"],
+    ["Unknown"],
+    ["Biallelic", "Monoallelic"],
+    ["Hemizygous", "X-linked dominant"],
+]
+VARDATA = {
+    "pos": "1097183",
+    "ref": "A",
+    "alt": "GG",
+    "consequence": "start_lost",
+    "ensg": "ensg",
+    "symbol": "GENE",
+    "feature": "feature",
+    "canonical": "YES",
+    "mane": "MANE",
+    "hgnc_id": "1234",
+    "ddd_father_af": ".",
+    "max_af": "0",
+    "max_af_pops": ".",
+    "ddd_af": "0",
+    "revel": ".",
+    "polyphen": ".",
+    "hgvsc": ".",
+    "hgvsp": ".",
+    "pid": ".",
+    "gq": "50",
+    "protein_position": "123",
+    "ac_XX": "0",
+    "ac_XY": "0",
+    "an_XX": "0",
+    "an_XY": "0",
+    "nhomalt_XX": "0",
+    "nhomalt_XY": "0",
+}
+
+
+class Messages(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Shim(object):
+    """
+    The attributes of InheritanceFiltering the filters read
+    """
+
+    def __init__(self, family, parents, variants_per_gene, genes):
+        self.family = family
+        self.parents = parents
+        self.variants_per_gene = variants_per_gene
+        self.genes = genes
+        self.candidate_variants = {"single_variants": {}, "compound_hets": {}}
+        self.inhreport = InheritanceReport()
+
+
+def removal_revision():
+    """
+    The commit before the per-mode filters were removed
+    """
+    removed = subprocess.check_output(
+        ["git", "log", "--format=%H", "-1", "--diff-filter=D", "--", "src/filtering/inheritance_autosomal.py"],
+        cwd=ROOT,
+        text=True,
+    ).strip()
+    if not removed:
+        sys.exit("can't find the commit removing the per-mode inheritance filters")
+    return removed + "^"
+
+
+def load_old_filters(revision, tempdir):
+    for module in OLD_MODULES:
+        source = subprocess.check_output(["git", "show", revision + ":src/filtering/" + module + ".py"], cwd=ROOT)
+        with open(os.path.join(tempdir, module + ".py"), "wb") as f:
+            f.write(source)
+    sys.path.insert(0, tempdir)
+    from inheritance_autosomal import AutosomalFilter
+    from inheritance_allosomal import AllosomalFilter
+
+    return AutosomalFilter, AllosomalFilter
+
+
+def candidate_modes(candidates):
+    singles = {}
+    for v in candidates["single_variants"].keys():
+        singles[v] = sorted(candidates["single_variants"][v]["mode"])
+    compound_hets = {}
+    for g in candidates["compound_hets"].keys():
+        compound_hets[g] = {}
+        for v in candidates["compound_hets"][g].keys():
+            compound_hets[g][v] = sorted(candidates["compound_hets"][g][v]["mode"])
+    return singles, compound_hets
+
+
+def run(apply, handler, family, parents, variants, genes):
+    shim = Shim(family, parents, create_test_variants_per_gene(variants, family), genes)
+    del handler.messages[:]
+    apply(shim)
+    return candidate_modes(shim.candidate_variants), list(handler.messages), shim.inhreport.inheritance_report
+
+
+def scenarios():
+    for gene_chr, chrom, sex, child_gt, ad, dnm, mum_gt, dad_gt, mum_aff, dad_aff, parents, modes in itertools.product(
+        ["1", "X", "Y"],
+        ["1", "X", "Y"],
+        ["XX", "XY", "XXY", "Y"],
+        ["0/1", "1/1", "0/0"],
+        ["4,4", "1,9"],
+        [".", "1"],
+        ["0/0", "0/1", "1/1"],
+        ["0/0", "0/1", "1/1"],
+        ["1", "2"],
+        ["1", "2"],
+        ["both", "none"],
+        MODES,
+    ):
+        if parents == "none" and (mum_gt != "0/0" or dad_gt != "0/0" or mum_aff != "1" or dad_aff != "1"):
+            continue
+        trio = parents == "both"
+        child = create_test_person("fam", "child", "dad" if trio else "0", "mum" if trio else "0", sex, "2", "x")
+        mum = create_test_person("fam", "mum", "0", "0", "XX", mum_aff, "x") if trio else None
+        dad = create_test_person("fam", "dad", "0", "0", "XY", dad_aff, "x") if trio else None
+        family = create_test_family(child, mum, dad)
+        vardata = dict(VARDATA, chrom=chrom, gt=child_gt, ad=ad, dnm=dnm, sex=sex)
+        varid = chrom + "_1097183_A_GG"
+        variants = {"child": {varid: vardata}, "mum": {}, "dad": {}}
+        if trio and mum_gt != "0/0":
+            variants["mum"][varid] = dict(vardata, gt=mum_gt, sex="XX")
+        if trio and dad_gt != "0/0":
+            variants["dad"][varid] = dict(vardata, gt=dad_gt, sex="XY")
+        genes = {"1234": {"chr": gene_chr, "mode": set(modes), "symbol": "GENE"}}
+        yield family, parents, variants, genes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inheritance decision table equivalence check")
+    parser.add_argument("--revision", help="Git revision holding the per-mode filters (default: before their removal)")
+    args = parser.parse_args()
+
+    revision = args.revision
+    if revision is None:
+        revision = removal_revision()
+    handler = Messages()
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        AutosomalFilter, AllosomalFilter = load_old_filters(revision, tempdir)
+
+        def old(shim):
+            if shim.genes["1234"]["chr"] in ["X", "Y"]:
+                AllosomalFilter(shim, "1234").allosomal_filter()
+            else:
+                AutosomalFilter(shim, "1234").autosomal_filter()
+
+        def table(shim):
+            TableInheritanceFilter(shim, "1234").inheritance_filter()
+
+        def batch(shim):
+            BatchInheritanceFilter(shim).inheritance_filter()
+
+        compared = 0
+        failed = 0
+        differ = 0
+        for family, parents, variants, genes in scenarios():
+            try:
+                expected = run(old, handler, family, parents, variants, genes)
+            except (SystemExit, Exception):
+                failed += 1
+                continue
+            compared += 1
+            for method, apply in [("table", table), ("batch", batch)]:
+                if run(apply, handler, family, parents, variants, genes) != expected:
+                    differ += 1
+                    if differ <= 3:
+                        print(method + " differs for " + str(genes["1234"]) + " " + str(variants))
+
+    print(("\t").join(["revision", "compared", "old_failed", "differ"]))
+    print(("\t").join([revision, str(compared), str(failed), str(differ)]))
+    if differ:
+        sys.exit("the inheritance decision table differs from the per-mode filters")
+
+
+if __name__ == "__main__":
+    main()
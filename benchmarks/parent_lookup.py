@@ -0,0 +1,158 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Benchmark of parental genotype lookups: reads a synthetic parent VCF at
+# child sites of increasing density by seeking to every site, through
+# coalesced index windows, by streaming through the whole file and with the
+# adaptive choice the loader makes, to show the crossover point between
+# seeking and streaming for exome-like and genome-like inputs.
+#
+# python3 benchmarks/parent_lookup.py [--scale N] [--seed N]
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import file_loading.vcf_reader as vcf_reader
+from file_loading.tabix import write_bgzf, write_tabix_index
+
+HEADER = [
+    "##fileformat=VCFv4.2",
+    '##INFO=<ID=MAX_AF,Number=A,Type=Float,Description="MAX_AF">',
+    '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+    '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype Quality">',
+    "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "parent"]),
+]
+DENSITIES = [0.0001, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+def exome_positions(rng, scale):
+    """
+    Variants clustered in exons of 20000 genes across a 3Gb genome, on one
+    chromosome
+    """
+    positions = set()
+    for gene in range(int(20000 * scale)):
+        gene_start = rng.randrange(1, int(3000000000 * scale))
+        for exon in range(10):
+            exon_start = gene_start + exon * rng.randrange(1000, 5000)
+            for i in range(rng.randrange(0, 4)):
+                positions.add(exon_start + rng.randrange(0, 200))
+    return sorted(positions)
+
+
+def genome_positions(rng, scale):
+    """
+    Variants every ~1kb across a 3Gb genome, on one chromosome
+    """
+    positions = []
+    pos = 1
+    while pos < 3000000000 * scale:
+        pos += rng.randrange(1, 2000)
+        positions.append(pos)
+    return positions
+
+
+def write_parent(path, positions, rng):
+    lines = [h + "\n" for h in HEADER]
+    records = []
+    for pos in positions:
+        gt = rng.choice(["0/1", "0/1", "1/1"])
+        # random annotation so that records compress about as well as real
+        # annotated VCFs
+        info = "MAX_AF=%.6f;DP=%d;ANN=%032x" % (rng.random() / 1000, rng.randrange(10, 100), rng.getrandbits(128))
+        records.append(["1", str(pos), ".", "A", "G", ".", ".", info, "GT:GQ", gt + ":" + str(rng.randrange(99))])
+    offsets = write_bgzf(path, lines + ["\t".join(r) + "\n" for r in records])
+    index = []
+    for i, r in enumerate(records):
+        index.append((r[0], int(r[1]) - 1, int(r[1]), offsets[len(lines) + i], offsets[len(lines) + i + 1]))
+    write_tabix_index(path, index)
+
+
+def time_lookup(path, sites, window_gap, seek_cost):
+    """
+    Time reading the sites with the given lookup settings
+    """
+    vcf_reader.WINDOW_GAP = window_gap
+    vcf_reader.SEEK_COST = seek_cost
+    start = time.perf_counter()
+    reader = vcf_reader.VcfReader(path)
+    rows = sum(1 for row in reader.query([], ["GT"], sites))
+    return time.perf_counter() - start, rows
+
+
+def run(name, positions, rng, tempdir):
+    path = os.path.join(tempdir, name + ".vcf.gz")
+    write_parent(path, positions, rng)
+    size = os.path.getsize(path)
+    print(name + ": " + str(len(positions)) + " parental variants, " + str(size) + " bytes")
+    print(("\t").join(["density", "sites", "per_site", "windows", "stream", "adaptive", "choice"]))
+    window_gap = vcf_reader.WINDOW_GAP
+    seek_cost = vcf_reader.SEEK_COST
+    crossover = None
+    for density in DENSITIES:
+        sample = sorted(rng.sample(positions, max(1, int(len(positions) * density))))
+        sites = [("1", pos, pos) for pos in sample]
+        per_site, rows = time_lookup(path, sites, 0, 0)
+        windows, _ = time_lookup(path, sites, window_gap, 0)
+        # a seek cost above the file size always streams
+        stream, _ = time_lookup(path, sites, window_gap, size)
+        adaptive, _ = time_lookup(path, sites, window_gap, seek_cost)
+        vcf_reader.WINDOW_GAP = window_gap
+        vcf_reader.SEEK_COST = seek_cost
+        if vcf_reader.plan_lookup(path, vcf_reader.merge_regions(sites)) is None:
+            choice = "stream"
+        else:
+            choice = "index"
+        if rows != len(sites):
+            raise ValueError("expected " + str(len(sites)) + " rows, found " + str(rows))
+        if crossover is None and stream < windows:
+            crossover = density
+        times = ["%.3f" % t for t in [per_site, windows, stream, adaptive]]
+        print(("\t").join([str(density), str(len(sites))] + times + [choice]))
+    print("streaming faster than index windows from density: " + str(crossover) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parental lookup benchmark")
+    parser.add_argument("--scale", type=float, default=0.02, help="Input size, 1 = whole genome (default 0.02)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    args = parser.parse_args()
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        rng = random.Random(args.seed)
+        run("exome", exome_positions(rng, args.scale), rng, tempdir)
+        run("genome", genome_positions(rng, args.scale), rng, tempdir)
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    main()
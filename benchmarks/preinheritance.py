@@ -0,0 +1,127 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Benchmark of pre-inheritance filtering: filters a synthetic proband of
+# SNVs with a realistic mix of consequences, qualities and allele
+# frequencies, with both parents, and reports the best of several runs.
+#
+# python3 benchmarks/preinheritance.py [--variants N] [--repeats N] [--seed N]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from file_loading.vcf_schema import child_schema, parent_schema
+from variants.fields import FIELDS
+from filtering.preinheritance_filtering import PreInheritanceFiltering
+from family.families import Person, Family
+from variants.snv import SNV
+from variants.trio_genotype import add_trio_genotypes
+
+# consequences weighted roughly as in an annotated exome
+CONSEQUENCES = (
+    ["intron_variant"] * 40
+    + ["synonymous_variant"] * 15
+    + ["3_prime_UTR_variant"] * 10
+    + ["missense_variant"] * 20
+    + ["splice_region_variant&intron_variant"] * 5
+    + ["stop_gained", "frameshift_variant", "splice_donor_variant", "inframe_deletion", "start_lost"]
+)
+CHROMS = [str(c) for c in range(1, 23)] + ["X"]
+
+
+def create_variants(n, rng):
+    info_types = {}
+    for attribute, column, tag in FIELDS:
+        if column == "INFO":
+            info_types[tag] = ("1", "String")
+    schema = child_schema(info_types, {"GT": ("1", "String"), "GQ": ("1", "Integer")})
+    pschema = parent_schema(info_types, {"GT": ("1", "String")})
+    columns = {}
+    for i in range(len(schema.infofields)):
+        columns[schema.infofields[i]] = 4 + i
+    variants = {"child": {}, "mum": {}, "dad": {}}
+    for i in range(n):
+        row = ["."] * (4 + len(schema.attributes))
+        row[0:4] = [rng.choice(CHROMS), str(i + 1), "A", "G"]
+        row[columns["Consequence"]] = rng.choice(CONSEQUENCES)
+        row[columns["HGNC_ID"]] = "HGNC:" + str(rng.randrange(2000))
+        row[columns["SYMBOL"]] = "GENE"
+        row[columns["DDD_AF"]] = rng.choice([".", "0", "0.0001", "0.001", "0.01"])
+        row[columns["MAX_AF"]] = rng.choice(["0", "0.0000001", "0.0001"])
+        row[columns["REVEL"]] = rng.choice([".", "0.1", "0.5", "0.9"])
+        row[columns["SpliceAI_pred_DS_AG"]] = rng.choice([".", "0.1", "0.9"])
+        if rng.random() < 0.01:
+            row[columns["DNM"]] = "1"
+        row[-2] = rng.choice(["0/1", "0/1", "1/1"])
+        row[-1] = str(rng.choice([20, 50, 99, 99]))
+        varid = ("_").join(row[0:4])
+        variants["child"][varid] = SNV.from_row(schema, row, "XX")
+        for parent, sex in [("mum", "F"), ("dad", "M")]:
+            gt = rng.choice(["0/0", "0/0", "0/1", "1/1"])
+            if gt != "0/0":
+                variants[parent][varid] = SNV.from_row(pschema, row[0:4] + [gt], sex)
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-inheritance filtering benchmark")
+    parser.add_argument("--variants", type=int, default=100000, help="Proband SNVs (default 100000)")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs, the fastest is reported (default 5)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    variants = create_variants(args.variants, rng)
+    child = Person("fam", "child", "dad", "mum", "XX", "2", "child.vcf")
+    mum = Person("fam", "mum", "0", "0", "XX", "1", "mum.vcf")
+    dad = Person("fam", "dad", "0", "0", "XY", "1", "dad.vcf")
+    family = Family(child, mum, dad)
+    add_trio_genotypes(family, variants)
+
+    times = []
+    for i in range(args.repeats):
+        start = time.perf_counter()
+        variants_per_gene = PreInheritanceFiltering(variants).preinheritance_filter()
+        times.append(time.perf_counter() - start)
+    kept = sum(len(variants_per_gene[gene]) for gene in variants_per_gene)
+    print(("\t").join(["variants", "kept", "genes", "seconds", "us_per_variant"]))
+    print(
+        ("\t").join(
+            [
+                str(args.variants),
+                str(kept),
+                str(len(variants_per_gene)),
+                "%.3f" % min(times),
+                "%.2f" % (min(times) * 1000000 / args.variants),
+            ]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
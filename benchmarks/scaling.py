@@ -0,0 +1,205 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Scaling benchmark suite: generates synthetic cohorts of increasing size
+# with synthetic_cohort.py, runs runclinicalfiltering.py on each with
+# --profile and compares the end to end and per stage wall times with the
+# stored baselines in baselines.json. Exits with status 1 if any time is
+# slower than its baseline by more than the tolerance.
+#
+# python3 benchmarks/scaling.py [--cases NAME,...] [--workdir DIR] [--repeats N] [--seed N]
+#     [--tolerance R] [--filter-args ARGS] [--update-baselines]
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_cohort import generate_cohort
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCHMARK_DIR, "..")
+BASELINES = os.path.join(BENCHMARK_DIR, "baselines.json")
+
+# name: (proband sites per family, families)
+CASES = {
+    "sites_10k": (10000, 1),
+    "sites_100k": (100000, 1),
+    "sites_1m": (1000000, 1),
+    "families_10": (10000, 10),
+    "families_100": (10000, 100),
+    "families_1000": (10000, 1000),
+    "families_10000": (10000, 10000),
+}
+DEFAULT_CASES = ["sites_10k", "sites_100k", "families_10"]
+# differences below this many seconds are treated as noise
+MIN_DIFFERENCE = 0.05
+
+
+def cohort(workdir, name, seed):
+    """
+    Generate a case's cohort, or reuse one already in workdir
+    """
+    sites, families = CASES[name]
+    outdir = os.path.join(workdir, name + "_seed" + str(seed))
+    ped_path = os.path.join(outdir, "cohort.ped")
+    genes_path = os.path.join(outdir, "genes.txt")
+    if not os.path.exists(ped_path):
+        start = time.perf_counter()
+        generate_cohort(outdir, sites, families, seed)
+        print(name + ": cohort generated in %.1fs" % (time.perf_counter() - start), file=sys.stderr)
+    return ped_path, genes_path
+
+
+def run_filter(ped_path, genes_path, outdir, filter_args):
+    """
+    Run the filter on a cohort, returns the end to end wall time and the
+    per stage totals from the profile
+    """
+    if os.path.exists(outdir):
+        shutil.rmtree(outdir)
+    os.makedirs(outdir)
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.path.join(REPO_DIR, "src") + os.pathsep + env.get("PYTHONPATH", "")
+    cmd = [sys.executable, os.path.join(REPO_DIR, "runclinicalfiltering.py")]
+    cmd += ["--ped", ped_path, "--known-genes", genes_path, "--outdir", outdir, "--profile"]
+    cmd += filter_args
+    start = time.perf_counter()
+    subprocess.run(cmd, env=env, check=True)
+    elapsed = time.perf_counter() - start
+    profiles = [f for f in os.listdir(outdir) if f.endswith("clinical_filter_profile.json")]
+    with open(os.path.join(outdir, profiles[0])) as f:
+        totals = json.load(f)["totals"]
+    stages = {}
+    for stage in totals.keys():
+        stages[stage] = totals[stage]["wall_time"]
+    return elapsed, stages
+
+
+def measure(workdir, name, seed, repeats, filter_args):
+    """
+    Best of repeats for the end to end time and each stage
+    """
+    ped_path, genes_path = cohort(workdir, name, seed)
+    outdir = os.path.join(workdir, name + "_seed" + str(seed) + "_output")
+    best = None
+    for i in range(repeats):
+        elapsed, stages = run_filter(ped_path, genes_path, outdir, filter_args)
+        if best is None:
+            best = {"end_to_end": elapsed, "stages": stages}
+            continue
+        best["end_to_end"] = min(best["end_to_end"], elapsed)
+        for stage in stages.keys():
+            best["stages"][stage] = min(best["stages"][stage], stages[stage])
+    best["end_to_end"] = round(best["end_to_end"], 3)
+    for stage in best["stages"].keys():
+        best["stages"][stage] = round(best["stages"][stage], 3)
+    return best
+
+
+def compare(name, result, baseline, tolerance):
+    """
+    Print a line per measurement, returns the number slower than their
+    baseline by more than the tolerance
+    """
+    rows = [("end_to_end", result["end_to_end"], baseline.get("end_to_end") if baseline else None)]
+    for stage in result["stages"].keys():
+        rows.append((stage, result["stages"][stage], baseline["stages"].get(stage) if baseline else None))
+    regressions = 0
+    for measurement, seconds, expected in rows:
+        if expected is None:
+            print(("\t").join([name, measurement, "%.3f" % seconds, ".", ".", "no baseline"]))
+            continue
+        ratio = seconds / expected if expected > 0 else 1.0
+        status = "ok"
+        if ratio > tolerance and seconds - expected > MIN_DIFFERENCE:
+            status = "SLOWER"
+            regressions += 1
+        elif ratio < 1 / tolerance and expected - seconds > MIN_DIFFERENCE:
+            status = "faster"
+        print(("\t").join([name, measurement, "%.3f" % seconds, "%.3f" % expected, "%.2f" % ratio, status]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clinical filter scaling benchmarks")
+    parser.add_argument(
+        "--cases",
+        default=(",").join(DEFAULT_CASES),
+        help="Comma separated cases to run, from " + (", ").join(CASES.keys()) + " (default %(default)s)",
+    )
+    parser.add_argument("--workdir", help="Directory to keep generated cohorts in for later runs (default temporary)")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per case, the fastest is kept (default 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.25, help="Slowdown ratio reported as a regression (default 1.25)"
+    )
+    parser.add_argument("--filter-args", default="", help="Extra options for runclinicalfiltering.py")
+    parser.add_argument("--update-baselines", action="store_true", help="Store the measured times as baselines")
+    args = parser.parse_args()
+
+    names = args.cases.split(",")
+    for name in names:
+        if name not in CASES:
+            parser.error("unknown case " + name)
+
+    baselines = {"seed": args.seed, "cases": {}}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    if baselines["seed"] != args.seed and not args.update_baselines:
+        parser.error("baselines were measured with --seed " + str(baselines["seed"]))
+
+    workdir = args.workdir
+    if workdir is None:
+        workdir = tempfile.mkdtemp()
+    regressions = 0
+    try:
+        print(("\t").join(["case", "measure", "seconds", "baseline", "ratio", "status"]))
+        for name in names:
+            result = measure(workdir, name, args.seed, args.repeats, shlex.split(args.filter_args))
+            regressions += compare(name, result, baselines["cases"].get(name), args.tolerance)
+            baselines["cases"][name] = result
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir)
+
+    if args.update_baselines:
+        baselines["seed"] = args.seed
+        baselines["python"] = platform.python_version()
+        baselines["machine"] = platform.machine()
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write("\n")
+    elif regressions > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Synthetic cohort generator: writes bgzipped, tabix indexed trio VCFs with
+# VEP style annotation, a PED file and a DDG2P style gene file. Everything
+# is generated offline from the seed, each family from its own random
+# stream, so a cohort is identical across machines and versions and a
+# larger cohort starts with the families of a smaller one.
+#
+# python3 benchmarks/synthetic_cohort.py OUTDIR [--sites N] [--families N] [--genes N] [--seed N]
+
+import argparse
+import bisect
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from file_loading.tabix import write_bgzf, write_tabix_index
+
+# GRCh38 chromosome lengths
+CHROM_LENGTHS = [
+    ("1", 248956422),
+    ("2", 242193529),
+    ("3", 198295559),
+    ("4", 190214555),
+    ("5", 181538259),
+    ("6", 170805979),
+    ("7", 159345973),
+    ("8", 145138636),
+    ("9", 138394717),
+    ("10", 133797422),
+    ("11", 135086622),
+    ("12", 133275309),
+    ("13", 114364328),
+    ("14", 107043718),
+    ("15", 101991189),
+    ("16", 90338345),
+    ("17", 83257441),
+    ("18", 80373285),
+    ("19", 58617616),
+    ("20", 64444167),
+    ("21", 46709983),
+    ("22", 50818468),
+    ("X", 156040895),
+]
+CHROMS = [chrom for chrom, length in CHROM_LENGTHS]
+CHROM_WEIGHTS = [length for chrom, length in CHROM_LENGTHS]
+
+INFO_HEADER = [
+    ("Consequence", ".", "String"),
+    ("Gene", ".", "String"),
+    ("SYMBOL", ".", "String"),
+    ("Feature", ".", "String"),
+    ("CANONICAL", ".", "String"),
+    ("HGNC_ID", ".", "String"),
+    ("MAX_AF", "A", "Float"),
+    ("MAX_AF_POPS", ".", "String"),
+    ("DDD_AF", "A", "Float"),
+    ("DDD_father_AF", "A", "Float"),
+    ("REVEL", ".", "Float"),
+    ("PolyPhen", ".", "String"),
+    ("Protein_position", ".", "String"),
+    ("HGVSc", ".", "String"),
+    ("HGVSp", ".", "String"),
+    ("SpliceAI_pred_DS_AG", ".", "Float"),
+    ("SpliceAI_pred_DS_AL", ".", "Float"),
+    ("SpliceAI_pred_DS_DG", ".", "Float"),
+    ("SpliceAI_pred_DS_DL", ".", "Float"),
+    ("CADD_PHRED", ".", "Float"),
+    ("AC_XX", "A", "Integer"),
+    ("AN_XX", "1", "Integer"),
+    ("nhomalt_XX", "A", "Integer"),
+    ("AC_XY", "A", "Integer"),
+    ("AN_XY", "1", "Integer"),
+    ("nhomalt_XY", "A", "Integer"),
+    ("END", "1", "Integer"),
+    ("SVTYPE", "1", "String"),
+    ("SVLEN", "1", "Integer"),
+    ("CNVFILTER", "1", "String"),
+    ("HGNC_ID_ALL", ".", "String"),
+    ("SYMBOL_ALL", ".", "String"),
+]
+FORMAT_HEADER = [
+    ("GT", "1", "String"),
+    ("GQ", "1", "Integer"),
+    ("AD", "R", "Integer"),
+    ("CN", "1", "Integer"),
+    ("CIFER_INHERITANCE", "1", "String"),
+]
+
+# consequences weighted roughly as in an annotated exome, for sites in and
+# outside genes
+GENIC_CONSEQUENCES = (
+    ["intron_variant"] * 40
+    + ["synonymous_variant"] * 15
+    + ["3_prime_UTR_variant"] * 8
+    + ["5_prime_UTR_variant"] * 2
+    + ["missense_variant"] * 20
+    + ["splice_region_variant&intron_variant"] * 5
+    + ["stop_gained", "frameshift_variant", "splice_donor_variant", "splice_acceptor_variant"]
+    + ["inframe_deletion", "inframe_insertion", "start_lost", "stop_lost"]
+)
+INTERGENIC_CONSEQUENCES = ["intergenic_variant"] * 6 + ["upstream_gene_variant", "downstream_gene_variant"]
+BASES = ["A", "C", "G", "T"]
+GENE_MODES = ["Biallelic"] * 35 + ["Monoallelic"] * 45 + ["Imprinted"] * 2
+X_GENE_MODES = ["Hemizygous"] * 6 + ["X-linked dominant"] * 4 + ["Biallelic"]
+GENE_STATUSES = ["confirmed"] * 6 + ["probable"] * 3 + ["possible"]
+GENE_MECHANISMS = ["Loss of function"] * 6 + ["Activating", "Dominant negative", "Uncertain"]
+
+# share of proband sites placed in genes, the rest are spread over the genome
+GENIC_FRACTION = 0.4
+DE_NOVO_RATE = 0.001
+CNVS_PER_PROBAND = 2
+
+
+class Gene(object):
+    def __init__(self, chrom, start, end, symbol, hgnc_id, status, mode, mechanism):
+        self.chrom = chrom
+        self.start = start
+        self.end = end
+        self.symbol = symbol
+        self.hgnc_id = hgnc_id
+        self.status = status
+        self.mode = mode
+        self.mechanism = mechanism
+
+
+class Genome(object):
+    """
+    Genes placed along the GRCh38 chromosomes, with a lookup of the gene
+    overlapping a position
+    """
+
+    def __init__(self, ngenes, seed):
+        rng = random.Random("genes-" + str(seed))
+        self.genes = []
+        for i in range(ngenes):
+            chrom = rng.choices(CHROMS, CHROM_WEIGHTS)[0]
+            length = rng.randrange(5000, 200000)
+            start = rng.randrange(1, dict(CHROM_LENGTHS)[chrom] - length)
+            mode = rng.choice(X_GENE_MODES if chrom == "X" else GENE_MODES)
+            gene = Gene(
+                chrom,
+                start,
+                start + length,
+                "GENE" + str(i + 1),
+                str(1000 + i),
+                rng.choice(GENE_STATUSES),
+                mode,
+                rng.choice(GENE_MECHANISMS),
+            )
+            self.genes.append(gene)
+        self.genes.sort(key=lambda gene: (CHROMS.index(gene.chrom), gene.start))
+        self.starts = {}
+        self.by_chrom = {}
+        for gene in self.genes:
+            self.by_chrom.setdefault(gene.chrom, []).append(gene)
+            self.starts.setdefault(gene.chrom, []).append(gene.start)
+
+    def gene_at(self, chrom, pos):
+        """
+        A gene overlapping pos, or None
+        """
+        if chrom not in self.starts:
+            return None
+        idx = bisect.bisect_right(self.starts[chrom], pos) - 1
+        while idx >= 0:
+            gene = self.by_chrom[chrom][idx]
+            if gene.start <= pos <= gene.end:
+                return gene
+            if gene.start < pos - 200000:
+                break
+            idx -= 1
+        return None
+
+    def write_genes(self, path):
+        with open(path, "w") as f:
+            columns = ["chr", "start", "end", "gene", "hgnc_id", "confidence", "mode", "mechanism", "disease"]
+            f.write(("\t").join(columns) + "\n")
+            for gene in self.genes:
+                values = [gene.chrom, str(gene.start), str(gene.end), gene.symbol, gene.hgnc_id]
+                values += [gene.status, gene.mode, gene.mechanism, gene.symbol + " SYNDROME"]
+                f.write(("\t").join(values) + "\n")
+
+
+def vcf_header(sample):
+    header = ["##fileformat=VCFv4.2"]
+    for chrom, length in CHROM_LENGTHS:
+        header.append("##contig=<ID=" + chrom + ",length=" + str(length) + ">")
+    for tag, number, vcftype in INFO_HEADER:
+        header.append("##INFO=<ID=" + tag + ",Number=" + number + ",Type=" + vcftype + ',Description="' + tag + '">')
+    header.append('##INFO=<ID=DNM,Number=0,Type=Flag,Description="De novo mutation">')
+    for tag, number, vcftype in FORMAT_HEADER:
+        header.append("##FORMAT=<ID=" + tag + ",Number=" + number + ",Type=" + vcftype + ',Description="' + tag + '">')
+    header.append(("\t").join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", sample]))
+    return header
+
+
+def frequency(rng):
+    """
+    Population allele frequency, mostly rare as in a pre-filtered VCF
+    """
+    r = rng.random()
+    if r < 0.35:
+        return 0.0
+    if r < 0.9:
+        return rng.random() * 0.0005
+    return rng.random() * 0.01
+
+
+def site_annotation(rng, genome, chrom, pos):
+    """
+    INFO column of a proband site
+    """
+    gene = genome.gene_at(chrom, pos)
+    max_af = frequency(rng)
+    an = 70000
+    ac = int(max_af * an)
+    info = []
+    if gene is None:
+        info.append("Consequence=" + rng.choice(INTERGENIC_CONSEQUENCES))
+    else:
+        consequence = rng.choice(GENIC_CONSEQUENCES)
+        transcript = "ENST%011d" % int(gene.hgnc_id)
+        info.append("Consequence=" + consequence)
+        info.append("Gene=ENSG%011d" % int(gene.hgnc_id))
+        info.append("SYMBOL=" + gene.symbol)
+        info.append("Feature=" + transcript)
+        info.append("CANONICAL=YES")
+        info.append("HGNC_ID=HGNC:" + gene.hgnc_id)
+        info.append("HGVSc=" + transcript + ".1:c." + str(pos - gene.start + 1) + "A>G")
+        if consequence in ["missense_variant", "stop_gained", "synonymous_variant", "start_lost", "stop_lost"]:
+            protein_position = (pos - gene.start) // 30 + 1
+            info.append("Protein_position=" + str(protein_position))
+            info.append("HGVSp=ENSP%011d.1:p.Ala%dThr" % (int(gene.hgnc_id), protein_position))
+        if consequence == "missense_variant":
+            info.append("REVEL=%.3f" % rng.random())
+            info.append("PolyPhen=" + rng.choice(["benign(0.01)", "possibly_damaging(0.6)", "probably_damaging(0.99)"]))
+        if "splice" in consequence or consequence in ["synonymous_variant", "intron_variant"]:
+            for tag in ["SpliceAI_pred_DS_AG", "SpliceAI_pred_DS_AL", "SpliceAI_pred_DS_DG", "SpliceAI_pred_DS_DL"]:
+                info.append(tag + "=%.2f" % (rng.random() ** 4))
+    info.append("MAX_AF=%.6g" % max_af)
+    info.append("MAX_AF_POPS=" + rng.choice(["gnomAD_NFE", "gnomAD_AFR", "gnomAD_EAS", "gnomAD_SAS"]))
+    info.append("DDD_AF=" + rng.choice([".", "0", "%.6g" % max_af, "%.6g" % (max_af * 4)]))
+    if chrom == "X":
+        info.append("DDD_father_AF=" + rng.choice([".", "0", "0", "0.0002"]))
+    info.append("CADD_PHRED=%.1f" % (rng.random() * 40))
+    ac_xx = ac // 2
+    ac_xy = ac - ac_xx
+    nhomalt = 1 if ac > 20 and rng.random() < 0.2 else 0
+    info.append("AC_XX=%d;AN_XX=%d;nhomalt_XX=%d" % (ac_xx, an // 2, nhomalt))
+    info.append("AC_XY=%d;AN_XY=%d;nhomalt_XY=%d" % (ac_xy, an // 2, 0))
+    return info
+
+
+def sample_column(rng, gt):
+    depth = rng.randrange(15, 80)
+    if gt == "1/1":
+        alt = depth
+    else:
+        alt = rng.randrange(depth // 3, 2 * depth // 3 + 1)
+    gq = rng.choice([99, 99, 99, 70, 50, 30, 15])
+    return gt + ":" + str(gq) + ":" + str(depth - alt) + "," + str(alt)
+
+
+def parent_genotypes(rng, child_gt):
+    """
+    Genotypes of mum and dad at a proband site, None where a parent doesn't
+    have the variant. de novo is True if neither parent has it
+    """
+    if rng.random() < DE_NOVO_RATE:
+        return None, None, True
+    if child_gt == "1/1":
+        choices = [("0/1", "0/1")] * 8 + [("1/1", "0/1"), ("0/1", "1/1"), ("1/1", "1/1")]
+    else:
+        choices = [("0/1", None)] * 9 + [(None, "0/1")] * 9 + [("0/1", "0/1"), ("1/1", None), (None, "1/1")]
+    mum, dad = rng.choice(choices)
+    return mum, dad, False
+
+
+def random_site(rng, genome):
+    if rng.random() < GENIC_FRACTION:
+        gene = rng.choice(genome.genes)
+        return gene.chrom, rng.randrange(gene.start, gene.end + 1)
+    chrom = rng.choices(CHROMS, CHROM_WEIGHTS)[0]
+    return chrom, rng.randrange(1, dict(CHROM_LENGTHS)[chrom])
+
+
+def cnv_record(rng, genome):
+    gene = rng.choice(genome.genes)
+    start = max(1, gene.start - rng.randrange(1000, 100000))
+    end = gene.end + rng.randrange(1000, 100000)
+    alt = rng.choice(["<DEL>", "<DUP>"])
+    info = [
+        "END=" + str(end),
+        "SVTYPE=" + alt[1:4],
+        "SVLEN=" + str(end - start),
+        "CNVFILTER=" + rng.choice(["Pass", "Pass", "Pass", "Fail"]),
+        "HGNC_ID_ALL=HGNC:" + gene.hgnc_id,
+        "SYMBOL_ALL=" + gene.symbol,
+        "Consequence=" + ("transcript_ablation" if alt == "<DEL>" else "transcript_amplification"),
+    ]
+    cn = "1" if alt == "<DEL>" else "3"
+    inheritance = rng.choice(["not_inherited", "maternal_inh", "paternal_inh", "uncertain"])
+    sample = "0/1:99:.:" + cn + ":" + inheritance
+    site = [gene.chrom, str(start), ".", "N", alt, ".", "PASS"]
+    return site + [(";").join(info), "GT:GQ:AD:CN:CIFER_INHERITANCE", sample]
+
+
+def family_records(rng, genome, sites, sex):
+    """
+    Records of the proband, mum and dad of one family, each unsorted
+    """
+    records = {"child": [], "mum": [], "dad": []}
+    seen = set()
+    while len(seen) < sites:
+        chrom, pos = random_site(rng, genome)
+        if (chrom, pos) in seen:
+            continue
+        seen.add((chrom, pos))
+        ref = rng.choice(BASES)
+        alt = rng.choice([b for b in BASES if b != ref])
+        child_gt = rng.choice(["0/1", "0/1", "0/1", "1/1"])
+        if chrom == "X" and sex == "XY":
+            child_gt = "1/1"
+        mum_gt, dad_gt, de_novo = parent_genotypes(rng, child_gt)
+        if chrom == "X":
+            dad_gt = "1/1" if dad_gt is not None else None
+        info = site_annotation(rng, genome, chrom, pos)
+        if de_novo:
+            info.append("DNM")
+        site = [chrom, str(pos), ".", ref, alt, ".", "PASS"]
+        records["child"].append(site + [(";").join(info), "GT:GQ:AD", sample_column(rng, child_gt)])
+        for parent, gt in [("mum", mum_gt), ("dad", dad_gt)]:
+            if gt is not None:
+                records[parent].append(site + [".", "GT:GQ:AD", sample_column(rng, gt)])
+    # variants the parents have which the proband didn't inherit
+    for parent in ["mum", "dad"]:
+        for i in range(sites // 2):
+            chrom, pos = random_site(rng, genome)
+            if (chrom, pos) in seen or (parent == "dad" and chrom == "X"):
+                continue
+            seen.add((chrom, pos))
+            gt = rng.choice(["0/1", "0/1", "1/1"])
+            site = [chrom, str(pos), ".", "A", "G", ".", "PASS"]
+            records[parent].append(site + [".", "GT:GQ:AD", sample_column(rng, gt)])
+    for i in range(CNVS_PER_PROBAND):
+        records["child"].append(cnv_record(rng, genome))
+    return records
+
+
+def write_vcf(path, sample, records):
+    """
+    Write sorted records to a bgzipped VCF with a tabix index
+    """
+    records.sort(key=lambda r: (CHROMS.index(r[0]), int(r[1])))
+    lines = [line + "\n" for line in vcf_header(sample)]
+    offsets = write_bgzf(path, lines + [("\t").join(r) + "\n" for r in records])
+    index = []
+    for i in range(len(records)):
+        r = records[i]
+        beg = int(r[1]) - 1
+        end = beg + len(r[3])
+        for item in r[7].split(";"):
+            if item.startswith("END="):
+                end = int(item[4:])
+        index.append((r[0], beg, end, offsets[len(lines) + i], offsets[len(lines) + i + 1]))
+    write_tabix_index(path, index)
+
+
+def generate_cohort(outdir, sites, families, seed=1, ngenes=2000):
+    """
+    Write a cohort of trios to outdir: cohort.ped, genes.txt and
+    vcfs/<person>.vcf.gz, returns the paths of the PED and gene files
+    """
+    outdir = os.path.abspath(outdir)
+    vcfdir = os.path.join(outdir, "vcfs")
+    os.makedirs(vcfdir, exist_ok=True)
+    genome = Genome(ngenes, seed)
+    genes_path = os.path.join(outdir, "genes.txt")
+    genome.write_genes(genes_path)
+    ped_path = os.path.join(outdir, "cohort.ped")
+    with open(ped_path, "w") as ped:
+        for i in range(families):
+            rng = random.Random("family-" + str(seed) + "-" + str(i))
+            family_id = "fam" + str(i + 1)
+            sex = rng.choice(["XX", "XY"])
+            records = family_records(rng, genome, sites, sex)
+            people = [
+                ("child", family_id + "_child", family_id + "_dad", family_id + "_mum", sex, "2"),
+                ("mum", family_id + "_mum", "0", "0", "XX", "1"),
+                ("dad", family_id + "_dad", "0", "0", "XY", "1"),
+            ]
+            for member, person_id, dad_id, mum_id, person_sex, affected in people:
+                path = os.path.join(vcfdir, person_id + ".vcf.gz")
+                write_vcf(path, person_id, records[member])
+                ped.write(("\t").join([family_id, person_id, dad_id, mum_id, person_sex, affected, path]) + "\n")
+    return ped_path, genes_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic trio cohort generator")
+    parser.add_argument("outdir", help="Directory to write the cohort to")
+    parser.add_argument("--sites", type=int, default=10000, help="Proband sites per family (default 10000)")
+    parser.add_argument("--families", type=int, default=1, help="Number of trios (default 1)")
+    parser.add_argument("--genes", type=int, default=2000, help="Genes in the gene file (default 2000)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    args = parser.parse_args()
+
+    ped_path, genes_path = generate_cohort(args.outdir, args.sites, args.families, args.seed, args.genes)
+    print("PED file: " + ped_path)
+    print("gene file: " + genes_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# Benchmark of trio loading: times loading one synthetic trio (generated
+# with synthetic_cohort.py, or reused from --workdir) sequentially, through
+# load_variants with --threads (which only reads the parents concurrently
+# with the bcftools loader) and with load_trio_concurrent whatever the
+# loader. Checks all three load the same variants and reports the best of
+# several runs of each.
+#
+# python3 benchmarks/trio_loading.py [--sites N] [--threads N] [--loader python|bcftools]
+#     [--workdir DIR] [--repeats N] [--seed N]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from synthetic_cohort import generate_cohort
+from file_loading.load_vcfs import load_variants, load_trio_concurrent
+from file_loading.ped_files import openped
+
+
+def run(family, loader, threads, concurrent):
+    start = time.perf_counter()
+    if concurrent:
+        child_vars, mum_vars, dad_vars = load_trio_concurrent(family, None, loader, None, threads)
+        variants = {"child": child_vars, "mum": mum_vars, "dad": dad_vars}
+    else:
+        variants = load_variants(family, loader=loader, threads=threads)
+    return time.perf_counter() - start, variants
+
+
+def loaded(variants):
+    return dict((member, sorted(variants[member].keys())) for member in variants.keys())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trio loading benchmark")
+    parser.add_argument("--sites", type=int, default=100000, help="Proband sites (default 100000)")
+    parser.add_argument("--threads", type=int, default=3, help="Threads for the concurrent load (default 3)")
+    parser.add_argument(
+        "--loader", choices=["python", "bcftools"], default="python", help="VCF loader (default python)"
+    )
+    parser.add_argument("--workdir", help="Directory for the synthetic trio, reused if already there")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs, the fastest is reported (default 3)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    args = parser.parse_args()
+
+    workdir = args.workdir
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix="trio_loading_")
+    outdir = os.path.join(workdir, "trio_" + str(args.sites) + "_seed" + str(args.seed))
+    ped_path = os.path.join(outdir, "cohort.ped")
+    if not os.path.exists(ped_path):
+        generate_cohort(outdir, args.sites, 1, args.seed)
+    families = openped(ped_path, None)
+    family = families[list(families.keys())[0]]
+
+    print(("\t").join(["method", "child", "mum", "dad", "seconds", "speedup"]))
+    methods = [
+        ("sequential", 1, False),
+        ("threads_" + str(args.threads), args.threads, False),
+        ("concurrent", args.threads, True),
+    ]
+    results = {}
+    for method, threads, concurrent in methods:
+        times = []
+        for i in range(args.repeats):
+            seconds, variants = run(family, args.loader, threads, concurrent)
+            times.append(seconds)
+        results[method] = (min(times), loaded(variants))
+        print(
+            ("\t").join(
+                [
+                    method,
+                    str(len(variants["child"])),
+                    str(len(variants["mum"])),
+                    str(len(variants["dad"])),
+                    "%.3f" % min(times),
+                    "%.2f" % (results["sequential"][0] / min(times)),
+                ]
+            )
+        )
+    for method in results.keys():
+        if results[method][1] != results["sequential"][1]:
+            sys.exit(method + " and sequential trio loading differ")
+
+if __name__ == "__main__":
+    main()
@@ -26,8 +26,13 @@ import logging
 from datetime import datetime
 
 from utils.parse_args import get_options
-from file_loading.ped_files import create_ped, openped
+from file_loading.ped_files import create_ped, openped, order_families, vcfs_done
+from file_loading.parent_cache import ParentCache
+from file_loading.variant_cache import VariantCache
+from file_loading.gene_catalog import GeneCatalog
+from filtering.rules import load_rules
 from filtering.filter import Filter
+from utils.profiling import Profile
 from output.print_results import create_output
 
 
@@ -44,6 +49,10 @@ def main():
         logfile = args.outdir + "/" + args.ped.split("/")[-1].replace(".ped", "") + "_clinical_filter.log"
     logging.basicConfig(filename=logfile, level=logging.DEBUG)
 
+    if args.threads > 1 and (args.loader == "python" or args.cache_dir is not None or args.columnar):
+        # only parents read by bcftools subprocesses are loaded concurrently
+        logging.warning("--threads has no effect with --loader python, --cache-dir or --columnar")
+
     if args.ped is None:
         # create ped file from family members on command line
         args.ped = args.outdir + "/ped." + timestamp + ".ped"
@@ -59,23 +68,81 @@ def main():
 
     families = openped(args.ped, args.proband_list)
 
+    # parents shared between families are only read once per site
+    parent_cache = None
+    if args.parent_cache_size > 0:
+        parent_cache = ParentCache(args.parent_cache_size)
+    variant_cache = None
+    if args.cache_dir is not None:
+        variant_cache = VariantCache(args.cache_dir)
+
+    # filter rules are loaded once, their evaluation order is reset for each
+    # family
+    rules = load_rules(args.rules)
+    profile = Profile(args.profile)
+
+    # known genes are loaded once and shared read-only by every family
+    gene_catalog = None
+    if args.known_genes is not None:
+        gene_catalog = GeneCatalog.from_file(args.known_genes)
+
     variants_per_family = {}
     inheritance_reports_per_family = {}
-    for family in families.keys():
+    ordered = order_families(families)
+    # VCFs are released from the caches after the last family using them
+    released = vcfs_done(families, ordered)
+    for family in ordered:
         varfilter = Filter(
             families[family],
             args.known_genes,
             args.known_regions,
             args.trusted_variants,
             args.outdir,
+            args.loader,
+            args.pushdown,
+            args.threads,
+            args.restrict_to_genes,
+            args.gene_padding,
+            parent_cache,
+            variant_cache,
+            args.columnar,
+            rules,
+            profile,
+            gene_catalog,
         )
         filtered_variants, inheritance_report = varfilter.filter_trio()
 
         variants_per_family[family] = filtered_variants
         inheritance_reports_per_family[family] = inheritance_report
+        for path in released[family]:
+            if parent_cache is not None:
+                parent_cache.release(path)
+            if variant_cache is not None:
+                variant_cache.release(path)
+
+    if parent_cache is not None:
+        parent_cache.log_counts()
+    rules.log_counts()
+    if args.profile:
+        profile.write(profile_root(families, args.outdir))
+
+    # output in ped file order
+    variants_per_family = {family: variants_per_family[family] for family in families.keys()}
+    inheritance_reports_per_family = {family: inheritance_reports_per_family[family] for family in families.keys()}
 
     create_output(families, variants_per_family, inheritance_reports_per_family, args.outdir)
 
 
+def profile_root(families, outdir):
+    """
+    Path of the profile files without the extension, named like the other
+    output files
+    """
+    if len(families.keys()) > 1:
+        return outdir + "/clinical_filter_profile"
+    proband = families[list(families.keys())[0]].proband.person_id
+    return outdir + "/" + proband + "_clinical_filter_profile"
+
+
 if __name__ == "__main__":
     main()
@@ -27,13 +27,15 @@ class Person(object):
     Person object: ID, VCF, sex, affected status
     """
 
-    def __init__(self, family_id, person_id, dad_id, mum_id, sex, affected, path):
+    def __init__(self, family_id, person_id, dad_id, mum_id, sex, affected, path, sample_id=None):
         # note that a person may be in >1 family if it is a parent
         self.family_id = family_id
         self.person_id = person_id
         self.mum_id = mum_id
         self.dad_id = dad_id
         self.vcf_path = path
+        # sample name in a multi-sample VCF, None for a single sample VCF
+        self.sample_id = sample_id
         self.sex = sex
         self.X_count = self.get_X_count()
         # convert affected to true/false
@@ -47,7 +49,7 @@ class Person(object):
     def __repr__(self):
         return (
             'Person(person_id="{}", dad_id="{}", mum_id="{}", sex="{}", '
-            'X_count="{}", affected="{}", path="{}")'.format(
+            'X_count="{}", affected="{}", path="{}", sample_id="{}")'.format(
                 self.get_id(),
                 self.get_dad_id(),
                 self.get_mum_id(),
@@ -55,6 +57,7 @@ class Person(object):
                 self.get_X_count(),
                 self.get_affected_status(),
                 self.get_vcf_path(),
+                self.get_sample_id(),
             )
         )
 
@@ -107,6 +110,12 @@ class Person(object):
         """
         return self.vcf_path
 
+    def get_sample_id(self):
+        """
+        get sample name in a multi-sample vcf file (None if single sample)
+        """
+        return self.sample_id
+
     def get_parents(self):
         """
         get ids of parents (if any)
@@ -126,6 +135,7 @@ class Person(object):
             and self.dad_id == other.dad_id
             and self.affected == other.affected
             and self.vcf_path == other.vcf_path
+            and self.sample_id == other.sample_id
             and self.sex == other.sex
         )
 
@@ -180,5 +190,19 @@ class Family(object):
         else:
             return False
 
+    def is_joint(self):
+        """
+        are the proband and parents samples in one multi-sample vcf? returns
+        true/false
+        """
+        if self.has_no_parents() or self.proband.get_sample_id() is None:
+            return False
+        for parent in [self.mum, self.dad]:
+            if parent is None:
+                continue
+            if parent.get_sample_id() is None or parent.get_vcf_path() != self.proband.get_vcf_path():
+                return False
+        return True
+
     def __eq__(self, other):
         return self.proband == other.proband and self.mum == other.mum and self.dad == other.dad
@@ -0,0 +1,131 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+
+FIELDS = ["chr", "start", "end", "symbol", "status", "mode", "mechanism"]
+SET_FIELDS = ["status", "mode", "mechanism"]
+
+
+class GeneCatalog(Mapping):
+    """
+    Read-only known genes (DDG2P) keyed by HGNC id, loaded once per run and
+    shared by every family. Each gene is a read-only mapping of chr, start,
+    end and symbol strings and status, mode and mechanism frozensets, as
+    given for each gene by load_genes. Strings are interned, so genes share
+    their chromosome, status, mode and mechanism strings. Nothing is changed
+    after loading, so a catalog built before worker processes are forked is
+    used by them as it is, and it pickles as its rows for other start
+    methods
+    """
+
+    __slots__ = ["_rows", "_genes", "_chroms"]
+
+    def __init__(self, rows):
+        """
+        rows are (chr, start, end, symbol, hgnc id, status, mode, mechanism)
+        as in the genes file, a gene with more than one row has the union of
+        their status, mode and mechanism
+        """
+        intern = sys.intern
+        self._rows = tuple([tuple([intern(field) for field in row]) for row in rows])
+        genes = {}
+        for chr, start, end, symbol, hgnc_id, status, mode, mechanism in self._rows:
+            gene = genes.get(hgnc_id)
+            if gene is None:
+                gene = {"chr": chr, "start": start, "end": end, "symbol": symbol}
+                gene["status"] = [status]
+                gene["mode"] = [mode]
+                gene["mechanism"] = [mechanism]
+                genes[hgnc_id] = gene
+            else:
+                gene["status"].append(status)
+                gene["mode"].append(mode)
+                gene["mechanism"].append(mechanism)
+
+        chroms = {}
+        for hgnc_id in genes.keys():
+            gene = genes[hgnc_id]
+            for field in SET_FIELDS:
+                gene[field] = frozenset(gene[field])
+            genes[hgnc_id] = MappingProxyType(gene)
+            if gene["chr"] not in chroms:
+                chroms[gene["chr"]] = []
+            chroms[gene["chr"]].append((int(gene["start"]), hgnc_id))
+        for chrom in chroms.keys():
+            chroms[chrom] = tuple([hgnc_id for start, hgnc_id in sorted(chroms[chrom])])
+        self._genes = MappingProxyType(genes)
+        self._chroms = MappingProxyType(chroms)
+
+    @classmethod
+    def from_file(cls, genes_file):
+        """
+        Load the genes file, tab separated chr, start, end, symbol, hgnc id,
+        status, mode and mechanism, with a header line starting chr
+        """
+        rows = []
+        with open(genes_file, "r") as g:
+            for l in g:
+                if not l.startswith("chr"):
+                    rows.append(l.split("\t")[0:8])
+        return cls(rows)
+
+    def __getitem__(self, hgnc_id):
+        return self._genes[hgnc_id]
+
+    def __iter__(self):
+        return iter(self._genes)
+
+    def __len__(self):
+        return len(self._genes)
+
+    def __contains__(self, hgnc_id):
+        return hgnc_id in self._genes
+
+    def __reduce__(self):
+        return (GeneCatalog, (self._rows,))
+
+    def chromosomes(self):
+        return list(self._chroms.keys())
+
+    def genes_on(self, chrom):
+        """
+        HGNC ids of the genes on a chromosome, ordered by start
+        """
+        return self._chroms.get(chrom, ())
+
+    def as_dict(self):
+        """
+        The genes as a new dict of dicts with set values, as load_genes gave
+        """
+        genes = {}
+        for hgnc_id in self._genes.keys():
+            genes[hgnc_id] = {}
+            for field in FIELDS:
+                if field in SET_FIELDS:
+                    genes[hgnc_id][field] = set(self._genes[hgnc_id][field])
+                else:
+                    genes[hgnc_id][field] = self._genes[hgnc_id][field]
+        return genes
@@ -21,40 +21,61 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from file_loading.gene_catalog import GeneCatalog
+from file_loading.vcf_reader import merge_regions
+
 
 def load_genes(genes_file):
     """
-    load genes from DDG2P
+    load genes from DDG2P, as a dict of dicts which can be changed. A run
+    loads a GeneCatalog once instead
+    """
+    return GeneCatalog.from_file(genes_file).as_dict()
+
+
+def gene_regions(genes, padding=0):
+    """
+    Merged regions covering the genes plus padding on either side, as tab
+    separated chrom, start, end strings
+    """
+    if isinstance(genes, GeneCatalog):
+        return catalog_regions(genes, padding)
+
+    regions = []
+    for hgnc_id in genes.keys():
+        start = max(1, int(genes[hgnc_id]["start"]) - padding)
+        end = int(genes[hgnc_id]["end"]) + padding
+        regions.append((genes[hgnc_id]["chr"], start, end))
+
+    merged = []
+    intervals = merge_regions(regions)
+    for chrom in intervals.keys():
+        starts, ends = intervals[chrom]
+        for i in range(len(starts)):
+            merged.append(chrom + "\t" + str(starts[i]) + "\t" + str(ends[i]))
+    return merged
+
+
+def catalog_regions(catalog, padding):
+    """
+    gene_regions for a GeneCatalog, whose genes are indexed by chromosome in
+    start order, so are merged in one pass without sorting
     """
-    genes = {}
-    with open(genes_file, "r") as g:
-        lines = g.readlines()
-        for l in lines:
-            if not l.startswith("chr"):
-                linedata = (l).split("\t")
-                chr = linedata[0]
-                start = linedata[1]
-                end = linedata[2]
-                symbol = linedata[3]
-                hgnc_id = linedata[4]
-                status = linedata[5]
-                mode = linedata[6]
-                mechanism = linedata[7]
-                if hgnc_id in genes.keys():
-                    genes[hgnc_id]["status"].add(status)
-                    genes[hgnc_id]["mode"].add(mode)
-                    genes[hgnc_id]["mechanism"].add(mechanism)
-                else:
-                    genes[hgnc_id] = {}
-                    genes[hgnc_id]["chr"] = chr
-                    genes[hgnc_id]["start"] = start
-                    genes[hgnc_id]["end"] = end
-                    genes[hgnc_id]["symbol"] = symbol
-                    genes[hgnc_id]["status"] = set({status})
-                    genes[hgnc_id]["mode"] = set({mode})
-                    genes[hgnc_id]["mechanism"] = set({mechanism})
-
-    return genes
+    merged = []
+    for chrom in catalog.chromosomes():
+        start = None
+        for hgnc_id in catalog.genes_on(chrom):
+            genestart = max(1, int(catalog[hgnc_id]["start"]) - padding)
+            geneend = int(catalog[hgnc_id]["end"]) + padding
+            if start is not None and genestart <= end + 1:
+                end = max(end, geneend)
+                continue
+            if start is not None:
+                merged.append(chrom + "\t" + str(start) + "\t" + str(end))
+            start = genestart
+            end = geneend
+        merged.append(chrom + "\t" + str(start) + "\t" + str(end))
+    return merged
 
 
 def load_regions():
@@ -23,285 +23,661 @@ THE SOFTWARE.
 
 import subprocess
 import logging
-import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from variants.snv import SNV
 from variants.cnv import CNV
-
-
-def load_variants(family, outdir, regions=None):
+from file_loading.vcf_reader import (
+    HEADER_LINE,
+    CONTIG_LINE,
+    VcfReader,
+    is_hom_ref,
+    match_contigs,
+    merge_regions,
+    plan_lookup,
+)
+from variants.variant_table import VariantTable, Column
+from filtering.preinheritance_masks import PreInheritanceMasks
+from file_loading.vcf_schema import child_schema, parent_schema, CHILD_ATTRIBUTES, PARENT_ATTRIBUTES
+from utils.profiling import record_subprocess
+
+# CNVs longer than this pass CNV filtering regardless of gene content, so are
+# loaded even when the child is restricted to regions
+LARGE_CNV_LENGTH = 1000000
+
+
+def load_variants(
+    family,
+    regions=None,
+    loader=None,
+    pushdown=None,
+    threads=1,
+    parent_cache=None,
+    variant_cache=None,
+    columnar=False,
+    rules=None,
+):
     """
-    get variants in child and parents
+    get variants in child and parents, regions is a collection of tab
+    separated chrom, start, end strings to restrict the child to. pushdown
+    optionally applies the pre-inheritance filters to the child while
+    loading. With more than one thread parents read with bcftools are loaded
+    at the same time as each other. parent_cache optionally reuses parental variants already
+    read for another family. variant_cache optionally reads decoded
+    variants from, and adds them to, a persistent VariantCache. With
+    columnar the child is held in a VariantTable and only variants passing
+    the pre-inheritance filters, with thresholds from rules, are returned.
+    Nothing else is written to disk
     """
-    proband_vcf = family.proband.get_vcf_path()
     if regions:
-        regionfile = outdir + "/reg.tmp"
-        with open(regionfile, "w") as rf:
-            for r in regions:
-                rf.write(r + "\n")
-
-        sortedregs = outdir + "/reg.tmp_sorted"
-        sortcmd = "sort -k1,1V -k2,2n -k3,3n " + regionfile + " > " + sortedregs
-        os.system(sortcmd)
-        child_vars = readvcf(proband_vcf, sortedregs, family.proband.get_sex())
-        # remove regions files used for bcftools queries
-        os.system("rm " + regionfile)
-        os.system("rm " + sortedregs)
+        regions = sort_regions(regions)
+    else:
+        regions = None
+    if columnar:
+        child_vars, mum_vars, dad_vars = load_trio_table(
+            family, regions, loader, pushdown, parent_cache, variant_cache, rules
+        )
     else:
-        child_vars = readvcf(proband_vcf, None, family.proband.get_sex())
+        child_vars, mum_vars, dad_vars = load_trio(
+            family, regions, loader, pushdown, threads, parent_cache, variant_cache
+        )
+
+    variants = {"child": child_vars, "mum": mum_vars, "dad": dad_vars}
+
+    return variants
+
+
+def sort_regions(regions):
+    """
+    Parse tab separated chrom, start(, end) region strings and sort them by
+    chromosome in natural order (1, 2, ..., 10, X, Y) and then position,
+    as sort -k1,1V -k2,2n -k3,3n does
+    """
+    parsed = []
+    for r in regions:
+        rsplit = r.split("\t")
+        end = rsplit[2] if len(rsplit) > 2 else rsplit[1]
+        parsed.append((rsplit[0], int(rsplit[1]), int(end)))
+    return sorted(parsed, key=lambda r: (natural_key(r[0]), r[1], r[2]))
+
+
+def natural_key(chrom):
+    """
+    Sort key comparing runs of digits numerically
+    """
+    key = re.split(r"(\d+)", chrom)
+    for i in range(1, len(key), 2):
+        key[i] = int(key[i])
+    return key
+
+
+def load_trio(family, regions, loader, pushdown, threads, parent_cache=None, variant_cache=None):
+    """
+    Load the child and then the parental variants at the child variant
+    positions, as we don't need parental variants which are not in the child.
+    A trio in one joint-called VCF is read in a single pass
+    """
+    if family.is_joint():
+        return readjoint(family, regions, loader, pushdown, LARGE_CNV_LENGTH, variant_cache)
+
+    if threads > 1 and not family.has_no_parents():
+        if variant_cache is None and parents_use_bcftools(family, loader):
+            return load_trio_concurrent(family, regions, loader, pushdown, threads, parent_cache, variant_cache)
+        logging.debug("Parents of " + family.proband.person_id + " read in process, loading them sequentially")
+
+    child_vars = readvcf(
+        family.proband.get_vcf_path(),
+        regions,
+        family.proband.get_sex(),
+        loader,
+        pushdown=pushdown,
+        large_cnvs=LARGE_CNV_LENGTH,
+        variant_cache=variant_cache,
+        sample=family.proband.get_sample_id(),
+    )
 
     mum_vars = {}
     dad_vars = {}
     if not family.has_no_parents():
-        # get a region string from the child variants as we don't need parental
-        # variants which are not in the child
+        childregions = child_sites(child_vars)
 
-        childregionfile = outdir + "/childreg.tmp"
-        with open(childregionfile, "w") as crf:
-            for varid in child_vars.keys():
-                idsplit = varid.split("_")
-                reg = idsplit[0] + "\t" + idsplit[1]
-                crf.write(reg + "\n")
+        if family.has_mum():
+            mum_vars = readparent(family.mum, childregions, "F", loader, parent_cache, variant_cache)
 
-        childsortedregs = outdir + "/childreg.tmp_sorted"
-        childsortcmd = "sort -k1,1V -k2,2n " + childregionfile + " > " + childsortedregs
+        if family.has_dad():
+            dad_vars = readparent(family.dad, childregions, "M", loader, parent_cache, variant_cache)
 
-        os.system(childsortcmd)
+    return child_vars, mum_vars, dad_vars
+
+
+def load_trio_table(family, regions, loader, pushdown, parent_cache=None, variant_cache=None, rules=None):
+    """
+    Columnar trio loading: the child's rows are held in a VariantTable and
+    the pre-inheritance filters applied to each row, giving a mask of the
+    rows kept. Parents are
+    only looked up, and variant objects only created, for the child's
+    variants passing the filters which don't need the parents
+    """
+    filename = family.proband.get_vcf_path()
+    joint = family.is_joint()
+    parents = []
+    if family.has_mum():
+        parents.append((family.mum, "F"))
+    if family.has_dad():
+        parents.append((family.dad, "M"))
+    samples = None
+    if joint:
+        samples = [family.proband.get_sample_id()] + [person.get_sample_id() for person, sex in parents]
+    elif family.proband.get_sample_id() is not None:
+        samples = [family.proband.get_sample_id()]
+
+    info_types, format_types, rows, loader = query_rows(
+        filename, regions, loader, False, pushdown, LARGE_CNV_LENGTH, variant_cache, samples
+    )
+    schema = get_schema(info_types, format_types, False)
+    table = VariantTable(schema, family.proband.get_sex())
+    # parental genotypes from a joint VCF, aligned to the table
+    parent_gts = []
+    if joint:
+        for i in range(len(parents)):
+            gtcol = 4 + len(schema.infofields) + (i + 1) * len(schema.formatfields) + schema.formatfields.index("GT")
+            parent_gts.append((gtcol, Column()))
+    try:
+        for oldata in rows:
+            if len(oldata) < 2 or not is_loadable(oldata):
+                continue
+            table.append(oldata)
+            for gtcol, column in parent_gts:
+                column.append(oldata[gtcol])
+    except subprocess.CalledProcessError:
+        logging.error("Variants not loaded from " + filename)
+        raise
+    logging.info("Variants loaded from " + filename)
+    log_pushdown(filename, loader, pushdown)
+
+    masks = PreInheritanceMasks(table, rules)
+    mask = masks.site_mask()
+    cnv = table.is_cnv()
+    snvs = bytearray([mask[i] and not cnv[i] for i in range(table.nrows)])
+    parent_vars = []
+    if joint:
+        pschema = get_schema(info_types, format_types, True)
+        for i in range(len(parents)):
+            vars = {}
+            for idx in range(table.nrows):
+                gt = parent_gts[i][1].value(idx)
+                if snvs[idx] and not is_hom_ref(gt):
+                    add_variant(vars, pschema, table.row(idx)[:4] + [gt], parents[i][1])
+            parent_vars.append(vars)
+    else:
+        sites = table.sites(snvs)
+        for person, sex in parents:
+            parent_vars.append(readparent(person, sites, sex, loader, parent_cache, variant_cache))
+
+    mum_vars = {}
+    dad_vars = {}
+    for i in range(len(parents)):
+        if parents[i][1] == "F":
+            mum_vars = parent_vars[i]
+        else:
+            dad_vars = parent_vars[i]
+    table.set_parent_genotypes(mum_vars, dad_vars, snvs)
+    mask = masks.trio_mask(mask, family)
+    masks.log_counts(filename)
+
+    return table.materialise(mask), mum_vars, dad_vars
 
-        if family.has_mum():
-            mum_vcf = family.mum.get_vcf_path()
-            mum_vars = readvcf(mum_vcf, childsortedregs, "F")
 
+def load_trio_concurrent(family, regions, loader, pushdown, threads, parent_cache=None, variant_cache=None):
+    """
+    Trio loading with the parents read at the same time as each other once
+    the child is loaded. Each parent is read once, with all of the child's
+    sites. Only used with the bcftools loader, the in-process reader holds
+    the GIL while parsing so two parents read at once are slower than one
+    after the other (see benchmarks/trio_loading.py)
+    """
+    child_vars = readvcf(
+        family.proband.get_vcf_path(),
+        regions,
+        family.proband.get_sex(),
+        loader,
+        pushdown=pushdown,
+        large_cnvs=LARGE_CNV_LENGTH,
+        variant_cache=variant_cache,
+        sample=family.proband.get_sample_id(),
+    )
+    childregions = child_sites(child_vars)
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=threads - 1) as pool:
+        if family.has_mum():
+            futures["mum"] = pool.submit(readparent, family.mum, childregions, "F", loader, parent_cache, variant_cache)
         if family.has_dad():
-            dad_vcf = family.dad.get_vcf_path()
-            dad_vars = readvcf(dad_vcf, childsortedregs, "M")
+            futures["dad"] = pool.submit(readparent, family.dad, childregions, "M", loader, parent_cache, variant_cache)
+        parent_vars = {"mum": {}, "dad": {}}
+        for parent in futures.keys():
+            parent_vars[parent] = futures[parent].result()
 
-        # remove child regions files used for bcftools queries
-        os.system("rm " + childregionfile)
-        os.system("rm " + childsortedregs)
+    return child_vars, parent_vars["mum"], parent_vars["dad"]
 
-    variants = {"child": child_vars, "mum": mum_vars, "dad": dad_vars}
 
-    return variants
+def parents_use_bcftools(family, loader):
+    """
+    Are both parents read with bcftools, whose subprocesses can run at the
+    same time?
+    """
+    for person in [family.mum, family.dad]:
+        if person is not None:
+            if (loader or default_loader(person.get_vcf_path())) != "bcftools":
+                return False
+    return True
 
 
-def readvcf(filename, regions, sex):
+def child_sites(child_vars):
     """
-    read vcf files and return a dict of variant objects
+    (chrom, pos, pos) of each of the child's variants
+    """
+    childregions = []
+    for varid in child_vars.keys():
+        idsplit = varid.split("_")
+        childregions.append((idsplit[0], idsplit[1], idsplit[1]))
+    return childregions
+
+
+def readparent(person, sites, sex, loader=None, parent_cache=None, variant_cache=None):
+    """
+    read a parent's variants at sites, a list of (chrom, pos, pos), through
+    the parent cache if there is one
+    """
+    filename = person.get_vcf_path()
+    sample = person.get_sample_id()
+
+    def read(missing, sex):
+        return readvcf(filename, missing, sex, loader, parent=True, variant_cache=variant_cache, sample=sample)
+
+    if parent_cache is None:
+        return read(sites, sex)
+    return parent_cache.lookup(filename, sample, sites, sex, read)
+
+
+def readvcf(
+    filename,
+    regions,
+    sex,
+    loader=None,
+    parent=False,
+    pushdown=None,
+    large_cnvs=None,
+    variant_cache=None,
+    sample=None,
+):
+    """
+    read vcf files and return a dict of variant objects. Only the fields
+    used by filtering and output are queried, for parents only genotypes.
+    Rows failing the pushdown filters are excluded before variant objects
+    are created.
+
+    regions is a list of (chrom, start, end), 1-based inclusive, or None.
+    With regions, large_cnvs optionally also loads CNVs longer than this
+    anywhere (in-process reader only).
+    With a variant_cache the rows are read from its table for the VCF, which
+    is first built with the loader if needed. sample selects one sample of a
+    multi-sample VCF
     """
     vars = {}
+    samples = None
+    if sample is not None:
+        samples = [sample]
+    info_types, format_types, rows, loader = query_rows(
+        filename, regions, loader, parent, pushdown, large_cnvs, variant_cache, samples, not parent
+    )
+    schema = get_schema(info_types, format_types, parent)
+
+    try:
+        for oldata in rows:
+            if len(oldata) < 2:
+                continue
+            add_variant(vars, schema, oldata, sex)
+    except subprocess.CalledProcessError:
+        logging.error("Variants not loaded from " + filename)
+        raise
+
+    logging.info("Variants loaded from " + filename)
+    log_pushdown(filename, loader, pushdown)
+
+    return vars
+
 
-    # get list of info fields in the vcf
-    infofields_wanted = [
-        "Consequence",
-        "Gene",
-        "SYMBOL",
-        "Feature",
-        "CANONICAL",
-        "MANE_SELECT",
-        "MANE_PLUS_CLINICAL",
-        "HGNC_ID",
-        "MAX_AF",
-        "MAX_AF_POPS",
-        "DDD_AF",
-        "DDD_father_AF",
-        "REVEL",
-        "PolyPhen",
-        "Protein_position",
-        "HGVSc",
-        "HGVSp",
-        "DNM",
-        "DNG",
-        "VAF",
-        "END",
-        "SVTYPE",
-        "SVLEN",
-        "CNVFILTER",
-        "HGNC_ID_ALL",
-        "SYMBOL_ALL",
-        "AC_XX",
-        "AN_XX",
-        "nhomalt_XX",
-        "AC_XY",
-        "AN_XY",
-        "nhomalt_XY",
-        "AlphaMissense_pred",
-        "AlphaMissense_rankscore",
-        "AlphaMissense_score",
-        "MPC_rankscore",
-        "MPC_score",
-        "PrimateAI_pred",
-        "PrimateAI_rankscore",
-        "PrimateAI_score",
-        "EVE_CLASS",
-        "EVE_SCORE",
-        "pLI_gene_value",
-        "SpliceAI_pred_DP_AG",
-        "SpliceAI_pred_DP_AL",
-        "SpliceAI_pred_DP_DG",
-        "SpliceAI_pred_DP_DL",
-        "SpliceAI_pred_DS_AG",
-        "SpliceAI_pred_DS_AL",
-        "SpliceAI_pred_DS_DG",
-        "SpliceAI_pred_DS_DL",
-        "SpliceAI_pred_SYMBOL",
-        "LoF",
-        "LoF_filter",
-        "LoF_flags",
-        "LoF_info",
-        "CADD_PHRED",
-        "CLIN_SIG",
-        "CALLSOURCE",
-        "MEANLR2",
-    ]
-    formatfields = ["GT", "GQ", "PID", "AD", "CIFER_INHERITANCE", "CN"]
-
-    # create infostring containing only the fields present
-    info_query = []
-    for inf in infofields_wanted:
-        info_query.append("%INFO/" + inf)
-
-    infostring = ("\t").join(info_query)
+def readjoint(family, regions, loader=None, pushdown=None, large_cnvs=None, variant_cache=None):
+    """
+    read a trio from one joint-called multi-sample vcf in a single pass,
+    returns dicts of child, mum and dad variant objects. As when each is read
+    from its own vcf, parental variants are only created at the child's
+    variants, and not where the parent is hom ref
+    """
+    filename = family.proband.get_vcf_path()
+    parents = []
+    if family.has_mum():
+        parents.append((family.mum, "F", {}))
+    if family.has_dad():
+        parents.append((family.dad, "M", {}))
+    samples = [family.proband.get_sample_id()]
+    for person, sex, vars in parents:
+        samples.append(person.get_sample_id())
+
+    info_types, format_types, rows, loader = query_rows(
+        filename, regions, loader, False, pushdown, large_cnvs, variant_cache, samples, True
+    )
+    schema = get_schema(info_types, format_types, False)
+    pschema = get_schema(info_types, format_types, True)
+    # columns of each parent's genotype in the query rows
+    gtcols = []
+    for i in range(len(parents)):
+        gtcols.append(4 + len(schema.infofields) + (i + 1) * len(schema.formatfields) + schema.formatfields.index("GT"))
+
+    child_vars = {}
+    try:
+        for oldata in rows:
+            if len(oldata) < 2:
+                continue
+            varid = add_variant(child_vars, schema, oldata, family.proband.get_sex())
+            if varid is None:
+                continue
+            for i in range(len(parents)):
+                gt = oldata[gtcols[i]]
+                if not is_hom_ref(gt):
+                    add_variant(parents[i][2], pschema, oldata[:4] + [gt], parents[i][1])
+    except subprocess.CalledProcessError:
+        logging.error("Variants not loaded from " + filename)
+        raise
+
+    logging.info("Trio variants loaded from " + filename)
+    log_pushdown(filename, loader, pushdown)
+
+    mum_vars = {}
+    dad_vars = {}
+    for person, sex, vars in parents:
+        if sex == "F":
+            mum_vars = vars
+        else:
+            dad_vars = vars
+    return child_vars, mum_vars, dad_vars
+
+
+def query_rows(filename, regions, loader, parent, pushdown, large_cnvs, variant_cache, samples, defer=False):
+    """
+    Query rows for the child or parent fields of a vcf with the loader, or
+    from the variant cache. Returns the INFO and FORMAT definitions, the rows
+    and the loader used. With defer, rows from the in-process reader leave
+    the schema's deferred fields undecoded, for variants to decode when they
+    are written out. Rows from bcftools and the cache are always decoded
+    """
+    if loader is None:
+        loader = default_loader(filename)
+    if variant_cache is not None:
+        attributes = PARENT_ATTRIBUTES if parent else CHILD_ATTRIBUTES
+        table = variant_cache.table(
+            filename, attributes, lambda: decode_all(filename, loader, parent, samples), samples
+        )
+        if regions is not None:
+            regions = match_contigs(regions, table.contigs)
+        rows = table.query(regions, pushdown, large_cnvs)
+        # pushdown counts are kept as for the in-process reader
+        return table.info_types, table.format_types, rows, "python"
+
+    if loader == "bcftools":
+        info_types, format_types, contigs = read_header_bcftools(filename)
+        schema = get_schema(info_types, format_types, parent)
+        targets = False
+        if regions is not None:
+            regions = match_contigs(regions, contigs)
+            if large_cnvs is not None:
+                logging.warning("CNVs outside the regions are not loaded from " + filename + " with bcftools")
+            if parent:
+                # parental sites are matched on position, so when they are
+                # dense stream through the file rather than seeking to each
+                targets = plan_lookup(filename, merge_regions(regions), contigs) is None
+        exclude = None
+        if pushdown is not None:
+            exclude = pushdown.bcftools_expression(info_types, format_types)
+        rows = query_bcftools(filename, regions, schema.infofields, schema.formatfields, exclude, targets, samples)
+    elif loader == "python":
+        reader = VcfReader(filename)
+        info_types, format_types = reader.info_types, reader.format_types
+        schema = get_schema(info_types, format_types, parent)
+        if regions is not None:
+            regions = match_contigs(regions, reader.contigs)
+        logging.debug("Reading " + filename + " in process")
+        deferred = schema.deferred_tags if defer else ()
+        rows = reader.query(schema.infofields, schema.formatfields, regions, pushdown, large_cnvs, samples, deferred)
+    else:
+        raise ValueError("Unknown VCF loader: " + loader)
+    return info_types, format_types, rows, loader
+
+
+def log_pushdown(filename, loader, pushdown):
+    if pushdown is None:
+        return
+    if loader == "python":
+        pushdown.log_counts(filename)
+    else:
+        logging.info("Excluded while loading " + filename + ": counts per reason not available from bcftools")
+
+
+def decode_all(filename, loader, parent, samples=None):
+    """
+    Query every row of a VCF for a VariantCache table. END is also queried
+    where defined, to give the end of each record for region lookups
+    """
+    if loader == "bcftools":
+        info_types, format_types, contigs = read_header_bcftools(filename)
+    else:
+        reader = VcfReader(filename)
+        info_types, format_types, contigs = reader.info_types, reader.format_types, reader.contigs
+    schema = get_schema(info_types, format_types, parent)
+    infofields = list(schema.infofields)
+    endidx = None
+    if "END" in info_types:
+        if "END" not in infofields:
+            infofields.append("END")
+        endidx = 4 + infofields.index("END")
+    extra = len(infofields) - len(schema.infofields)
+    if loader == "bcftools":
+        rows = query_bcftools(filename, None, infofields, schema.formatfields, samples=samples)
+    else:
+        rows = reader.query(infofields, schema.formatfields, samples=samples)
+
+    def decoded():
+        for row in rows:
+            if len(row) < 2:
+                continue
+            end = int(row[1]) + len(row[2]) - 1
+            if endidx is not None and row[endidx] != ".":
+                end = int(row[endidx])
+            if extra:
+                del row[4 + len(schema.infofields)]
+            yield row, end
+
+    queried_info = {}
+    for tag in schema.infofields:
+        queried_info[tag] = info_types[tag]
+    queried_format = {}
+    for tag in schema.formatfields:
+        queried_format[tag] = format_types[tag]
+    return schema.infofields, schema.formatfields, queried_info, queried_format, contigs, decoded()
+
+
+def get_schema(info_types, format_types, parent):
+    if parent:
+        return parent_schema(info_types, format_types)
+    return child_schema(info_types, format_types)
+
+
+def add_variant(vars, schema, oldata, sex):
+    """
+    Create a variant object from a row of query output and add it to vars,
+    returns the variant id or None if the row is skipped
+    """
+    if not is_loadable(oldata):
+        return None
+    alt = oldata[3]
+    varid = ("_").join([oldata[0], oldata[1], oldata[2], alt])
+
+    var = SNV
+    if alt in ["<DEL>", "<DUP>"]:
+        var = CNV
+    vars[varid] = var.from_row(schema, oldata, sex)
+    return varid
+
+
+def is_loadable(oldata):
+    """
+    Rows with alt allele * and CNVs on Y are not loaded
+    """
+    alt = oldata[3]
+    if alt == "*":  # get rid of any where alt allele is *
+        return False
+    if alt in ["<DEL>", "<DUP>"] and oldata[0] == "Y":
+        # exclude CNVs on Y
+        logging.info(oldata[0] + "_" + oldata[1] + "_" + oldata[2] + " CNV in Y: failed")
+        return False
+    return True
+
+
+def default_loader(filename):
+    """
+    Use the bcftools pipeline unless the in-process reader is asked for. The
+    reader has not yet been compared with bcftools on real data, and can't
+    read BCF
+    """
+    return "bcftools"
+
+
+def read_header_bcftools(filename):
+    """
+    INFO and FORMAT definitions and contig names from the header of a VCF
+    or BCF file
+    """
+    info_types = {}
+    format_types = {}
+    contigs = []
+    for line in streamcommand("bcftools view -h " + filename):
+        match = HEADER_LINE.match(line)
+        if match:
+            if match.group(1) == "INFO":
+                info_types[match.group(2)] = (match.group(3), match.group(4))
+            else:
+                format_types[match.group(2)] = (match.group(3), match.group(4))
+        match = CONTIG_LINE.match(line)
+        if match:
+            contigs.append(match.group(1))
+    return info_types, format_types, contigs
+
+
+def query_bcftools(filename, regions, infofields, formatfields, exclude=None, targets=False, samples=None):
+    """
+    Yield query rows for a VCF or BCF file using a bcftools pipeline.
+    regions is a list of (chrom, start, end) which are passed to bcftools on
+    stdin, as index regions (-R) or with targets as positions to match while
+    streaming through the file (-T). exclude is an optional extra bcftools
+    exclude expression. samples optionally selects and orders the samples
+    of a multi-sample file, the first is checked for hom ref
+    """
+    infostring = ""
+    for inf in infofields:
+        infostring += "\t%INFO/" + inf
     formatstring = ("\t%").join(formatfields)
+    excludestring = ""
+    if exclude is not None:
+        excludestring = " | " + exclude
+    samplestring = ""
+    if samples is not None:
+        # INFO is left as it is for the whole cohort
+        samplestring = " | bcftools view --no-update -s " + (",").join(samples)
 
     if regions is None:
         bcfcmdroot = (
             "bcftools norm -m - "
             + filename
+            + samplestring
             + " | bcftools view -e 'INFO/MAX_AF>0.005 | FORMAT/GT[0]="
             + '"ref"'
-            + "'  | bcftools query -u -f '%CHROM\t%POS\t%REF\t%ALT{0}\t"
+            + excludestring
+            + "'  | bcftools query -u -f '%CHROM\t%POS\t%REF\t%ALT{0}"
         )
     else:
         bcfcmdroot = (
-            "bcftools norm -m - -R "
-            + regions
-            + " "
+            "bcftools norm -m - "
+            + ("-T" if targets else "-R")
+            + " /dev/stdin "
             + filename
+            + samplestring
             + " | bcftools view -e 'INFO/MAX_AF>0.005 | FORMAT/GT[0]="
             + '"ref"'
-            + "'  | bcftools query -u -f '%CHROM\t%POS\t%REF\t%ALT{0}\t"
+            + excludestring
+            + "'  | bcftools query -u -f '%CHROM\t%POS\t%REF\t%ALT{0}"
         )
 
     bcfcmd = bcfcmdroot + infostring + "[\t%" + formatstring + "]\n'"
-    output = runcommand(bcfcmd)
+    regionlines = None
+    if regions is not None:
+        regionlines = []
+        for chrom, start, end in regions:
+            regionlines.append(chrom + "\t" + str(start) + "\t" + str(end) + "\n")
+    for ol in streamcommand(bcfcmd, regionlines):
+        yield ol.split("\t")
 
-    if not output == "Error in command":
-        outputlines = output.split("\n")
-    else:
-        logging.error("Variants not loaded from " + filename)
 
-    for ol in outputlines:
-        oldata = ol.split("\t")
-        if len(oldata) < 2:
-            continue
-        alt = oldata[3]
-        if alt == "*":  # get rid of any where alt allele is *
-            continue
-        # populate hash with variant data
-        varid = ("_").join([oldata[0], oldata[1], oldata[2], alt])
-        vdata = {}
-        vdata["chrom"] = oldata[0]
-        vdata["pos"] = oldata[1]
-        vdata["ref"] = oldata[2]
-        vdata["alt"] = alt
-        vdata["consequence"] = oldata[4]
-        vdata["ensg"] = oldata[5]
-        vdata["symbol"] = oldata[6]
-        vdata["feature"] = oldata[7]
-        vdata["canonical"] = oldata[8]
-        vdata["mane"] = oldata[9]
-        vdata["mane_clinical"] = oldata[10]
-        vdata["hgnc_id"] = oldata[11]
-        vdata["max_af"] = oldata[12]
-        vdata["max_af_pops"] = oldata[13]
-        vdata["ddd_af"] = oldata[14]
-        vdata["ddd_father_af"] = oldata[15]
-        vdata["revel"] = oldata[16]
-        vdata["polyphen"] = oldata[17]
-        vdata["protein_position"] = oldata[18]
-        vdata["hgvsc"] = oldata[19]
-        vdata["hgvsp"] = oldata[20]
-        vdata["sex"] = sex
-        vdata["DNM"] = oldata[21]
-        vdata["DNG"] = oldata[22]
-        vdata["vaf"] = oldata[23]
-        vdata["cnv_end"] = oldata[24]
-        vdata["cnv_type"] = oldata[25]
-        vdata["cnv_length"] = oldata[26]
-        vdata["cnv_filter"] = oldata[27]
-        vdata["hgnc_id_all"] = oldata[28]
-        vdata["symbol_all"] = oldata[29]
-        vdata["ac_XX"] = oldata[30]
-        vdata["an_XX"] = oldata[31]
-        vdata["nhomalt_XX"] = oldata[32]
-        vdata["ac_XY"] = oldata[33]
-        vdata["an_XY"] = oldata[34]
-        vdata["nhomalt_XY"] = oldata[35]
-
-        # Added for b38v3
-        vdata["AlphaMissense_pred"] = oldata[36]
-        vdata["AlphaMissense_rankscore"] = oldata[37]
-        vdata["AlphaMissense_score"] = oldata[38]
-        vdata["MPC_rankscore"] = oldata[39]
-        vdata["MPC_score"] = oldata[40]
-        vdata["PrimateAI_pred"] = oldata[41]
-        vdata["PrimateAI_rankscore"] = oldata[42]
-        vdata["PrimateAI_score"] = oldata[43]
-        vdata["EVE_CLASS"] = oldata[44]
-        vdata["EVE_SCORE"] = oldata[45]
-        vdata["pLI_gene_value"] = oldata[46]
-        vdata["SpliceAI_pred_DP_AG"] = oldata[47]
-        vdata["SpliceAI_pred_DP_AL"] = oldata[48]
-        vdata["SpliceAI_pred_DP_DG"] = oldata[49]
-        vdata["SpliceAI_pred_DP_DL"] = oldata[50]
-        vdata["SpliceAI_pred_DS_AG"] = oldata[51]
-        vdata["SpliceAI_pred_DS_AL"] = oldata[52]
-        vdata["SpliceAI_pred_DS_DG"] = oldata[53]
-        vdata["SpliceAI_pred_DS_DL"] = oldata[54]
-        vdata["SpliceAI_pred_SYMBOL"] = oldata[55]
-        vdata["LoF"] = oldata[56]
-        vdata["LoF_filter"] = oldata[57]
-        vdata["LoF_flags"] = oldata[58]
-        vdata["LoF_info"] = oldata[59]
-        vdata["CADD_PHRED"] = oldata[60]
-        vdata["CLIN_SIG"] = oldata[61]
-
-        # Extra informations on CNVs
-        vdata["CALLSOURCE"] = oldata[62]
-        vdata["MEANLR2"] = oldata[63]
-
-        # Format information
-        vdata["gt"] = oldata[64]
-        vdata["gq"] = oldata[65]
-        vdata["pid"] = oldata[66]
-        vdata["ad"] = oldata[67]
-        vdata["cnv_inh"] = oldata[68]
-        vdata["cn"] = oldata[69]
-
-        if not vdata["DNM"] == "." or not vdata["DNG"] == ".":
-            vdata["dnm"] = True
-        else:
-            vdata["dnm"] = False
-
-        var = SNV
-        if alt in ["<DEL>", "<DUP>"]:
-            var = CNV
-        if alt in ["<DEL>", "<DUP>"] and vdata["chrom"] == "Y":
-            # exclude CNVs on Y
-            logging.info(vdata["chrom"] + "_" + vdata["pos"] + "_" + vdata["ref"] + " CNV in Y: failed")
-            continue
-        vars[varid] = var(vdata)
-
-    logging.info("Variants loaded from " + filename)
-
-    return vars
+def streamcommand(cmd, input_lines=None):
+    """
+    Run a shell pipeline and yield its output one line at a time, so that
+    the output is never held in memory as a whole. input_lines are written
+    to the pipeline's stdin from a separate thread. Raises
+    CalledProcessError once the output is consumed if any command in the
+    pipeline failed. The time the pipeline ran for is recorded for profiling
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        "set -o pipefail; " + cmd,
+        shell=True,
+        executable="/bin/bash",
+        stdin=subprocess.PIPE if input_lines is not None else None,
+        stdout=subprocess.PIPE,
+    )
+    writer = None
+    if input_lines is not None:
+        writer = threading.Thread(target=write_lines, args=(process.stdin, input_lines))
+        writer.start()
+    try:
+        for line in process.stdout:
+            yield line.decode("UTF-8").rstrip("\n")
+    finally:
+        process.stdout.close()
+        if writer is not None:
+            writer.join()
+        returncode = process.wait()
+        record_subprocess(time.perf_counter() - start)
+    if returncode != 0:
+        logging.debug(cmd)
+        logging.error("Command failed with exit status " + str(returncode))
+        raise subprocess.CalledProcessError(returncode, cmd)
 
 
-def runcommand(cmd):
+def write_lines(stream, lines):
+    """
+    Write lines to a process's stdin and close it, stopping quietly if the
+    process exits without reading them all
+    """
     try:
-        byteoutput = subprocess.check_output(cmd, shell=True)
-        return byteoutput.decode("UTF-8").rstrip()
-    except subprocess.CalledProcessError:
-        logging.debug(cmd)
-        return "Error in command"
+        for line in lines:
+            stream.write(line.encode("UTF-8"))
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
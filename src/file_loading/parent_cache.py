@@ -0,0 +1,136 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+
+class ParentCache(object):
+    """
+    Run-scoped cache of parental variants, so that a parent shared by
+    several families (siblings, or a person in more than one family) is only
+    read once per site. Entries are keyed by VCF path, sample and sex and are
+    dropped if the file's mtime or size changes. max_sites bounds the number
+    of cached sites across all parents, least recently used parents are
+    evicted first. Parents no later family needs are dropped with release
+    """
+
+    def __init__(self, max_sites):
+        self.max_sites = max_sites
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, filename, sample, sites, sex, read):
+        """
+        Return a dict of the variants at sites, a list of (chrom, pos, pos),
+        for the sample (None for a single sample VCF). Sites not already
+        cached are read with read(missing_sites, sex), which returns a dict of
+        variant id: variant
+        """
+        key = (filename, sample, sex)
+        stamp = file_stamp(filename)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["stamp"] != stamp:
+                logging.info(filename + " has changed, dropping cached parental variants")
+                self.drop(key)
+                entry = None
+            if entry is None:
+                entry = {"stamp": stamp, "sites": {}}
+                self.entries[key] = entry
+            self.entries.move_to_end(key)
+            cached = entry["sites"]
+            missing = []
+            for chrom, pos, end in sites:
+                if (chrom, str(pos)) not in cached:
+                    missing.append((chrom, pos, end))
+            self.hits += len(sites) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            found = {}
+            for chrom, pos, end in missing:
+                found[(chrom, str(pos))] = {}
+            for varid, var in read(missing, sex).items():
+                idsplit = varid.split("_")
+                found.setdefault((idsplit[0], idsplit[1]), {})[varid] = var
+            with self.lock:
+                for site, vars in found.items():
+                    if site not in cached:
+                        cached[site] = vars
+                        self.size += 1
+                self.evict(key)
+
+        vars = {}
+        for chrom, pos, end in sites:
+            vars.update(cached.get((chrom, str(pos)), {}))
+        return vars
+
+    def evict(self, keep):
+        """
+        Evict least recently used parents until the cache fits, never the
+        parent currently being looked up
+        """
+        while self.size > self.max_sites:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            logging.debug("Evicting cached parental variants for " + key[0])
+            self.drop(key)
+
+    def release(self, filename):
+        """
+        Drop every cached sample of a parent VCF
+        """
+        with self.lock:
+            for key in [key for key in self.entries.keys() if key[0] == filename]:
+                logging.debug("Releasing cached parental variants for " + filename)
+                self.drop(key)
+
+    def drop(self, key):
+        self.size -= len(self.entries[key]["sites"])
+        del self.entries[key]
+
+    def log_counts(self):
+        logging.info(
+            "Parental variant cache: "
+            + str(self.hits)
+            + " sites reused, "
+            + str(self.misses)
+            + " sites read, "
+            + str(len(self.entries))
+            + " parents cached"
+        )
+
+
+def file_stamp(filename):
+    """
+    Modification time and size identifying a version of a file
+    """
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
@@ -119,3 +119,60 @@ def create_ped(pedfile, child, mother, father, sex, mum_aff, dad_aff):
         if mother:
             mumline = ("\t").join(["family", "mum", "0", "0", "XX", mum_aff, mother]) + "\n"
             p.write(mumline)
+
+
+def order_families(families):
+    """
+    Order family ids so that families sharing a parent VCF are analysed one
+    after another, keeping the parent in the cache between them. Otherwise
+    the ped file order is kept
+    """
+    by_parent = {}
+    for famid, family in families.items():
+        for path in parent_paths(family):
+            by_parent.setdefault(path, []).append(famid)
+
+    ordered = []
+    seen = set()
+    for famid in families.keys():
+        if famid in seen:
+            continue
+        # add every family connected to this one through shared parents
+        group = [famid]
+        seen.add(famid)
+        i = 0
+        while i < len(group):
+            for path in parent_paths(families[group[i]]):
+                for other in by_parent[path]:
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+            i += 1
+        ordered.extend(group)
+
+    return ordered
+
+
+def vcfs_done(families, ordered):
+    """
+    Map each family id in ordered to the VCFs, of the proband or the parents,
+    that no later family uses, so they can be released once that family has
+    been analysed
+    """
+    last = {}
+    for famid in ordered:
+        for path in [families[famid].proband.get_vcf_path()] + parent_paths(families[famid]):
+            last[path] = famid
+    done = {famid: [] for famid in ordered}
+    for path, famid in last.items():
+        done[famid].append(path)
+    return done
+
+
+def parent_paths(family):
+    paths = []
+    if family.has_mum():
+        paths.append(family.mum.get_vcf_path())
+    if family.has_dad():
+        paths.append(family.dad.get_vcf_path())
+    return paths
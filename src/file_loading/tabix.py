@@ -0,0 +1,403 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import gzip
+import os
+import struct
+import zlib
+
+# BGZF block header: gzip magic, deflate, FEXTRA flag, mtime, xfl, os, xlen
+# followed by the "BC" subfield holding the total block size minus one
+BGZF_HEADER = struct.Struct("<4BI2BH2BHH")
+BGZF_MAX_BLOCK_DATA = 0xFF00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+TABIX_MIN_SHIFT = 14
+TABIX_DEPTH = 5
+
+
+def is_bgzf(filename):
+    """
+    Check whether a file is BGZF compressed (bgzip output)
+    """
+    with open(filename, "rb") as f:
+        magic = f.read(16)
+    return len(magic) == 16 and magic[:4] == b"\x1f\x8b\x08\x04" and magic[12:14] == b"BC"
+
+
+def is_gzip(filename):
+    """
+    Check whether a file is gzip compressed (plain gzip or BGZF)
+    """
+    with open(filename, "rb") as f:
+        magic = f.read(2)
+    return magic == b"\x1f\x8b"
+
+
+def find_index(filename):
+    """
+    Find a tabix (.tbi) or CSI (.csi) index next to a BGZF file, returns
+    None if there is no index
+    """
+    for suffix in [".tbi", ".csi"]:
+        if os.path.exists(filename + suffix):
+            return filename + suffix
+    return None
+
+
+def reg2bins(beg, end, min_shift, depth):
+    """
+    List the bins that may contain records overlapping the 0-based half open
+    interval beg-end, as in the SAM/tabix specification
+    """
+    bins = []
+    end -= 1
+    shift = min_shift + depth * 3
+    offset = 0
+    for level in range(depth + 1):
+        bins.extend(range(offset + (beg >> shift), offset + (end >> shift) + 1))
+        shift -= 3
+        offset += 1 << (level * 3)
+    return bins
+
+
+def reg2bin(beg, end, min_shift, depth):
+    """
+    Smallest bin that fully contains the 0-based half open interval beg-end
+    """
+    end -= 1
+    shift = min_shift
+    level_offset = ((1 << (depth * 3)) - 1) // 7
+    level = depth
+    while level > 0:
+        if beg >> shift == end >> shift:
+            return level_offset + (beg >> shift)
+        shift += 3
+        level -= 1
+        level_offset -= 1 << (level * 3)
+    return 0
+
+
+class TabixIndex(object):
+    """
+    Tabix (.tbi) or CSI (.csi) index of a BGZF compressed VCF
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.names = []
+        self.refs = {}
+        self.unnamed_refs = []
+        self.min_shift = TABIX_MIN_SHIFT
+        self.depth = TABIX_DEPTH
+        with gzip.open(filename, "rb") as f:
+            data = f.read()
+        magic = data[:4]
+        if magic == b"TBI\x01":
+            self.parse_tbi(data)
+        elif magic == b"CSI\x01":
+            self.parse_csi(data)
+        else:
+            raise ValueError("Unrecognised index format: " + filename)
+
+    def parse_names(self, data, offset):
+        """
+        Parse the tabix configuration block (format, column numbers, meta
+        character, skipped lines) and the sequence names that follow it
+        """
+        (n_names_len,) = struct.unpack_from("<i", data, offset + 24)
+        names = data[offset + 28 : offset + 28 + n_names_len].split(b"\x00")
+        return [n.decode("UTF-8") for n in names if n], offset + 28 + n_names_len
+
+    def parse_tbi(self, data):
+        (n_ref,) = struct.unpack_from("<i", data, 4)
+        self.names, offset = self.parse_names(data, 8)
+        for ref in range(n_ref):
+            bins = {}
+            (n_bin,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+            for b in range(n_bin):
+                binid, n_chunk = struct.unpack_from("<Ii", data, offset)
+                offset += 8
+                chunks = struct.unpack_from("<" + str(2 * n_chunk) + "Q", data, offset)
+                offset += 16 * n_chunk
+                bins[binid] = list(zip(chunks[::2], chunks[1::2]))
+            (n_intv,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+            linear = struct.unpack_from("<" + str(n_intv) + "Q", data, offset)
+            offset += 8 * n_intv
+            self.refs[self.names[ref]] = (bins, linear)
+
+    def parse_csi(self, data):
+        self.min_shift, self.depth, l_aux = struct.unpack_from("<iii", data, 4)
+        offset = 16
+        if l_aux >= 28:
+            self.names, _ = self.parse_names(data, offset)
+        offset += l_aux
+        (n_ref,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+        for ref in range(n_ref):
+            bins = {}
+            (n_bin,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+            for b in range(n_bin):
+                binid, loffset, n_chunk = struct.unpack_from("<IQi", data, offset)
+                offset += 16
+                chunks = struct.unpack_from("<" + str(2 * n_chunk) + "Q", data, offset)
+                offset += 16 * n_chunk
+                bins[binid] = list(zip(chunks[::2], chunks[1::2]))
+            if ref < len(self.names):
+                self.refs[self.names[ref]] = (bins, ())
+            else:
+                self.unnamed_refs.append((bins, ()))
+
+    def name_refs(self, names):
+        """
+        Name the references of a CSI index without sequence names (eg for
+        BCF, where they are the header contigs in order)
+        """
+        for ref in range(min(len(names), len(self.unnamed_refs))):
+            self.refs[names[ref]] = self.unnamed_refs[ref]
+        self.names = names[: len(self.unnamed_refs)]
+        self.unnamed_refs = []
+
+    def chunks(self, chrom, beg, end):
+        """
+        Merged, sorted list of (start, end) virtual offsets of the chunks that
+        may contain records overlapping the 0-based half open interval beg-end
+        """
+        if chrom not in self.refs:
+            return []
+        bins, linear = self.refs[chrom]
+        min_offset = 0
+        if linear:
+            min_offset = linear[min(beg >> self.min_shift, len(linear) - 1)]
+        chunks = []
+        for binid in reg2bins(beg, end, self.min_shift, self.depth):
+            for chunk in bins.get(binid, []):
+                if chunk[1] > min_offset:
+                    chunks.append(chunk)
+        return merge_chunks(chunks)
+
+    def large_chunks(self, chrom, min_length):
+        """
+        Merged chunks of the bins big enough to hold a record longer than
+        min_length. A record is stored in the smallest bin containing it, so
+        every record longer than min_length is in one of these bins
+        """
+        if chrom not in self.refs:
+            return []
+        bins = self.refs[chrom][0]
+        n_large = 0
+        for level in range(self.depth + 1):
+            if 1 << (self.min_shift + 3 * (self.depth - level)) <= min_length:
+                break
+            n_large += 1 << (3 * level)
+        chunks = []
+        for binid in bins.keys():
+            if binid < n_large:
+                chunks.extend(bins[binid])
+        return merge_chunks(chunks)
+
+
+def merge_chunks(chunks):
+    """
+    Sort chunks of virtual offsets and merge any that overlap
+    """
+    merged = []
+    for start, end in sorted(chunks):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class BgzfReader(object):
+    """
+    Random access line reader for BGZF files using virtual file offsets
+    """
+
+    def __init__(self, filename):
+        self.handle = open(filename, "rb")
+        self.block_offset = None
+        self.block_data = b""
+        self.next_block_offset = 0
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def load_block(self, offset):
+        """
+        Read and decompress the BGZF block starting at a compressed offset
+        """
+        self.handle.seek(offset)
+        header = self.handle.read(BGZF_HEADER.size)
+        if len(header) < BGZF_HEADER.size:
+            self.block_offset = offset
+            self.block_data = b""
+            self.next_block_offset = offset
+            return
+        bsize = BGZF_HEADER.unpack(header)[-1]
+        remainder = self.handle.read(bsize + 1 - BGZF_HEADER.size)
+        self.block_offset = offset
+        self.block_data = zlib.decompress(remainder[:-8], -15)
+        self.next_block_offset = offset + bsize + 1
+
+    def lines(self, start, end=None):
+        """
+        Yield (virtual offset, line) for lines starting from virtual offset
+        start, stopping once a line starts at or after virtual offset end
+        """
+        coffset = start >> 16
+        uoffset = start & 0xFFFF
+        if coffset != self.block_offset:
+            self.load_block(coffset)
+        pending = b""
+        pending_voffset = None
+        while True:
+            data = self.block_data
+            if not data:
+                if self.next_block_offset == self.block_offset:
+                    break
+                self.load_block(self.next_block_offset)
+                uoffset = 0
+                continue
+            while uoffset < len(data):
+                voffset = (self.block_offset << 16) | uoffset
+                if pending_voffset is None:
+                    if end is not None and voffset >= end:
+                        return
+                    pending_voffset = voffset
+                newline = data.find(b"\n", uoffset)
+                if newline == -1:
+                    pending += data[uoffset:]
+                    uoffset = len(data)
+                else:
+                    yield pending_voffset, (pending + data[uoffset:newline]).decode("UTF-8")
+                    pending = b""
+                    pending_voffset = None
+                    uoffset = newline + 1
+            self.load_block(self.next_block_offset)
+            uoffset = 0
+        if pending:
+            yield pending_voffset, pending.decode("UTF-8")
+
+
+def write_bgzf(filename, lines):
+    """
+    Write text lines to a BGZF compressed file, returns the virtual offset
+    of the start of each line so that an index can be built
+    """
+    offsets = []
+    block = bytearray()
+    coffset = 0
+    with open(filename, "wb") as out:
+        for line in lines:
+            data = line.encode("UTF-8")
+            if len(block) + len(data) > BGZF_MAX_BLOCK_DATA and block:
+                coffset += write_bgzf_block(out, bytes(block))
+                block = bytearray()
+            offsets.append((coffset << 16) | len(block))
+            block += data
+            while len(block) > BGZF_MAX_BLOCK_DATA:
+                coffset += write_bgzf_block(out, bytes(block[:BGZF_MAX_BLOCK_DATA]))
+                block = block[BGZF_MAX_BLOCK_DATA:]
+        if block:
+            coffset += write_bgzf_block(out, bytes(block))
+        out.write(BGZF_EOF)
+    offsets.append(coffset << 16)
+    return offsets
+
+
+def write_bgzf_block(out, data):
+    """
+    Compress and write a single BGZF block, returns the compressed size
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+    bsize = BGZF_HEADER.size + len(cdata) + 8
+    out.write(BGZF_HEADER.pack(0x1F, 0x8B, 0x08, 0x04, 0, 0, 0xFF, 6, 66, 67, 2, bsize - 1))
+    out.write(cdata)
+    out.write(struct.pack("<II", zlib.crc32(data) & 0xFFFFFFFF, len(data)))
+    return bsize
+
+
+def write_tabix_index(filename, records):
+    """
+    Write a tabix (.tbi) index for a BGZF compressed VCF. records is a list
+    of (chrom, beg, end, start voffset, end voffset) in file order, with beg
+    and end 0-based half open
+    """
+    names = []
+    refs = {}
+    for chrom, beg, end, vstart, vend in records:
+        if chrom not in refs:
+            names.append(chrom)
+            refs[chrom] = ({}, {})
+        bins, linear = refs[chrom]
+        binid = reg2bin(beg, end, TABIX_MIN_SHIFT, TABIX_DEPTH)
+        chunks = bins.setdefault(binid, [])
+        if chunks and chunks[-1][1] == vstart:
+            chunks[-1] = (chunks[-1][0], vend)
+        else:
+            chunks.append((vstart, vend))
+        for window in range(beg >> TABIX_MIN_SHIFT, ((end - 1) >> TABIX_MIN_SHIFT) + 1):
+            if window not in linear:
+                linear[window] = vstart
+
+    namedata = b"".join([n.encode("UTF-8") + b"\x00" for n in names])
+    # preset 2 = VCF, sequence column 1, start column 2, no end column,
+    # meta character '#', no header lines skipped
+    data = bytearray(b"TBI\x01")
+    data += struct.pack("<8i", len(names), 2, 1, 2, 0, ord("#"), 0, len(namedata))
+    data += namedata
+    for chrom in names:
+        bins, linear = refs[chrom]
+        data += struct.pack("<i", len(bins))
+        for binid in sorted(bins):
+            data += struct.pack("<Ii", binid, len(bins[binid]))
+            for chunk in bins[binid]:
+                data += struct.pack("<QQ", *chunk)
+        n_intv = max(linear) + 1 if linear else 0
+        intervals = []
+        previous = 0
+        for window in range(n_intv):
+            previous = linear.get(window, previous)
+            intervals.append(previous)
+        data += struct.pack("<i", n_intv)
+        data += struct.pack("<" + str(n_intv) + "Q", *intervals)
+
+    indexfile = filename + ".tbi"
+    with open(indexfile, "wb") as out:
+        for start in range(0, len(data), BGZF_MAX_BLOCK_DATA):
+            write_bgzf_block(out, bytes(data[start : start + BGZF_MAX_BLOCK_DATA]))
+        out.write(BGZF_EOF)
+    return indexfile
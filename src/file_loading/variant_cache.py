@@ -0,0 +1,347 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from file_loading.parent_cache import file_stamp
+from file_loading.vcf_reader import merge_regions
+
+# bump when the decoded rows or the file layout change, so that tables
+# written by older code are rebuilt
+CACHE_VERSION = 2
+PREAMBLE = struct.Struct("<4sI")
+MAGIC = b"CFVT"
+# records spanning more bases than this (mostly CNVs) are kept in a separate
+# list, so that region lookups only need to look back this far
+LONG_RECORD = 1000
+
+
+class VariantCache(object):
+    """
+    Persistent cache of decoded query rows, one columnar file per VCF and set
+    of requested attributes. A table is rebuilt when the VCF's mtime or size,
+    the attributes or CACHE_VERSION change. Tables are memory mapped and
+    kept open until the VCF is released
+    """
+
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+        os.makedirs(cachedir, exist_ok=True)
+        self.tables = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def key(self, filename, attributes, samples=None):
+        return {
+            "vcf": os.path.abspath(filename),
+            "stamp": list(file_stamp(filename)),
+            "attributes": attributes,
+            "samples": samples,
+            "version": CACHE_VERSION,
+            "byteorder": sys.byteorder,
+        }
+
+    def path(self, filename, attributes, samples=None):
+        name = json.dumps([os.path.abspath(filename), attributes, samples])
+        return os.path.join(self.cachedir, hashlib.sha1(name.encode()).hexdigest() + ".vt")
+
+    def table(self, filename, attributes, build, samples=None):
+        """
+        The VariantTable of filename for the attributes, and optionally a
+        selection of samples. If there is no up to date table, build() is
+        called and must return the queried INFO and FORMAT fields with their
+        header types, the contigs and an iterator of (query row, 1-based end
+        of the record)
+        """
+        path = self.path(filename, attributes, samples)
+        with self.lock:
+            filelock = self.locks.setdefault(path, threading.Lock())
+        with filelock:
+            key = self.key(filename, attributes, samples)
+            table = self.tables.get(path)
+            if table is not None and table.key == key:
+                return table
+            table = open_table(path, key)
+            if table is None:
+                logging.info("Decoding " + filename + " into the variant cache")
+                write_table(path, key, *build())
+                table = open_table(path, key)
+            else:
+                logging.info("Reading " + filename + " from the variant cache")
+            self.tables[path] = table
+            return table
+
+    def release(self, filename):
+        """
+        Drop the open tables of a VCF no later family needs, unmapping them
+        along with their decoded values
+        """
+        vcf = os.path.abspath(filename)
+        with self.lock:
+            for path in [path for path, table in self.tables.items() if table.key["vcf"] == vcf]:
+                del self.tables[path]
+
+
+class Dictionary(object):
+    """
+    Distinct values of a dictionary encoded column, stored as an array of
+    offsets into a blob of UTF-8 text. A value is decoded when first used
+    """
+
+    def __init__(self, view, offset, count):
+        self.offsets = view[offset : offset + 4 * (count + 1)].cast("I")
+        self.blob = view[offset + 4 * (count + 1) :]
+        self.decoded = [None] * count
+
+    def __len__(self):
+        return len(self.decoded)
+
+    def __getitem__(self, code):
+        value = self.decoded[code]
+        if value is None:
+            value = str(self.blob[self.offsets[code] : self.offsets[code + 1]], "utf-8")
+            self.decoded[code] = value
+        return value
+
+
+class VariantTable(object):
+    """
+    Memory mapped columnar table of query rows. POS and the record end are
+    stored as integers, the other columns are dictionary encoded with their
+    distinct values in the mapped file
+    """
+
+    def __init__(self, header, mm, offset):
+        self.key = header["key"]
+        self.infofields = header["infofields"]
+        self.formatfields = header["formatfields"]
+        self.info_types = header["info_types"]
+        self.format_types = header["format_types"]
+        self.contigs = header["contigs"]
+        self.chroms = header["chroms"]
+        self.long_rows = header["long_rows"]
+        self.nrows = header["nrows"]
+        self.mm = mm
+        view = memoryview(mm)[offset:]
+        size = 4 * self.nrows
+        self.pos = view[0:size].cast("I")
+        self.end = view[size : 2 * size].cast("I")
+        self.codes = []
+        self.values = []
+        for i in range(len(header["dictionaries"])):
+            start = (i + 2) * size
+            self.codes.append(view[start : start + size].cast("I"))
+            self.values.append(Dictionary(view, *header["dictionaries"][i]))
+
+    def row(self, idx, chrom):
+        row = [chrom, str(self.pos[idx])]
+        for i in range(len(self.values)):
+            row.append(self.values[i][self.codes[i][idx]])
+        return row
+
+    def query(self, regions=None, pushdown=None, large_cnvs=None):
+        """
+        Yield rows as VcfReader.query does for the same regions, pushdown
+        and large_cnvs
+        """
+        if regions is None:
+            selected = None
+        else:
+            selected = self.select(merge_regions(regions), large_cnvs)
+
+        for chrom, first, last, max_span in self.chroms:
+            for idx in range(first, last):
+                if selected is not None and idx not in selected:
+                    continue
+                row = self.row(idx, chrom)
+                if pushdown is not None and self.is_pushed_down(pushdown, row):
+                    continue
+                yield row
+
+    def select(self, intervals, large_cnvs):
+        """
+        Indices of the rows overlapping the merged intervals, and of CNVs
+        longer than large_cnvs
+        """
+        selected = set()
+        for chrom, first, last, max_span in self.chroms:
+            if chrom not in intervals:
+                continue
+            starts, ends = intervals[chrom]
+            for i in range(len(starts)):
+                idx = bisect.bisect_left(self.pos, starts[i] - max_span, first, last)
+                while idx < last and self.pos[idx] <= ends[i]:
+                    if self.end[idx] >= starts[i]:
+                        selected.add(idx)
+                    idx += 1
+
+        chroms = {}
+        for chrom, first, last, max_span in self.chroms:
+            for idx in self.long_rows:
+                if first <= idx < last:
+                    chroms[idx] = chrom
+        for idx in self.long_rows:
+            chrom = chroms[idx]
+            start = self.pos[idx]
+            end = self.end[idx]
+            if chrom in intervals:
+                starts, ends = intervals[chrom]
+                i = bisect.bisect_right(starts, end) - 1
+                if i >= 0 and ends[i] >= start:
+                    selected.add(idx)
+            if large_cnvs is not None and end - start + 1 > large_cnvs:
+                if self.values[1][self.codes[1][idx]] in ["<DEL>", "<DUP>"]:
+                    selected.add(idx)
+        return selected
+
+    def is_pushed_down(self, pushdown, row):
+        """
+        Evaluate the pushdown filters on a row, fields not in the table are
+        "." as they are not defined in the VCF header
+        """
+        values = {}
+        for key in pushdown.INFO_TAGS:
+            values[key] = "."
+            if key in self.infofields:
+                values[key] = row[4 + self.infofields.index(key)]
+        for key in pushdown.FORMAT_TAGS:
+            values[key] = "."
+            if key in self.formatfields:
+                values[key] = row[4 + len(self.infofields) + self.formatfields.index(key)]
+        return pushdown.exclude(row[0], row[3], values)
+
+
+def open_table(path, key):
+    """
+    Memory map a cached table, or None if there isn't one for this key
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        magic, length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            logging.warning(path + " is not a variant cache table, rebuilding")
+            return None
+        header = json.loads(f.read(length).decode())
+        if header["key"] != key:
+            logging.info(path + " is out of date, rebuilding")
+            return None
+        if header["nrows"] == 0:
+            return VariantTable(header, b"", 0)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return VariantTable(header, mm, aligned(PREAMBLE.size + length))
+
+
+def write_table(path, key, infofields, formatfields, info_types, format_types, contigs, rows):
+    """
+    Write query rows to a columnar table. After the JSON header come the POS,
+    end and code arrays of the rows, then each column's distinct values as
+    an offsets array and a blob. The file is written under a temporary name
+    and moved into place, so readers never see it half written
+    """
+    pos = array("I")
+    end = array("I")
+    codes = []
+    values = []
+    lookups = []
+    chroms = []
+    long_rows = []
+    for row, rowend in rows:
+        idx = len(pos)
+        if not codes:
+            for i in range(len(row) - 2):
+                codes.append(array("I"))
+                values.append([])
+                lookups.append({})
+        if not chroms or chroms[-1][0] != row[0]:
+            chroms.append([row[0], idx, idx, 0])
+        chroms[-1][2] = idx + 1
+        pos.append(int(row[1]))
+        end.append(rowend)
+        if rowend - int(row[1]) > LONG_RECORD:
+            long_rows.append(idx)
+        else:
+            chroms[-1][3] = max(chroms[-1][3], rowend - int(row[1]))
+        for i in range(len(codes)):
+            value = row[i + 2]
+            code = lookups[i].get(value)
+            if code is None:
+                code = len(values[i])
+                lookups[i][value] = code
+                values[i].append(value)
+            codes[i].append(code)
+
+    # offsets of the dictionaries from the end of the header
+    dictionaries = []
+    blobs = []
+    start = (2 + len(codes)) * 4 * len(pos)
+    for column in values:
+        offsets = array("I", [0])
+        blob = bytearray()
+        for value in column:
+            blob += value.encode()
+            offsets.append(len(blob))
+        blob += b"\0" * (aligned(len(blob)) - len(blob))
+        dictionaries.append([start, len(column)])
+        blobs.append((offsets, blob))
+        start += 4 * len(offsets) + len(blob)
+
+    header = {
+        "key": key,
+        "infofields": infofields,
+        "formatfields": formatfields,
+        "info_types": info_types,
+        "format_types": format_types,
+        "contigs": contigs,
+        "chroms": chroms,
+        "long_rows": long_rows,
+        "dictionaries": dictionaries,
+        "nrows": len(pos),
+    }
+    encoded = json.dumps(header).encode()
+    tmp = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * (aligned(PREAMBLE.size + len(encoded)) - PREAMBLE.size - len(encoded)))
+        pos.tofile(f)
+        end.tofile(f)
+        for column in codes:
+            column.tofile(f)
+        for offsets, blob in blobs:
+            offsets.tofile(f)
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+def aligned(offset):
+    return (offset + 3) // 4 * 4
@@ -0,0 +1,515 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import bisect
+import gzip
+import logging
+import os
+import re
+import struct
+
+from file_loading.tabix import BgzfReader, TabixIndex, find_index, is_bgzf, is_gzip, merge_chunks
+
+HEADER_LINE = re.compile(r"^##(INFO|FORMAT)=<ID=([^,>]+),Number=([^,>]+),Type=([^,>]+)")
+CONTIG_LINE = re.compile(r"^##contig=<ID=([^,>]+)")
+FLOAT32 = struct.Struct("<f")
+
+# regions closer than this are read from the index as one window
+WINDOW_GAP = 16384
+# cost of an index seek in compressed bytes streamed, reading regions through
+# the index is used while its estimated cost is below the file size
+SEEK_COST = 16384
+
+
+class VcfReader(object):
+    """
+    In-process reader for plain, gzipped or bgzipped VCF files. Replicates
+    the output of the bcftools pipeline used to load variants:
+
+    bcftools norm -m - [-R regions] | bcftools view -e 'INFO/MAX_AF>0.005 |
+    FORMAT/GT[0]="ref"' | bcftools query -u -f ...
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.info_types = {}
+        self.format_types = {}
+        self.samples = []
+        self.contigs = []
+        self.bgzf = is_bgzf(filename)
+        self.read_header()
+
+    def open_text(self):
+        if is_gzip(self.filename):
+            return gzip.open(self.filename, "rt")
+        return open(self.filename, "r")
+
+    def read_header(self):
+        """
+        Parse INFO/FORMAT definitions and sample names from the header
+        """
+        with self.open_text() as f:
+            for line in f:
+                if line.startswith("##"):
+                    match = HEADER_LINE.match(line)
+                    if match:
+                        if match.group(1) == "INFO":
+                            self.info_types[match.group(2)] = (match.group(3), match.group(4))
+                        else:
+                            self.format_types[match.group(2)] = (match.group(3), match.group(4))
+                    match = CONTIG_LINE.match(line)
+                    if match:
+                        self.contigs.append(match.group(1))
+                elif line.startswith("#"):
+                    self.samples = line.rstrip("\n").split("\t")[9:]
+                    break
+                else:
+                    break
+
+    def records(self, regions=None, large_cnvs=None):
+        """
+        Yield data lines, restricted to those overlapping regions if given.
+        regions is a list of (chrom, start, end) 1-based inclusive. With
+        regions, large_cnvs optionally also includes <DEL>/<DUP> records
+        longer than large_cnvs anywhere in the file
+        """
+        if regions is None:
+            with self.open_text() as f:
+                for line in f:
+                    if not line.startswith("#"):
+                        yield line.rstrip("\n")
+            return
+
+        intervals = merge_regions(regions)
+        plan = plan_lookup(self.filename, intervals, self.contigs, large_cnvs)
+        if plan is None:
+            # stream through the file and check each record
+            for line in self.records():
+                if is_selected(line, intervals, large_cnvs):
+                    yield line
+            return
+
+        with BgzfReader(self.filename) as bgzf:
+            for chrom in plan.keys():
+                seen = set()
+                for cstart, cend in plan[chrom]:
+                    for voffset, line in bgzf.lines(cstart, cend):
+                        if voffset in seen or line.startswith("#"):
+                            continue
+                        if is_selected(line, intervals, large_cnvs):
+                            seen.add(voffset)
+                            yield line
+
+    def query(
+        self, infofields, formatfields, regions=None, pushdown=None, large_cnvs=None, samples=None, deferred=()
+    ):
+        """
+        Yield rows of CHROM, POS, REF, ALT, the INFO fields and the FORMAT
+        fields for each sample, after splitting multiallelic records and
+        excluding common (MAX_AF > 0.005) and hom ref variants. pushdown
+        optionally excludes further rows, see PreInheritancePushdown.
+        samples optionally selects and orders the samples by name, as
+        bcftools view -s does, hom ref is then checked on the first of them.
+        The columns of the INFO fields in deferred all hold one DeferredInfo
+        for the row instead of their values
+        """
+        sampleidx = None
+        if samples is not None:
+            sampleidx = self.sample_indices(samples)
+        deferred = frozenset(deferred)
+        for line in self.records(regions, large_cnvs):
+            data = line.split("\t")
+            alts = data[4].split(",")
+            info = parse_info(data[7])
+            formatkeys = data[8].split(":") if len(data) > 8 else []
+            if sampleidx is None:
+                sample_data = [s.split(":") for s in data[9:]]
+            else:
+                sample_data = [data[9 + i].split(":") for i in sampleidx]
+            for altidx in range(1, len(alts) + 1):
+                if len(alts) > 1:
+                    alt_info = self.split_info(info, altidx)
+                    alt_samples = [self.split_sample(formatkeys, s, altidx) for s in sample_data]
+                else:
+                    alt_info = info
+                    alt_samples = sample_data
+                if self.is_excluded(alt_info, formatkeys, alt_samples):
+                    continue
+                if pushdown is not None and self.is_pushed_down(
+                    pushdown, data[0], alts[altidx - 1], alt_info, formatkeys, alt_samples
+                ):
+                    continue
+                row = [data[0], str(int(data[1])), data[3], alts[altidx - 1]]
+                undecoded = None
+                for inf in infofields:
+                    if inf in deferred:
+                        if undecoded is None:
+                            undecoded = DeferredInfo(self, data[7], altidx, len(alts) > 1)
+                        row.append(undecoded)
+                    else:
+                        row.append(self.format_info(inf, alt_info))
+                for sample in alt_samples:
+                    for fmt in formatfields:
+                        row.append(self.format_sample(fmt, formatkeys, sample))
+                yield row
+
+    def sample_indices(self, samples):
+        """
+        Column indices of the named samples
+        """
+        missing = [s for s in samples if s not in self.samples]
+        if missing:
+            raise ValueError("Samples not found in " + self.filename + ": " + (", ").join(missing))
+        return [self.samples.index(s) for s in samples]
+
+    def split_info(self, info, altidx):
+        """
+        INFO values for one alternate allele of a multiallelic record
+        """
+        split = {}
+        for key, value in info.items():
+            number = self.info_types.get(key, (".", "String"))[0]
+            if value is None or number not in ["A", "R"]:
+                split[key] = value
+                continue
+            values = value.split(",")
+            if number == "A":
+                split[key] = values[altidx - 1] if altidx - 1 < len(values) else "."
+            else:
+                alt_value = values[altidx] if altidx < len(values) else "."
+                split[key] = values[0] + "," + alt_value
+        return split
+
+    def split_sample(self, formatkeys, sample, altidx):
+        """
+        FORMAT values for one alternate allele of a multiallelic record, other
+        alternate alleles are set to ref in the genotype as bcftools does
+        """
+        split = []
+        for i in range(len(sample)):
+            key = formatkeys[i] if i < len(formatkeys) else ""
+            value = sample[i]
+            if key == "GT":
+                split.append(split_genotype(value, altidx))
+                continue
+            number = self.format_types.get(key, (".", "String"))[0]
+            if number == "A":
+                values = value.split(",")
+                value = values[altidx - 1] if altidx - 1 < len(values) else "."
+            elif number == "R":
+                values = value.split(",")
+                alt_value = values[altidx] if altidx < len(values) else "."
+                value = values[0] + "," + alt_value
+            split.append(value)
+        return split
+
+    def is_excluded(self, info, formatkeys, samples):
+        """
+        Equivalent of bcftools view -e 'INFO/MAX_AF>0.005 | FORMAT/GT[0]="ref"'
+        """
+        max_af = info.get("MAX_AF")
+        if max_af is not None:
+            for af in max_af.split(","):
+                if af != "." and float(af) > 0.005:
+                    return True
+        if samples and "GT" in formatkeys:
+            gtidx = formatkeys.index("GT")
+            if gtidx < len(samples[0]) and is_hom_ref(samples[0][gtidx]):
+                return True
+        return False
+
+    def is_pushed_down(self, pushdown, chrom, alt, info, formatkeys, samples):
+        """
+        Evaluate the pushdown filters on the values the first sample's
+        variant would be given, fields not defined in the header are "."
+        """
+        values = {}
+        for key in pushdown.INFO_TAGS:
+            values[key] = self.format_info(key, info) if key in self.info_types else "."
+        for key in pushdown.FORMAT_TAGS:
+            if samples and key in self.format_types:
+                values[key] = self.format_sample(key, formatkeys, samples[0])
+            else:
+                values[key] = "."
+        return pushdown.exclude(chrom, alt, values)
+
+    def format_info(self, key, info):
+        """
+        Format an INFO value as bcftools query -u does
+        """
+        if key not in info:
+            return "."
+        value = info[key]
+        if value is None:
+            # flag
+            return "1"
+        return format_typed(value, self.info_types.get(key, (".", "String"))[1])
+
+    def format_sample(self, key, formatkeys, sample):
+        """
+        Format a FORMAT value as bcftools query -u does
+        """
+        if key not in formatkeys:
+            return "."
+        idx = formatkeys.index(key)
+        if idx >= len(sample) or sample[idx] == "":
+            return "."
+        if key == "GT":
+            return sample[idx]
+        return format_typed(sample[idx], self.format_types.get(key, (".", "String"))[1])
+
+
+class DeferredInfo(object):
+    """
+    The INFO column of a record, kept for one alternate allele's fields which
+    are only split and formatted when they are asked for
+    """
+
+    __slots__ = ["reader", "info", "altidx", "multiallelic"]
+
+    def __init__(self, reader, info, altidx, multiallelic):
+        self.reader = reader
+        self.info = info
+        self.altidx = altidx
+        self.multiallelic = multiallelic
+
+    def values(self, tags):
+        """
+        The fields formatted as VcfReader.query would give them
+        """
+        info = parse_info(self.info)
+        if self.multiallelic:
+            info = self.reader.split_info(info, self.altidx)
+        return [self.reader.format_info(tag, info) for tag in tags]
+
+
+def parse_info(infostring):
+    """
+    Parse an INFO column into a dict, flags have the value None
+    """
+    info = {}
+    if infostring == ".":
+        return info
+    for item in infostring.split(";"):
+        key, sep, value = item.partition("=")
+        info[key] = value if sep else None
+    return info
+
+
+def split_genotype(gt, altidx):
+    """
+    Recode a genotype for one alternate allele: that allele becomes 1 and any
+    other alternate allele becomes 0
+    """
+    alleles = re.split(r"([/|])", gt)
+    for i in range(0, len(alleles), 2):
+        allele = alleles[i]
+        if allele == "." or allele == "0":
+            continue
+        alleles[i] = "1" if int(allele) == altidx else "0"
+    return "".join(alleles)
+
+
+def is_hom_ref(gt):
+    """
+    bcftools "ref" genotype: all alleles called and reference
+    """
+    alleles = re.split(r"[/|]", gt)
+    for allele in alleles:
+        if allele != "0":
+            return False
+    return True
+
+
+def format_typed(value, vcftype):
+    """
+    Reformat numeric values the way htslib prints them after parsing, so
+    that output matches bcftools (eg 0.50 -> 0.5, 1e-6 -> 1e-06)
+    """
+    if vcftype not in ["Float", "Integer"]:
+        return value
+    formatted = []
+    for v in value.split(","):
+        if v == ".":
+            formatted.append(v)
+            continue
+        try:
+            if vcftype == "Integer":
+                formatted.append(str(int(v)))
+            else:
+                formatted.append(format_float(float(v)))
+        except ValueError:
+            formatted.append(v)
+    return (",").join(formatted)
+
+
+def format_float(value):
+    """
+    Round to single precision (as stored in BCF) then print as %g
+    """
+    value = FLOAT32.unpack(FLOAT32.pack(value))[0]
+    if value == 0:
+        return "0"
+    return "%g" % value
+
+
+def merge_regions(regions):
+    """
+    Convert a list of (chrom, start, end) regions into per chromosome sorted
+    lists of merged interval starts and ends, keeping chromosome order
+    """
+    bychrom = {}
+    for chrom, start, end in regions:
+        bychrom.setdefault(chrom, []).append((int(start), int(end)))
+    intervals = {}
+    for chrom in bychrom.keys():
+        starts = []
+        ends = []
+        for start, end in sorted(bychrom[chrom]):
+            if starts and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        intervals[chrom] = (starts, ends)
+    return intervals
+
+
+def record_span(data):
+    """
+    1-based inclusive span of a record, using INFO/END where present as
+    htslib does
+    """
+    start = int(data[1])
+    end = start + len(data[3]) - 1
+    info = data[7]
+    if "END=" in info:
+        for item in info.split(";"):
+            if item.startswith("END="):
+                end = int(item[4:])
+                break
+    return start, end
+
+
+def overlaps_regions(line, intervals):
+    """
+    Does a VCF data line overlap any of the merged intervals?
+    """
+    data = line.split("\t", 8)
+    if data[0] not in intervals:
+        return False
+    starts, ends = intervals[data[0]]
+    start, end = record_span(data)
+    idx = bisect.bisect_right(starts, end) - 1
+    return idx >= 0 and ends[idx] >= start
+
+
+def plan_lookup(filename, intervals, contigs=None, large_cnvs=None):
+    """
+    Decide how to read merged intervals from a file. Returns the chunks to
+    read through the index per chromosome, or None if it is cheaper to
+    stream through the whole file (or there is no usable index). Intervals
+    closer than WINDOW_GAP are coalesced into one window, and the cost of
+    reading the windows is estimated as the compressed bytes in their chunks
+    plus SEEK_COST for each chunk which starts in a new block
+    """
+    indexfile = find_index(filename) if is_bgzf(filename) else None
+    if indexfile is None:
+        return None
+    index = TabixIndex(indexfile)
+    if not index.names and contigs:
+        index.name_refs(contigs)
+    if not index.names:
+        return None
+
+    plan = {}
+    for chrom in intervals.keys():
+        starts, ends = intervals[chrom]
+        chunks = []
+        wstart = starts[0]
+        wend = ends[0]
+        for i in range(1, len(starts)):
+            if starts[i] - wend > WINDOW_GAP:
+                chunks.extend(index.chunks(chrom, wstart - 1, wend))
+                wstart = starts[i]
+            wend = max(wend, ends[i])
+        chunks.extend(index.chunks(chrom, wstart - 1, wend))
+        plan[chrom] = chunks
+    if large_cnvs is not None:
+        for chrom in index.names:
+            plan.setdefault(chrom, []).extend(index.large_chunks(chrom, large_cnvs))
+
+    cost = 0
+    block = None
+    for chrom in plan.keys():
+        plan[chrom] = merge_chunks(plan[chrom])
+        for cstart, cend in plan[chrom]:
+            if cstart >> 16 != block:
+                # a chunk starting in the block already loaded needs no seek
+                cost += SEEK_COST
+            cost += (cend >> 16) - (cstart >> 16)
+            block = cend >> 16
+    size = os.path.getsize(filename)
+    if cost >= size:
+        logging.debug("Streaming " + filename + ", index lookup cost " + str(cost) + " >= file size " + str(size))
+        return None
+    return plan
+
+
+def is_large_cnv(line, min_length):
+    """
+    Is a VCF data line a <DEL> or <DUP> longer than min_length?
+    """
+    data = line.split("\t", 8)
+    if "<DEL>" not in data[4] and "<DUP>" not in data[4]:
+        return False
+    start, end = record_span(data)
+    return end - start + 1 > min_length
+
+
+def is_selected(line, intervals, large_cnvs):
+    """
+    Does a data line overlap the intervals, or is it a large CNV?
+    """
+    if overlaps_regions(line, intervals):
+        return True
+    return large_cnvs is not None and is_large_cnv(line, large_cnvs)
+
+
+def match_contigs(regions, contigs):
+    """
+    Rename region chromosomes to match the VCF's naming where it differs only
+    by a chr prefix (eg 1 and chr1)
+    """
+    if not contigs:
+        return regions
+    contigs = set(contigs)
+    matched = []
+    for chrom, start, end in regions:
+        if chrom not in contigs:
+            if "chr" + chrom in contigs:
+                chrom = "chr" + chrom
+            elif chrom.startswith("chr") and chrom[3:] in contigs:
+                chrom = chrom[3:]
+        matched.append((chrom, start, end))
+    return matched
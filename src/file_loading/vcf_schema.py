@@ -0,0 +1,166 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import logging
+
+from variants.fields import FIELDS
+
+# fields not used by any filter or output column
+UNUSED_ATTRIBUTES = ["vaf", "an_XX", "an_XY"]
+
+# fields only used for output columns. When the proband is read in process
+# these are left in the record's INFO column until a variant is written out
+OUTPUT_ATTRIBUTES = [
+    "ensg",
+    "feature",
+    "canonical",
+    "mane",
+    "mane_clinical",
+    "max_af_pops",
+    "polyphen",
+    "protein_position",
+    "hgvsc",
+    "hgvsp",
+    "AlphaMissense_pred",
+    "AlphaMissense_rankscore",
+    "AlphaMissense_score",
+    "MPC_rankscore",
+    "MPC_score",
+    "PrimateAI_pred",
+    "PrimateAI_rankscore",
+    "PrimateAI_score",
+    "EVE_CLASS",
+    "EVE_SCORE",
+    "pLI_gene_value",
+    "SpliceAI_pred_DP_AG",
+    "SpliceAI_pred_DP_AL",
+    "SpliceAI_pred_DP_DG",
+    "SpliceAI_pred_DP_DL",
+    "SpliceAI_pred_SYMBOL",
+    "LoF",
+    "LoF_filter",
+    "LoF_flags",
+    "LoF_info",
+    "CADD_PHRED",
+    "CLIN_SIG",
+    "CALLSOURCE",
+    "MEANLR2",
+]
+
+# the proband needs everything used by filtering and output, parents are only
+# used for their genotypes
+CHILD_ATTRIBUTES = [f[0] for f in FIELDS if f[0] not in UNUSED_ATTRIBUTES]
+PARENT_ATTRIBUTES = ["gt"]
+
+# fields which must be defined in the VCF header
+CHILD_REQUIRED = ["consequence", "symbol", "hgnc_id", "gt"]
+PARENT_REQUIRED = ["gt"]
+
+
+class FieldSchema(object):
+    """
+    The fields to query from one VCF: the requested attributes which are
+    defined in its header. Attributes which are not queried are set to ".".
+    Deferred attributes are INFO fields which rows from the in-process reader
+    leave undecoded, see DeferredInfo
+    """
+
+    def __init__(self, info_types, format_types, attributes, required, deferred=()):
+        self.attributes = []
+        self.infofields = []
+        self.formatfields = []
+        self.defaults = {}
+        missing = []
+        for attribute, column, tag in FIELDS:
+            self.defaults[attribute] = "."
+            if attribute not in attributes:
+                continue
+            if column == "INFO":
+                present = tag in info_types
+            else:
+                present = tag in format_types
+            if not present:
+                if attribute in required:
+                    missing.append(column + "/" + tag)
+                continue
+            if column == "INFO":
+                self.infofields.append(tag)
+            else:
+                self.formatfields.append(tag)
+
+        if missing:
+            raise ValueError("Required fields not defined in VCF header: " + (", ").join(missing))
+
+        # query output has all INFO columns before the FORMAT columns
+        tags = {}
+        for attribute, column, tag in FIELDS:
+            tags[column + "/" + tag] = attribute
+        for tag in self.infofields:
+            self.attributes.append(tags["INFO/" + tag])
+        for tag in self.formatfields:
+            self.attributes.append(tags["FORMAT/" + tag])
+        for attribute in self.attributes:
+            del self.defaults[attribute]
+
+        # query columns set on variants as they are created, the deferred
+        # columns and their INFO tags
+        self.eager = []
+        self.deferred = []
+        self.deferred_tags = []
+        for i in range(len(self.attributes)):
+            if self.attributes[i] in deferred and i < len(self.infofields):
+                self.deferred.append((4 + i, self.attributes[i]))
+                self.deferred_tags.append(self.infofields[i])
+            else:
+                self.eager.append((4 + i, self.attributes[i]))
+        self.deferred_attributes = frozenset([attribute for i, attribute in self.deferred])
+        logging.debug("Querying " + str(len(self.attributes)) + " fields: " + (",").join(self.attributes))
+
+    def vardata(self, row, sex):
+        """
+        Variant data dict from a query row of CHROM, POS, REF, ALT and the
+        queried fields
+        """
+        vdata = dict(self.defaults)
+        vdata["chrom"] = row[0]
+        vdata["pos"] = row[1]
+        vdata["ref"] = row[2]
+        vdata["alt"] = row[3]
+        for i in range(len(self.attributes)):
+            vdata[self.attributes[i]] = row[4 + i]
+        vdata["sex"] = sex
+
+        if not vdata["DNM"] == "." or not vdata["DNG"] == ".":
+            vdata["dnm"] = True
+        else:
+            vdata["dnm"] = False
+
+        return vdata
+
+
+def child_schema(info_types, format_types):
+    return FieldSchema(info_types, format_types, CHILD_ATTRIBUTES, CHILD_REQUIRED, OUTPUT_ATTRIBUTES)
+
+
+def parent_schema(info_types, format_types):
+    return FieldSchema(info_types, format_types, PARENT_ATTRIBUTES, PARENT_REQUIRED)
@@ -23,7 +23,18 @@ THE SOFTWARE.
 
 import logging
 from itertools import combinations
-from utils.utils import common_elements
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT, REF, DEL, encode_trio
+from variants.consequences import terms_mask
+
+# consequences treated as missense when screening pairs without parents
+MISSENSE_EQUIVALENT = terms_mask(["missense_variant", "inframe_deletion", "inframe_insertion"])
+
+# trio genotypes 201 and 210, a hom alt SNV with one parent het, and the
+# deletions (DELDELREF, DELREFDEL) which can explain them as compound hets
+HOM_ALT_DAD_HET = encode_trio(HOM_ALT, HOM_REF, HET)
+HOM_ALT_MUM_HET = encode_trio(HOM_ALT, HET, HOM_REF)
+DEL_FROM_MUM = encode_trio(DEL, DEL, REF)
+DEL_FROM_DAD = encode_trio(DEL, REF, DEL)
 
 
 class CompoundHetScreen(object):
@@ -77,16 +88,7 @@ class CompoundHetScreen(object):
         if self.family.has_no_parents():
             # If there are no parents and the variants are not both missense
             # or in frame del/ins then pass
-            missense_equiv = [
-                "missense_variant",
-                "inframe_deletion",
-                "inframe_insertion",
-            ]
-            var1cqs = var1.consequence.split("&")
-            var2cqs = var2.consequence.split("&")
-            var1_missense_equiv = common_elements(missense_equiv, var1cqs)
-            var2_missense_equiv = common_elements(missense_equiv, var2cqs)
-            if len(var1_missense_equiv) > 0 and len(var2_missense_equiv) > 0:
+            if var1.consequence_mask & MISSENSE_EQUIVALENT and var2.consequence_mask & MISSENSE_EQUIVALENT:
                 # if var1.consequence.find(
                 #         "missense_variant") and var2.consequence.find(
                 #     "missense_variant"):
@@ -104,17 +106,14 @@ class CompoundHetScreen(object):
             if (
                 var1.chrom == "X"
                 and not self.family.dad.get_affected_status()
-                and (var1.get_dad_genotype() == "0" or var2.get_dad_genotype() == "0")
+                and (var1.get_dad_genotype() == HOM_REF or var2.get_dad_genotype() == HOM_REF)
             ):
                 logging.info(
                     varid1 + " " + varid2 + " failed compound het screen, X chrom and dad "
                     "unaffected and hom ref for 1 variant"
                 )
                 return False
-            elif var1.triogenotype in ["201", "210"] or var1.triogenotype in [
-                "201",
-                "210",
-            ]:
+            elif var1.trio_code in [HOM_ALT_DAD_HET, HOM_ALT_MUM_HET]:
                 # triogenotype of 201 or 210 only passes is one variant is a
                 # deletion with copy number 1
                 if var1.is_cnv() and not var2.is_cnv():
@@ -129,9 +128,9 @@ class CompoundHetScreen(object):
                         "one alllle and other allele not CNV"
                     )
                 if varcnv.cn == "1":
-                    if varsnv.triogenotype == "201" and varcnv.triogenotype == "DELDELREF":
+                    if varsnv.trio_code == HOM_ALT_DAD_HET and varcnv.trio_code == DEL_FROM_MUM:
                         return True
-                    elif varsnv.triogenotype == "210" and varcnv.triogenotype == "DELREFDEL":
+                    elif varsnv.trio_code == HOM_ALT_MUM_HET and varcnv.trio_code == DEL_FROM_DAD:
                         return True
                     else:
                         logging.info(
@@ -147,23 +146,23 @@ class CompoundHetScreen(object):
                     )
 
             elif (
-                var1.get_mum_genotype() == "0"
-                and var2.get_mum_genotype() != "0"
-                and var1.get_dad_genotype() != "0"
-                and var2.get_dad_genotype() == "0"
+                var1.get_mum_genotype() == HOM_REF
+                and var2.get_mum_genotype() != HOM_REF
+                and var1.get_dad_genotype() != HOM_REF
+                and var2.get_dad_genotype() == HOM_REF
             ) or (
-                var2.get_mum_genotype() == "0"
-                and var1.get_mum_genotype() != "0"
-                and var2.get_dad_genotype() != "0"
-                and var1.get_dad_genotype() == "0"
+                var2.get_mum_genotype() == HOM_REF
+                and var1.get_mum_genotype() != HOM_REF
+                and var2.get_dad_genotype() != HOM_REF
+                and var1.get_dad_genotype() == HOM_REF
             ):
                 # one variant is inherited from each parent
                 return True
             elif (
-                (var1.dnm == True and var2.get_mum_genotype() != "0" and var2.get_dad_genotype() == "0")
-                or (var1.dnm == True and var2.get_mum_genotype() == "0" and var2.get_dad_genotype() != "0")
-                or (var2.dnm == True and var1.get_mum_genotype() != "0" and var1.get_dad_genotype() == "0")
-                or (var2.dnm == True and var1.get_mum_genotype() == "0" and var1.get_dad_genotype() != "0")
+                (var1.dnm == True and var2.get_mum_genotype() != HOM_REF and var2.get_dad_genotype() == HOM_REF)
+                or (var1.dnm == True and var2.get_mum_genotype() == HOM_REF and var2.get_dad_genotype() != HOM_REF)
+                or (var2.dnm == True and var1.get_mum_genotype() != HOM_REF and var1.get_dad_genotype() == HOM_REF)
+                or (var2.dnm == True and var1.get_mum_genotype() == HOM_REF and var1.get_dad_genotype() != HOM_REF)
             ):
                 # one variant is DNM and the other is inherited
                 return True
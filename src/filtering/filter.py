@@ -21,7 +21,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-from file_loading.load_genes_and_regions import load_genes
+from file_loading.gene_catalog import GeneCatalog
+from file_loading.load_genes_and_regions import gene_regions
 from file_loading.load_vcfs import load_variants
 from variants.trio_genotype import add_trio_genotypes
 from filtering.preinheritance_filtering import PreInheritanceFiltering
@@ -30,6 +31,9 @@ from filtering.inheritance_cnv import CNVFiltering
 from filtering.postinheritance_filter import PostInheritanceFiltering
 from filtering.inheritance_report import InheritanceReport
 from filtering.compound_hets import CompoundHetScreen
+from filtering.pushdown import PreInheritancePushdown
+from filtering.rules import RuleSet
+from utils.profiling import Profile
 
 
 class Filter(object):
@@ -37,12 +41,45 @@ class Filter(object):
     Class for filtering variants
     """
 
-    def __init__(self, family, known_genes, known_regions, trusted_variants, outdir):
+    def __init__(
+        self,
+        family,
+        known_genes,
+        known_regions,
+        trusted_variants,
+        outdir,
+        loader=None,
+        pushdown=False,
+        threads=1,
+        restrict_to_genes=False,
+        gene_padding=0,
+        parent_cache=None,
+        variant_cache=None,
+        columnar=False,
+        rules=None,
+        profile=None,
+        gene_catalog=None,
+    ):
         self.family = family
         self.known_genes = known_genes
         self.known_regions = known_regions
         self.trusted_variants = trusted_variants
         self.outdir = outdir
+        self.loader = loader
+        self.pushdown = pushdown
+        self.threads = threads
+        self.restrict_to_genes = restrict_to_genes
+        self.gene_padding = gene_padding
+        self.parent_cache = parent_cache
+        self.variant_cache = variant_cache
+        self.columnar = columnar
+        if rules is None:
+            rules = RuleSet()
+        self.rules = rules
+        if profile is None:
+            profile = Profile()
+        self.profile = profile
+        self.gene_catalog = gene_catalog
         self.candidate_variants = None
         self.candidate_variants = {"single_variants": {}, "compound_hets": {}}
         self.inhreport = None
@@ -53,6 +90,8 @@ class Filter(object):
         """
         filter each trio
         """
+        self.rules.start_family()
+
         # if genes, regions or variants files are present we can create a list
         # of regions to load and therefore load fewer variants
         vcfregions = set()
@@ -61,7 +100,12 @@ class Filter(object):
         trusted_variants = None
 
         if self.known_genes:
-            genes = load_genes(self.known_genes)
+            genes = self.gene_catalog
+            if genes is None:
+                genes = GeneCatalog.from_file(self.known_genes)
+            if self.restrict_to_genes:
+                # only load the child's variants in and around known genes
+                vcfregions.update(gene_regions(genes, self.gene_padding))
 
         if self.known_regions:
             # TODO add regions to the vcfregions set and populate regions variable
@@ -72,48 +116,111 @@ class Filter(object):
             # trusted_regions variable
             pass
 
-        if len(vcfregions) > 0:
-            variants = load_variants(self.family, self.outdir, vcfregions)
-        else:
-            variants = load_variants(self.family, self.outdir)
+        # optionally apply the pre-inheritance filters while loading the child
+        pushdown = None
+        if self.pushdown:
+            pushdown = PreInheritancePushdown(self.rules)
+
+        profile = self.profile
+        with profile.stage(self.family, "load") as stage:
+            if len(vcfregions) > 0:
+                variants = load_variants(
+                    self.family,
+                    vcfregions,
+                    self.loader,
+                    pushdown,
+                    self.threads,
+                    self.parent_cache,
+                    self.variant_cache,
+                    self.columnar,
+                    self.rules,
+                )
+            else:
+                variants = load_variants(
+                    self.family,
+                    loader=self.loader,
+                    pushdown=pushdown,
+                    threads=self.threads,
+                    parent_cache=self.parent_cache,
+                    variant_cache=self.variant_cache,
+                    columnar=self.columnar,
+                    rules=self.rules,
+                )
+            stage.rows_out = len(variants["child"])
 
         # add trio genotypes for each variant
-        add_trio_genotypes(self.family, variants)
+        with profile.stage(self.family, "trio_genotypes", len(variants["child"])) as stage:
+            add_trio_genotypes(self.family, variants)
+            stage.rows_out = len(variants["child"])
 
         # preinheritance filters
-        preinheritancefilter = PreInheritanceFiltering(variants)
-        variants_per_gene = preinheritancefilter.preinheritance_filter()
+        with profile.stage(self.family, "preinheritance", len(variants["child"])) as stage:
+            preinheritancefilter = PreInheritanceFiltering(variants, self.rules)
+            variants_per_gene = preinheritancefilter.preinheritance_filter()
+            stage.rows_out = count_variants_per_gene(variants_per_gene)
 
         # inheritance filters for SNVs
-        inheritancefilter = InheritanceFiltering(
-            variants_per_gene,
-            self.family,
-            genes,
-            regions,
-            trusted_variants,
-            self.candidate_variants,
-            self.inhreport,
-        )
-        # candidate_variants, inheritance_report = inheritancefilter.inheritance_filter()
-        inheritancefilter.inheritance_filter()
+        with profile.stage(self.family, "snv_inheritance", count_variants_per_gene(variants_per_gene)) as stage:
+            inheritancefilter = InheritanceFiltering(
+                variants_per_gene,
+                self.family,
+                genes,
+                regions,
+                trusted_variants,
+                self.candidate_variants,
+                self.inhreport,
+            )
+            # candidate_variants, inheritance_report = inheritancefilter.inheritance_filter()
+            inheritancefilter.inheritance_filter()
+            stage.rows_out = count_candidates(self.candidate_variants)
 
         # inheritance filters for CNVs
-        cnvfilter = CNVFiltering(
-            variants,
-            self.family,
-            genes,
-            regions,
-            trusted_variants,
-            self.candidate_variants,
-        )
-        cnvfilter.cnv_filter()
+        cnvs = len([var for var in variants["child"].values() if var.is_cnv()])
+        with profile.stage(self.family, "cnv_inheritance", cnvs) as stage:
+            candidates = count_candidates(self.candidate_variants)
+            cnvfilter = CNVFiltering(
+                variants,
+                self.family,
+                genes,
+                regions,
+                trusted_variants,
+                self.candidate_variants,
+            )
+            cnvfilter.cnv_filter()
+            stage.rows_out = count_candidates(self.candidate_variants) - candidates
 
         # compound het screen
-        compoundhets = CompoundHetScreen(self.candidate_variants, self.family)
-        compoundhets.screen_compound_hets()
+        with profile.stage(self.family, "compound_hets", count_candidates(self.candidate_variants)) as stage:
+            compoundhets = CompoundHetScreen(self.candidate_variants, self.family)
+            compoundhets.screen_compound_hets()
+            stage.rows_out = count_candidates(self.candidate_variants)
 
         # post inheritance filters
-        postinheritancefilter = PostInheritanceFiltering(self.candidate_variants, self.family)
-        filtered_candidate_variants = postinheritancefilter.postinheritance_filter()
+        with profile.stage(self.family, "postinheritance", count_candidates(self.candidate_variants)) as stage:
+            postinheritancefilter = PostInheritanceFiltering(self.candidate_variants, self.family, self.rules)
+            filtered_candidate_variants = postinheritancefilter.postinheritance_filter()
+            stage.rows_out = count_candidates(filtered_candidate_variants)
 
         return filtered_candidate_variants, self.inhreport
+
+
+def count_variants_per_gene(variants_per_gene):
+    """
+    Number of variants in a dict of gene: {variant id: variant}, a variant
+    in more than one gene is counted for each
+    """
+    count = 0
+    for gene in variants_per_gene.keys():
+        count += len(variants_per_gene[gene])
+    return count
+
+
+def count_candidates(candidates):
+    """
+    Number of single variants and compound het variants in a candidate
+    variants dict
+    """
+    count = len(candidates["single_variants"])
+    for gene in candidates["compound_hets"].keys():
+        count += len(candidates["compound_hets"][gene])
+    return count
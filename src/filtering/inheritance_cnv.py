@@ -246,7 +246,7 @@ class CNVFiltering(object):
 
                 if (
                     "Loss of function" in self.genes[hgncid]["mechanism"]
-                    and len(set.intersection(self.genes[hgncid]["mode"], dupmodes)) > 0
+                    and len(self.genes[hgncid]["mode"].intersection(dupmodes)) > 0
                 ):
                     if (int(self.variants["child"][varid].pos) < int(self.genes[hgncid]["start"])) and (
                         int(self.variants["child"][varid].cnv_end) > int(self.genes[hgncid]["end"])
@@ -262,7 +262,7 @@ class CNVFiltering(object):
             # "Uncertain", "Loss of function", "Dominant negative"
             if int(self.variants["child"][varid].cn) == 0 and "Biallelic" in self.genes[hgncid]["mode"]:
                 biallelicmechs = set({"Uncertain", "Loss of function", "Dominant negative"})
-                if len(set.intersection(self.genes[hgncid]["mechanism"], biallelicmechs)) > 0:
+                if len(self.genes[hgncid]["mechanism"].intersection(biallelicmechs)) > 0:
                     cnvpass = True
                     self.variants["child"][varid].reportable_symbol.append(self.genes[hgncid]["symbol"])
                     self.variants["child"][varid].reportable_hgnc_id.append(hgncid)
@@ -23,13 +23,14 @@ THE SOFTWARE.
 
 import logging
 
-from filtering.inheritance_autosomal import AutosomalFilter
-from filtering.inheritance_allosomal import AllosomalFilter
+from filtering.inheritance_table import BatchInheritanceFilter, TableInheritanceFilter
 
 
 class InheritanceFiltering(object):
     """
-    Inheritance filtering of SNVs/Indels
+    Inheritance filtering of SNVs/Indels. By default all of a family's
+    variants in known genes are classified in one batch, batch=False filters
+    one gene at a time
     """
 
     def __init__(
@@ -41,6 +42,7 @@ class InheritanceFiltering(object):
         trusted_variants,
         candidate_variants,
         inhreport,
+        batch=True,
     ):
         self.variants_per_gene = variants_per_gene
         self.family = family
@@ -49,6 +51,7 @@ class InheritanceFiltering(object):
         self.trusted_variants = trusted_variants
         self.candidate_variants = candidate_variants
         self.inhreport = inhreport
+        self.batch = batch
         self.parents = None
         if self.family.has_both_parents():
             self.parents = "both"
@@ -76,12 +79,11 @@ class InheritanceFiltering(object):
         """
         for hgncid in self.variants_per_gene.keys():
             if hgncid in self.genes.keys():
-                if self.genes[hgncid]["chr"] in ["X", "Y"]:
-                    allosomalfiltering = AllosomalFilter(self, hgncid)
-                    allosomalfiltering.allosomal_filter()
-                else:
-                    autosomalfiltering = AutosomalFilter(self, hgncid)
-                    autosomalfiltering.autosomal_filter()
+                if not self.batch:
+                    genefiltering = TableInheritanceFilter(self, hgncid)
+                    genefiltering.inheritance_filter()
             else:
                 for v in self.variants_per_gene[hgncid].keys():
                     logging.info(v + " gene not in DDG2P: " + self.variants_per_gene[hgncid][v]["child"].symbol)
+        if self.batch:
+            BatchInheritanceFilter(self).inheritance_filter()
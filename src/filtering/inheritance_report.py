@@ -21,80 +21,90 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
-import copy
+from array import array
+
+# axes of the report, a count for every combination of chromosome type,
+# mode, child genotype, parents' affected status and parents' genotypes
+CHROM_TYPES = ["autosomal", "allosomal"]
+MODES = [
+    "biallelic",
+    "monoallelic",
+    "mosaic",
+    "imprinted",
+    "hemizygous",
+    "X-linked_dominant",
+    "X-linked_over_dominance",
+    "monoallelic_Y_hemizygous",
+]
+CHILD_GENOTYPES = ["child_het", "child_hemi", "child_hom"]
+DAD_AFFECTED_STATES = ["dad_unaffected", "dad_affected"]
+MUM_AFFECTED_STATES = ["mum_unaffected", "mum_affected"]
+PARENT_GENOTYPES = [
+    "dad_0/0_mum_0/0",
+    "dad_0/0_mum_0/1",
+    "dad_0/0_mum_1/1",
+    "dad_0/1_mum_0/0",
+    "dad_0/1_mum_0/1",
+    "dad_0/1_mum_1/1",
+    "dad_1/1_mum_0/0",
+    "dad_1/1_mum_0/1",
+    "dad_1/1_mum_1/1",
+]
+AXES = [CHROM_TYPES, MODES, CHILD_GENOTYPES, DAD_AFFECTED_STATES, MUM_AFFECTED_STATES, PARENT_GENOTYPES]
+
+# the (chromosome type, mode, child genotype) combinations reported, in
+# the order of the report file
+LAYOUT = [
+    ("autosomal", "biallelic", ["child_het", "child_hom"]),
+    ("autosomal", "monoallelic", ["child_het", "child_hom"]),
+    ("autosomal", "mosaic", ["child_het", "child_hom"]),
+    ("autosomal", "imprinted", ["child_het", "child_hom"]),
+    ("allosomal", "hemizygous", ["child_het", "child_hemi", "child_hom"]),
+    ("allosomal", "X-linked_dominant", ["child_het", "child_hemi", "child_hom"]),
+    ("allosomal", "X-linked_over_dominance", ["child_het", "child_hemi", "child_hom"]),
+    ("allosomal", "monoallelic_Y_hemizygous", ["child_hemi"]),
+]
+
+
+def create_cells():
+    """
+    Reported cells as (chromosome type, mode, child genotype, dad affected
+    state, mum affected state, parent genotypes) in file order, and the
+    index of each in the count array
+    """
+    strides = []
+    stride = 1
+    for axis in reversed(AXES):
+        strides.insert(0, stride)
+        stride *= len(axis)
+    cells = []
+    index = {}
+    for chromtype, mode, child_genos in LAYOUT:
+        for child_geno in child_genos:
+            for dad_aff_state in DAD_AFFECTED_STATES:
+                for mum_aff_state in MUM_AFFECTED_STATES:
+                    for parent_gts in PARENT_GENOTYPES:
+                        cell = (chromtype, mode, child_geno, dad_aff_state, mum_aff_state, parent_gts)
+                        cells.append(cell)
+                        index[cell] = sum(AXES[i].index(cell[i]) * strides[i] for i in range(len(AXES)))
+    return cells, index, stride
+
+
+CELLS, CELL_INDEX, SIZE = create_cells()
+CELL_OFFSETS = [CELL_INDEX[cell] for cell in CELLS]
 
 
 class InheritanceReport(object):
     """
     Create inheritance report and populate for matrix creation for all
-    combinations of parent and child gt, affected status and gene mode
+    combinations of parent and child gt, affected status and gene mode.
+    The counts are held in a fixed size integer array over AXES, so reports
+    for families or workers can be added together with merge, and are
+    exported in the nested layout of the report file with as_dict
     """
 
     def __init__(self):
-        self.inheritance_report = self.create_blank_inheritance_report()
-
-    def create_blank_inheritance_report(self):
-        """
-        Create a blank report dict to report variants observed in all
-        combinations of trio genotype, affected status and gene mode
-        """
-        inheritance_report = {}
-
-        gt_matrix = {
-            "dad_0/0_mum_0/0": 0,
-            "dad_0/0_mum_0/1": 0,
-            "dad_0/0_mum_1/1": 0,
-            "dad_0/1_mum_0/0": 0,
-            "dad_0/1_mum_0/1": 0,
-            "dad_0/1_mum_1/1": 0,
-            "dad_1/1_mum_0/0": 0,
-            "dad_1/1_mum_0/1": 0,
-            "dad_1/1_mum_1/1": 0,
-        }
-
-        aff_matrix = {
-            "dad_unaffected": {
-                "mum_unaffected": copy.deepcopy(gt_matrix),
-                "mum_affected": copy.deepcopy(gt_matrix),
-            },
-            "dad_affected": {
-                "mum_unaffected": copy.deepcopy(gt_matrix),
-                "mum_affected": copy.deepcopy(gt_matrix),
-            },
-        }
-
-        inheritance_report["autosomal"] = {}
-        inheritance_report["allosomal"] = {}
-
-        inheritance_report["autosomal"]["biallelic"] = {}
-        inheritance_report["autosomal"]["biallelic"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["biallelic"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["monoallelic"] = {}
-        inheritance_report["autosomal"]["monoallelic"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["monoallelic"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["mosaic"] = {}
-        inheritance_report["autosomal"]["mosaic"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["mosaic"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["imprinted"] = {}
-        inheritance_report["autosomal"]["imprinted"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["autosomal"]["imprinted"]["child_hom"] = copy.deepcopy(aff_matrix)
-
-        inheritance_report["allosomal"]["hemizygous"] = {}
-        inheritance_report["allosomal"]["hemizygous"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["hemizygous"]["child_hemi"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["hemizygous"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_dominant"] = {}
-        inheritance_report["allosomal"]["X-linked_dominant"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_dominant"]["child_hemi"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_dominant"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_over_dominance"] = {}
-        inheritance_report["allosomal"]["X-linked_over_dominance"]["child_het"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_over_dominance"]["child_hemi"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["X-linked_over_dominance"]["child_hom"] = copy.deepcopy(aff_matrix)
-        inheritance_report["allosomal"]["monoallelic_Y_hemizygous"] = {}
-        inheritance_report["allosomal"]["monoallelic_Y_hemizygous"]["child_hemi"] = copy.deepcopy(aff_matrix)
-
-        return inheritance_report
+        self.counts = array("q", bytes(8 * SIZE))
 
     def populate_inheritance_report(self, chromtype, mode, child_gt, mum_gt, dad_gt, mum_aff, dad_aff):
         """
@@ -139,4 +149,61 @@ class InheritanceReport(object):
             exit(1)
 
         parent_gts = "dad_" + dad_gt + "_mum_" + mum_gt
-        self.inheritance_report[chromtype][mode][child_geno][dad_aff_state][mum_aff_state][parent_gts] += 1
+        self.increment((chromtype, mode, child_geno, dad_aff_state, mum_aff_state, parent_gts))
+
+    def increment(self, cell, count=1):
+        """
+        Add count to a report count given as (chromosome type, mode, child
+        genotype, dad affected state, mum affected state, parent genotypes)
+        """
+        self.counts[CELL_INDEX[cell]] += count
+
+    def count(self, cell):
+        return self.counts[CELL_INDEX[cell]]
+
+    def merge(self, other):
+        """
+        Add the counts of another report to this one
+        """
+        counts = self.counts
+        othercounts = other.counts
+        for i in range(SIZE):
+            counts[i] += othercounts[i]
+        return self
+
+    @property
+    def inheritance_report(self):
+        return self.as_dict()
+
+    def as_dict(self):
+        """
+        The counts as nested dicts of chromosome type, mode, child genotype,
+        dad affected state, mum affected state and parent genotypes
+        """
+        inheritance_report = {}
+        counts = self.counts.tolist()
+        i = 0
+        for chromtype, mode, child_genos in LAYOUT:
+            modes = inheritance_report.setdefault(chromtype, {})
+            modes[mode] = {}
+            for child_geno in child_genos:
+                modes[mode][child_geno] = {}
+                for dad_aff_state in DAD_AFFECTED_STATES:
+                    modes[mode][child_geno][dad_aff_state] = {}
+                    for mum_aff_state in MUM_AFFECTED_STATES:
+                        gts = {}
+                        for parent_gts in PARENT_GENOTYPES:
+                            gts[parent_gts] = counts[CELL_OFFSETS[i]]
+                            i += 1
+                        modes[mode][child_geno][dad_aff_state][mum_aff_state] = gts
+        return inheritance_report
+
+
+def merge_reports(reports):
+    """
+    Cohort report, the sum of the given reports
+    """
+    cohort = InheritanceReport()
+    for report in reports:
+        cohort.merge(report)
+    return cohort
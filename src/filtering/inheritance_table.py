@@ -0,0 +1,674 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import logging
+
+from utils.utils import add_compound_het_to_candidates
+from utils.utils import add_single_var_to_candidates
+from utils.utils import convert_genotype_to_gt
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT, mum_state, dad_state
+from variants.variant import MISSING
+
+# outcomes of the decision table
+SINGLE = "single"
+COMPOUND_HET = "compound_het"
+FAIL = "fail"
+
+# mode key of the rules which apply to any gene mode, with the candidate
+# mode taken from the gene
+ANY_MODE = None
+
+PARENT_GENOTYPES = [HOM_REF, HET, HOM_ALT]
+AFFECTED_STATES = [False, True]
+# proband X chromosome counts are keyed as 0, 1 or 2 for two or more
+X_COUNTS = [0, 1, 2]
+
+# child genotypes on X and Y are taken from GT, anything else is invalid
+ALLOSOMAL_GT_STATES = {"0/1": HET, "1/1": HOM_ALT}
+
+
+class Outcome(object):
+    """
+    Result of the inheritance rules for one gene mode: SINGLE or
+    COMPOUND_HET candidate with its candidate mode, or FAIL. reason is a
+    short code for the rule deciding it, message the log line template for
+    a failure (None if nothing is logged) and report_cell the inheritance
+    report count to increment, if any
+    """
+
+    __slots__ = ["action", "mode", "reason", "message", "report_cell"]
+
+    def __init__(self, action, mode, reason, message=None, report_cell=None):
+        self.action = action
+        self.mode = mode
+        self.reason = reason
+        self.message = message
+        self.report_cell = report_cell
+
+    def __repr__(self):
+        return 'Outcome(action="{}", mode="{}", reason="{}")'.format(self.action, self.mode, self.reason)
+
+
+# Rules for both parents present, called with the parental genotypes and
+# affected status. Each returns (action, reason)
+
+
+def biallelic_het(mum, dad, mum_aff, dad_aff):
+    """
+    One copy of the variant, plausible compound het unless a parent who
+    would have to be affected is hom alt
+    """
+    if mum_aff and dad_aff:
+        consistent = not (mum == HOM_ALT and dad == HOM_ALT)
+    elif mum_aff:
+        consistent = dad != HOM_ALT
+    elif dad_aff:
+        consistent = mum != HOM_ALT
+    else:
+        consistent = mum != HOM_ALT and dad != HOM_ALT
+    if consistent:
+        return COMPOUND_HET, "compatible"
+    return FAIL, "unaffected_parent_hom_alt"
+
+
+def monoallelic_het(mum, dad, mum_aff, dad_aff):
+    """
+    One copy is enough, fail if an unaffected parent carries the variant
+    """
+    if mum_aff and dad_aff:
+        consistent = not (mum == HOM_ALT and dad == HOM_ALT)
+    elif mum_aff:
+        consistent = dad == HOM_REF
+    elif dad_aff:
+        consistent = mum == HOM_REF
+    else:
+        consistent = mum == HOM_REF and dad == HOM_REF
+    if consistent:
+        return SINGLE, "compatible"
+    return FAIL, "unaffected_parent_carrier"
+
+
+def imprinted_het(mum, dad, mum_aff, dad_aff):
+    """
+    As biallelic_het, but a single candidate
+    """
+    action, reason = biallelic_het(mum, dad, mum_aff, dad_aff)
+    if action == FAIL:
+        return action, reason
+    return SINGLE, reason
+
+
+def biallelic_hom(mum, dad, mum_aff, dad_aff):
+    """
+    Both copies, each from a carrier parent. Unaffected parents may only be
+    het, a variant from one het parent is a compound het candidate
+    """
+    if mum_aff and dad_aff:
+        if mum != HOM_REF and dad != HOM_REF:
+            return SINGLE, "compatible"
+    elif mum_aff:
+        if dad == HET and mum != HOM_REF:
+            return SINGLE, "compatible"
+    elif dad_aff:
+        if mum == HET and dad != HOM_REF:
+            return SINGLE, "compatible"
+    elif mum == HET and dad == HET:
+        return SINGLE, "compatible"
+    elif (mum == HET and dad == HOM_REF) or (mum == HOM_REF and dad == HET):
+        return COMPOUND_HET, "one_het_parent"
+    return FAIL, "parents_inconsistent"
+
+
+def monoallelic_hom(mum, dad, mum_aff, dad_aff):
+    """
+    Only passes with both parents affected carriers
+    """
+    if mum_aff and dad_aff and mum != HOM_REF and dad != HOM_REF:
+        return SINGLE, "compatible"
+    return FAIL, "parents_inconsistent"
+
+
+def hemizygous_hemi(mum, dad, mum_aff, dad_aff):
+    """
+    Fail if mum is hom alt and unaffected
+    """
+    if not mum_aff and mum == HOM_ALT:
+        return FAIL, "unaffected_mum_hom_alt"
+    return SINGLE, "compatible"
+
+
+def hemizygous_het(mum, dad, mum_aff, dad_aff):
+    """
+    Fail if an unaffected parent carries the variant
+    """
+    if not mum_aff and mum != HOM_REF:
+        return FAIL, "unaffected_mum_carrier"
+    if not dad_aff and dad != HOM_REF:
+        return FAIL, "unaffected_dad_carrier"
+    return SINGLE, "compatible"
+
+
+def over_dominant_het(mum, dad, mum_aff, dad_aff):
+    """
+    Pass if de novo, or with an unaffected dad if mum is affected and het or
+    unaffected and not het
+    """
+    if mum == HOM_REF and dad == HOM_REF:
+        return SINGLE, "de_novo"
+    if not dad_aff:
+        if mum_aff and mum == HET:
+            return SINGLE, "compatible"
+        if not mum_aff and mum != HET:
+            return SINGLE, "compatible"
+    return FAIL, "parents_inconsistent"
+
+
+def mono_y_hemi(mum, dad, mum_aff, dad_aff):
+    """
+    Fail if dad is hom alt and unaffected
+    """
+    if not dad_aff and dad == HOM_ALT:
+        return FAIL, "unaffected_dad_hom_alt"
+    return SINGLE, "compatible"
+
+
+def always_fail(mum, dad, mum_aff, dad_aff):
+    return FAIL, "genotype_not_possible"
+
+
+def always_single(mum, dad, mum_aff, dad_aff):
+    return SINGLE, "compatible"
+
+
+def always_compound_het(mum, dad, mum_aff, dad_aff):
+    return COMPOUND_HET, "compatible"
+
+
+def fail_message(zygosity, mode):
+    return "{varid} failed inheritance filter for " + zygosity + " variant in " + mode + " gene"
+
+
+# (chromosome type, child genotype, gene mode): (rule, candidate mode,
+# report mode or None, fail message) with both parents. Mosaic genes with a
+# hom proband aren't screened
+BOTH_PARENT_RULES = {
+    ("autosomal", "het", "Biallelic"): (
+        biallelic_het,
+        "biallelic",
+        "biallelic",
+        fail_message("heterozygous", "biallelic"),
+    ),
+    ("autosomal", "het", "Monoallelic"): (
+        monoallelic_het,
+        "monoallelic",
+        "monoallelic",
+        fail_message("heterozygous", "monoallelic"),
+    ),
+    ("autosomal", "het", "Mosaic"): (monoallelic_het, "mosaic", "mosaic", fail_message("heterozygous", "mosaic")),
+    ("autosomal", "het", "Imprinted"): (
+        imprinted_het,
+        "imprinted",
+        "imprinted",
+        fail_message("heterozygous", "imprinted"),
+    ),
+    ("autosomal", "hom", "Biallelic"): (
+        biallelic_hom,
+        "biallelic",
+        "biallelic",
+        fail_message("homozygous", "biallelic"),
+    ),
+    ("autosomal", "hom", "Monoallelic"): (
+        monoallelic_hom,
+        "monoallelic",
+        "monoallelic",
+        fail_message("homozygous", "monoallelic"),
+    ),
+    ("autosomal", "hom", "Mosaic"): (always_fail, "mosaic", None, None),
+    ("autosomal", "hom", "Imprinted"): (
+        always_fail,
+        "imprinted",
+        "imprinted",
+        fail_message("homozygous", "imprinted"),
+    ),
+    ("allosomal", "hom", "Hemizygous"): (
+        always_fail,
+        "hemizygous",
+        "hemizygous",
+        fail_message("homozygous", "hemizygous"),
+    ),
+    ("allosomal", "hom", "X-linked dominant"): (
+        always_fail,
+        "X-linked dominant",
+        "X-linked_dominant",
+        fail_message("homozygous", "X-linked dominant"),
+    ),
+    ("allosomal", "hom", "X-linked over-dominance"): (
+        always_fail,
+        "X-linked over-dominance",
+        "X-linked_over_dominance",
+        fail_message("homozygous", "X-linked over dominance"),
+    ),
+    ("allosomal", "hom", "monoallelic_Y_hem"): (
+        always_fail,
+        "monoallelic_Y_hemizygous",
+        None,
+        "{varid}fails inheritance filters homozygous GT in {mode}",
+    ),
+    ("allosomal", "hemi", "Hemizygous"): (
+        hemizygous_hemi,
+        "hemizygous",
+        "hemizygous",
+        fail_message("hemizygous", "hemizygous"),
+    ),
+    ("allosomal", "hemi", "X-linked dominant"): (
+        hemizygous_hemi,
+        "X-linked dominant",
+        "X-linked_dominant",
+        fail_message("hemizygous", "X-linked dominant"),
+    ),
+    ("allosomal", "hemi", "X-linked over-dominance"): (
+        always_fail,
+        "X-linked over-dominance",
+        "X-linked_over_dominance",
+        fail_message("hemizygous", "X-linked over dominance"),
+    ),
+    ("allosomal", "hemi", "monoallelic_Y_hem"): (
+        mono_y_hemi,
+        "monoallelic_Y_hemizygous",
+        "monoallelic_Y_hemizygous",
+        fail_message("hemizygous", "monoallelic_Y_hemizygous"),
+    ),
+    ("allosomal", "het", "Hemizygous"): (
+        hemizygous_het,
+        "hemizygous",
+        "hemizygous",
+        fail_message("heterozygous", "hemizygous"),
+    ),
+    ("allosomal", "het", "X-linked dominant"): (
+        hemizygous_het,
+        "X-linked dominant",
+        "X-linked_dominant",
+        fail_message("heterozygous", "X-linked dominant"),
+    ),
+    ("allosomal", "het", "X-linked over-dominance"): (
+        over_dominant_het,
+        "X-linked over-dominance",
+        "X-linked_over_dominance",
+        fail_message("heterozygous", "X-linked over-dominance"),
+    ),
+    ("allosomal", "het", "monoallelic_Y_hem"): (
+        always_fail,
+        "monoallelic_Y_hemizygous",
+        None,
+        "{varid}fails inheritance filters heterozygous GT in {mode}",
+    ),
+}
+
+# (chromosome, child genotype, gene mode): (rule, candidate mode, fail
+# message) without parents. A candidate mode of None is the gene mode in
+# lower case
+INVALID_MESSAGE = "{varid} failed inheritance filter for {lower} variant, invalid genotype"
+NO_PARENT_RULES = {
+    ("autosomal", "het", "Biallelic"): (always_compound_het, "biallelic", None),
+    ("autosomal", "hom", "Biallelic"): (always_single, "biallelic", None),
+    ("autosomal", "invalid", "Biallelic"): (always_fail, "biallelic", INVALID_MESSAGE),
+    ("autosomal", "het", "Monoallelic"): (always_single, "monoallelic", None),
+    ("autosomal", "hom", "Monoallelic"): (always_single, "monoallelic", None),
+    ("autosomal", "invalid", "Monoallelic"): (always_fail, "monoallelic", INVALID_MESSAGE),
+    ("autosomal", "het", "Mosaic"): (always_single, "mosaic", None),
+    ("autosomal", "hom", "Mosaic"): (always_single, "mosaic", None),
+    ("autosomal", "invalid", "Mosaic"): (always_fail, "mosaic", INVALID_MESSAGE),
+    ("autosomal", "het", "Imprinted"): (always_single, "imprinted", None),
+    ("autosomal", "hom", "Imprinted"): (always_fail, "imprinted", fail_message("homozygous", "imprinted")),
+    ("autosomal", "invalid", "Imprinted"): (always_fail, "imprinted", INVALID_MESSAGE),
+    ("X", "het", ANY_MODE): (always_single, None, None),
+    ("X", "hom", ANY_MODE): (always_single, None, None),
+    ("X", "hemi", ANY_MODE): (always_single, None, None),
+    ("Y", "hemi", ANY_MODE): (always_single, None, None),
+    ("Y", "het", ANY_MODE): (always_fail, None, "{varid}fails inheritance filters non-hemizygous GT in {mode}"),
+}
+
+
+def report_cell(chromtype, mode, child, mum, dad, mum_aff, dad_aff):
+    """
+    Inheritance report count for a trio, as populate_inheritance_report
+    """
+    child_geno = "child_" + child
+    dad_aff_state = "dad_affected" if dad_aff else "dad_unaffected"
+    mum_aff_state = "mum_affected" if mum_aff else "mum_unaffected"
+    parent_gts = "dad_" + convert_genotype_to_gt(dad) + "_mum_" + convert_genotype_to_gt(mum)
+    return (chromtype, mode, child_geno, dad_aff_state, mum_aff_state, parent_gts)
+
+
+def build_mode_table():
+    """
+    Outcome of every combination of chromosome type, parents present, child
+    genotype, gene mode, parental genotypes and affected status. Keys are
+    (chromosome type, parents, child genotype, mode, mum genotype, dad
+    genotype, mum affected, dad affected), with None for the parental
+    values without parents
+    """
+    table = {}
+    for key, rule in BOTH_PARENT_RULES.items():
+        chromtype, child, mode = key
+        decide, candidate_mode, report_mode, message = rule
+        chroms = ["autosomal"] if chromtype == "autosomal" else ["X", "Y"]
+        for mum in PARENT_GENOTYPES:
+            for dad in PARENT_GENOTYPES:
+                for mum_aff in AFFECTED_STATES:
+                    for dad_aff in AFFECTED_STATES:
+                        action, reason = decide(mum, dad, mum_aff, dad_aff)
+                        cell = None
+                        if report_mode is not None:
+                            cell = report_cell(chromtype, report_mode, child, mum, dad, mum_aff, dad_aff)
+                        outcome = Outcome(action, candidate_mode, reason, message if action == FAIL else None, cell)
+                        for chrom in chroms:
+                            table[(chrom, "both", child, mode, mum, dad, mum_aff, dad_aff)] = outcome
+    for key, rule in NO_PARENT_RULES.items():
+        chrom, child, mode = key
+        decide, candidate_mode, message = rule
+        action, reason = decide(None, None, None, None)
+        outcome = Outcome(action, candidate_mode, reason, message if action == FAIL else None)
+        table[(chrom, "none", child, mode, None, None, None, None)] = outcome
+    return table
+
+
+def build_child_table():
+    """
+    Child genotype class (het, hom, hemi or invalid) of every combination of
+    chromosome, parents present, proband X count, genotype and whether a 0/1
+    call on X in a proband with one X looks hemizygous (high VAF or DNM).
+    None with a log message template where the variant fails
+    """
+    table = {}
+    states = [HOM_REF, HET, HOM_ALT, None]
+    for parents in ["both", "none"]:
+        for x_count in X_COUNTS:
+            for state in states:
+                for hemi_evidence in [False, True]:
+                    key = (parents, x_count, state, hemi_evidence)
+                    # autosomes, genotype from the variant
+                    if state == HET:
+                        table[("autosomal",) + key] = ("het", None)
+                    elif state == HOM_ALT:
+                        table[("autosomal",) + key] = ("hom", None)
+                    elif parents == "none":
+                        table[("autosomal",) + key] = ("invalid", None)
+                    else:
+                        table[("autosomal",) + key] = (
+                            None,
+                            "{varid} fails inheritance filters - child must be hom or het",
+                        )
+                    # X, genotype from GT
+                    if x_count == 0:
+                        table[("X",) + key] = (None, "{varid} fails invalid X chromsome count")
+                    elif state not in [HET, HOM_ALT]:
+                        table[("X",) + key] = (None, "{varid} fails invalid genotype {gt}")
+                    elif x_count == 2:
+                        table[("X",) + key] = ("het" if state == HET else "hom", None)
+                    elif state == HOM_ALT or hemi_evidence:
+                        table[("X",) + key] = ("hemi", None)
+                    else:
+                        table[("X",) + key] = (
+                            None,
+                            "{varid} fails 0/1 variant with low VAF in proband with 1 X chromosome and not DNM",
+                        )
+                    # Y
+                    if state == HET:
+                        table[("Y",) + key] = ("het", None)
+                    elif state == HOM_ALT:
+                        table[("Y",) + key] = ("hemi", None)
+                    else:
+                        table[("Y",) + key] = (None, "{varid} fails invalid genotype {gt}")
+                    table[("other",) + key] = (
+                        None,
+                        "{varid}fails inheritance allosomal inheritance filters, chromosome = {chrom}",
+                    )
+    return table
+
+
+MODE_TABLE = build_mode_table()
+CHILD_TABLE = build_child_table()
+
+
+def chrom_class(gene_chrom, chrom):
+    """
+    autosomal for genes outside X and Y, otherwise the variant's chromosome
+    X, Y or other
+    """
+    if gene_chrom not in ["X", "Y"]:
+        return "autosomal"
+    if chrom in ["X", "Y"]:
+        return chrom
+    return "other"
+
+
+def x_count_key(x_count):
+    return min(x_count, 2)
+
+
+def has_hemizygous_evidence(var):
+    """
+    A 0/1 call which looks hemizygous, VAF above 0.8 or a DNM
+    """
+    if var.ad_counts is not MISSING:
+        if var.ad_counts[1] / (var.ad_counts[0] + var.ad_counts[1]) > 0.8:
+            return True
+    return var.dnm == True
+
+
+def child_genotype_key(chromclass, var, x_count):
+    """
+    (genotype state, hemizygous evidence) of the proband's variant for the
+    child table
+    """
+    if chromclass == "autosomal":
+        return var.genotype, False
+    state = ALLOSOMAL_GT_STATES.get(var.gt)
+    hemi_evidence = False
+    if chromclass == "X" and x_count == 1 and state == HET:
+        hemi_evidence = has_hemizygous_evidence(var)
+    return state, hemi_evidence
+
+
+def lookup(chromclass, parents, child, mode, mum=None, dad=None, mum_aff=None, dad_aff=None):
+    """
+    Outcome for a gene mode, None for an unknown mode
+    """
+    outcome = MODE_TABLE.get((chromclass, parents, child, mode, mum, dad, mum_aff, dad_aff))
+    if outcome is None:
+        outcome = MODE_TABLE.get((chromclass, parents, child, ANY_MODE, mum, dad, mum_aff, dad_aff))
+    return outcome
+
+
+class TableInheritanceFilter(object):
+    """
+    Inheritance filters for the SNVs/indels in one gene, looked up in the
+    decision tables. Families with a single parent aren't screened
+    """
+
+    def __init__(self, Inheritancefilter, hgncid):
+        self.family = Inheritancefilter.family
+        self.parents = Inheritancefilter.parents
+        self.variants_per_gene = Inheritancefilter.variants_per_gene
+        self.candidate_variants = Inheritancefilter.candidate_variants
+        self.inheritance_report = Inheritancefilter.inhreport
+        self.gene = Inheritancefilter.genes[hgncid]
+        self.hgncid = hgncid
+        self.x_count = x_count_key(self.family.proband.X_count)
+        self.mum_aff = None
+        self.dad_aff = None
+        if self.parents == "both":
+            self.mum_aff = self.family.mum.affected
+            self.dad_aff = self.family.dad.affected
+
+    def inheritance_filter(self):
+        if self.parents not in ["both", "none"]:
+            return
+        variants = self.variants_per_gene[self.hgncid]
+        for v in variants.keys():
+            var = variants[v]["child"]
+            if not var.is_snv():
+                continue
+            self.filter_variant(v, var)
+
+    def filter_variant(self, varid, var):
+        chromclass = chrom_class(self.gene["chr"], var.chrom)
+        state, hemi_evidence = child_genotype_key(chromclass, var, self.x_count)
+        child, message = CHILD_TABLE[(chromclass, self.parents, self.x_count, state, hemi_evidence)]
+        if child is None:
+            logging.info(message.format(varid=varid, gt=var.gt, chrom=var.chrom))
+
+        mum = None
+        dad = None
+        if self.parents == "both":
+            mum = var.get_mum_genotype()
+            dad = var.get_dad_genotype()
+            if chromclass == "X" and dad == HET:
+                # should go to a different (mosaic) pipeline, only logged for now
+                logging.info(varid + " failed due to 0/1 paternal genotype in X: ")
+        if child is None:
+            return
+
+        for inh in self.gene["mode"]:
+            outcome = lookup(chromclass, self.parents, child, inh, mum, dad, self.mum_aff, self.dad_aff)
+            if outcome is None:
+                logging.info(varid + " unknown gene mode " + inh)
+                continue
+            self.apply(varid, var, inh, outcome)
+
+    def apply(self, varid, var, inh, outcome):
+        if outcome.report_cell is not None:
+            self.inheritance_report.increment(outcome.report_cell)
+        mode = outcome.mode
+        if mode is None:
+            mode = inh.lower()
+        if outcome.action == SINGLE:
+            add_single_var_to_candidates(varid, var, self.hgncid, mode, self.candidate_variants)
+        elif outcome.action == COMPOUND_HET:
+            add_compound_het_to_candidates(varid, var, self.hgncid, mode, self.candidate_variants)
+        elif outcome.message is not None:
+            logging.info(outcome.message.format(varid=varid, mode=inh, lower=mode))
+
+
+class BatchInheritanceFilter(object):
+    """
+    Inheritance filters for all of a family's SNVs/indels in known genes in
+    one pass. Each variant is reduced to the key its outcome depends on (gene
+    modes, chromosome class, child genotype and trio genotype), each distinct
+    key is classified once and its outcomes applied to every variant sharing
+    it, with the inheritance report counts added once per key. Gives the same
+    candidates, report and log as TableInheritanceFilter on each gene
+    """
+
+    def __init__(self, Inheritancefilter):
+        self.family = Inheritancefilter.family
+        self.parents = Inheritancefilter.parents
+        self.variants_per_gene = Inheritancefilter.variants_per_gene
+        self.candidate_variants = Inheritancefilter.candidate_variants
+        self.inheritance_report = Inheritancefilter.inhreport
+        self.genes = Inheritancefilter.genes
+        self.x_count = x_count_key(self.family.proband.X_count)
+        self.mum_aff = None
+        self.dad_aff = None
+        if self.parents == "both":
+            self.mum_aff = self.family.mum.affected
+            self.dad_aff = self.family.dad.affected
+
+    def inheritance_filter(self):
+        if self.parents not in ["both", "none"]:
+            return
+        classes = {}
+        counts = {}
+        for hgncid in self.variants_per_gene.keys():
+            gene = self.genes.get(hgncid)
+            if gene is None:
+                continue
+            modes = tuple(gene["mode"])
+            variants = self.variants_per_gene[hgncid]
+            for v in variants.keys():
+                var = variants[v]["child"]
+                if not var.is_snv():
+                    continue
+                chromclass = chrom_class(gene["chr"], var.chrom)
+                state, hemi_evidence = child_genotype_key(chromclass, var, self.x_count)
+                trio = None
+                if self.parents == "both":
+                    trio = var.trio_code
+                key = (modes, chromclass, state, hemi_evidence, trio)
+                classification = classes.get(key)
+                if classification is None:
+                    classification = self.classify(key)
+                    classes[key] = classification
+                    counts[key] = 0
+                counts[key] += 1
+                self.apply(hgncid, v, var, classification)
+        self.add_report_counts(classes, counts)
+
+    def classify(self, key):
+        """
+        (child class, child failure message, paternal 0/1 in X, outcomes) for
+        a key, outcomes as (gene mode, outcome, candidate mode) for each mode
+        """
+        modes, chromclass, state, hemi_evidence, trio = key
+        child, message = CHILD_TABLE[(chromclass, self.parents, self.x_count, state, hemi_evidence)]
+        mum = None
+        dad = None
+        if trio is not None:
+            mum = mum_state(trio)
+            dad = dad_state(trio)
+        paternal_het_x = chromclass == "X" and dad == HET
+        outcomes = []
+        if child is not None:
+            for inh in modes:
+                outcome = lookup(chromclass, self.parents, child, inh, mum, dad, self.mum_aff, self.dad_aff)
+                mode = None
+                if outcome is not None:
+                    mode = outcome.mode
+                    if mode is None:
+                        mode = inh.lower()
+                outcomes.append((inh, outcome, mode))
+        return child, message, paternal_het_x, outcomes
+
+    def apply(self, hgncid, varid, var, classification):
+        child, message, paternal_het_x, outcomes = classification
+        if child is None:
+            logging.info(message.format(varid=varid, gt=var.gt, chrom=var.chrom))
+        if paternal_het_x:
+            # should go to a different (mosaic) pipeline, only logged for now
+            logging.info(varid + " failed due to 0/1 paternal genotype in X: ")
+        for inh, outcome, mode in outcomes:
+            if outcome is None:
+                logging.info(varid + " unknown gene mode " + inh)
+            elif outcome.action == SINGLE:
+                add_single_var_to_candidates(varid, var, hgncid, mode, self.candidate_variants)
+            elif outcome.action == COMPOUND_HET:
+                add_compound_het_to_candidates(varid, var, hgncid, mode, self.candidate_variants)
+            elif outcome.message is not None:
+                logging.info(outcome.message.format(varid=varid, mode=inh, lower=mode))
+
+    def add_report_counts(self, classes, counts):
+        for key in classes.keys():
+            for inh, outcome, mode in classes[key][3]:
+                if outcome is not None and outcome.report_cell is not None:
+                    self.inheritance_report.increment(outcome.report_cell, counts[key])
@@ -23,15 +23,21 @@ THE SOFTWARE.
 
 import logging
 
+from variants.variant import MISSING
+from filtering.rules import RuleSet
+
 
 class PostInheritanceFiltering(object):
     """
-    Post-inheritance filters
+    Post-inheritance filters, with thresholds from a RuleSet
     """
 
-    def __init__(self, candidate_variants, family):
+    def __init__(self, candidate_variants, family, rules=None):
         self.candidate_variants = candidate_variants
         self.family = family
+        if rules is None:
+            rules = RuleSet()
+        self.rules = rules
 
     def postinheritance_filter(self):
         """
@@ -48,20 +54,20 @@ class PostInheritanceFiltering(object):
         for v in list(self.candidate_variants["single_variants"].keys()):
             variant = self.candidate_variants["single_variants"][v]
             if "biallelic" not in self.candidate_variants["single_variants"][v]["mode"]:
-                ddd_af = self.candidate_variants["single_variants"][v]["variant"].ddd_af
-                max_af = self.candidate_variants["single_variants"][v]["variant"].max_af
-                if ddd_af == ".":
-                    ddd_af = "0"
-                if max_af == ".":
-                    max_af = "0"
-                maximum_af = max(float(ddd_af), float(max_af))
+                ddd_af = self.candidate_variants["single_variants"][v]["variant"].ddd_af_value
+                max_af = self.candidate_variants["single_variants"][v]["variant"].max_af_value
+                if ddd_af is MISSING:
+                    ddd_af = 0.0
+                if max_af is MISSING:
+                    max_af = 0.0
+                maximum_af = max(ddd_af, max_af)
 
-                if self.family.has_both_parents() and maximum_af >= 0.0005:
+                if self.family.has_both_parents() and maximum_af >= self.rules.max_af_with_parents:
                     del self.candidate_variants["single_variants"][v]
                     logging.info(
                         v + " failed post-inhertance MAF filter for family " "with parents, max AF = " + str(maximum_af)
                     )
-                elif not self.family.has_both_parents() and maximum_af >= 0.0001:
+                elif not self.family.has_both_parents() and maximum_af >= self.rules.max_af_without_parents:
                     del self.candidate_variants["single_variants"][v]
                     logging.info(
                         v + " failed post-inhertance MAF filter for family "
@@ -74,7 +80,7 @@ class PostInheritanceFiltering(object):
         """
         for v in list(self.candidate_variants["single_variants"].keys()):
             if self.candidate_variants["single_variants"][v]["mode"] == "Monoallelic":
-                if int(self.candidate_variants["single_variants"][v]["variant"].AC_het) > 4:
+                if self.candidate_variants["single_variants"][v]["variant"].AC_het_count > self.rules.max_ac_het:
                     del self.candidate_variants["single_variants"][v]
                     logging.info(
                         v + " failed post-inhertance AC_het filter for "
@@ -84,17 +90,18 @@ class PostInheritanceFiltering(object):
                 self.candidate_variants["single_variants"][v]["mode"] == "Hemizygous"
                 and self.candidate_variants["single_variants"][v]["sex"] == "XY"
             ):
-                if int(self.candidate_variants["single_variants"][v]["variant"].AC_hemi) > 0:
+                if self.candidate_variants["single_variants"][v]["variant"].AC_hemi_count > self.rules.max_ac_hemi:
                     del self.candidate_variants["single_variants"][v]
                     logging.info(
                         v + " failed post-inhertance AC_hemi filter for "
                         "monoallelic genes " + self.candidate_variants["single_variants"][v]["variant"].AC_hemi
                     )
             if self.candidate_variants["single_variants"][v]["mode"] == "X-linked dominant":
-                AC_total = int(self.candidate_variants["single_variants"][v]["variant"].AC_het) + int(
-                    self.candidate_variants["single_variants"][v]["variant"].AC_hemi
+                AC_total = (
+                    self.candidate_variants["single_variants"][v]["variant"].AC_het_count
+                    + self.candidate_variants["single_variants"][v]["variant"].AC_hemi_count
                 )
-                if AC_total > 4:
+                if AC_total > self.rules.max_ac_x_linked_dominant:
                     del self.candidate_variants["single_variants"][v]
                     logging.info(
                         v + " failed post-inhertance AC_hemi filter for "
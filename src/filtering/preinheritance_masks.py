@@ -0,0 +1,163 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import logging
+
+from variants.consequences import consequence_mask
+from variants.snv import genotype_from_gt
+from variants.variant import FLOAT_FIELDS, INT_FIELDS
+from variants.trio_genotype import encode_trio, trio_string
+from filtering.rules import RuleSet, STAGES, TRIO_RULES
+
+
+class RowView(object):
+    """
+    The attributes of a table row which the pre-inheritance rules read from
+    a variant, so that the rules' predicates can be applied to rows without
+    creating variant objects
+    """
+
+    __slots__ = ["chrom", "consequence", "consequence_mask", "dnm", "trio_code"] + [
+        field + suffix for field in FLOAT_FIELDS + INT_FIELDS for suffix in ["", "_value"]
+    ]
+
+    @property
+    def triogenotype(self):
+        if self.trio_code is None:
+            return None
+        return trio_string(self.trio_code)
+
+
+class PreInheritanceMasks(object):
+    """
+    The pre-inheritance rules of a RuleSet applied to the SNV rows of a
+    proband's VariantTable, giving the same result for each SNV as
+    PreInheritanceFiltering. Each column is decoded once per distinct value,
+    then each row is checked in turn with the rules' predicates, CNVs never
+    fail. The rules needing the parents' genotypes are applied once the
+    parents are loaded. A row failing more than one rule is counted and
+    logged for the first in the rule order, with the same message as
+    PreInheritanceFiltering logs
+    """
+
+    def __init__(self, table, rules=None):
+        self.table = table
+        if rules is None:
+            rules = RuleSet()
+        self.rules = rules
+        self.counts = {}
+        self.site_rules = []
+        self.trio_rules = []
+        for stage in STAGES:
+            for rule in rules.stages[stage]:
+                self.counts[rule.name] = 0
+                if rule.name in TRIO_RULES:
+                    self.trio_rules.append(rule)
+                else:
+                    self.site_rules.append(rule)
+        self.cnv = table.is_cnv()
+        self.rows = self.row_views()
+
+    def row_views(self):
+        """
+        A RowView of each row, None for CNVs
+        """
+        chroms = self.table.chroms()
+        consequences = self.table.strings("consequence")
+        masks = self.table.column("consequence").decode(consequence_mask)
+        dnm = self.table.dnm()
+        strings = {}
+        numbers = {}
+        for field in FLOAT_FIELDS:
+            strings[field] = self.table.strings(field)
+            numbers[field] = self.table.numbers(field, float)
+        for field in INT_FIELDS:
+            strings[field] = self.table.strings(field)
+            numbers[field] = self.table.numbers(field, int)
+        rows = []
+        for i in range(self.table.nrows):
+            if self.cnv[i]:
+                rows.append(None)
+                continue
+            row = RowView()
+            row.chrom = chroms[i]
+            row.consequence = consequences[i]
+            row.consequence_mask = masks[i]
+            row.dnm = dnm[i]
+            row.trio_code = None
+            for field in strings.keys():
+                setattr(row, field, strings[field][i])
+                setattr(row, field + "_value", numbers[field][i])
+            rows.append(row)
+        return rows
+
+    def site_mask(self):
+        """
+        Rows passing the rules which don't need the parents, as a bytearray
+        """
+        return self.combine(bytearray([1]) * self.table.nrows, self.site_rules)
+
+    def trio_mask(self, mask, family):
+        """
+        Rows of mask also passing the rules which need the parent genotype
+        columns
+        """
+        if family.has_both_parents():
+            child = self.table.column("gt").decode(child_genotype)
+            mum = self.table.mum_genotype
+            dad = self.table.dad_genotype
+            for i in range(self.table.nrows):
+                if mask[i] and self.rows[i] is not None and child[i] is not None:
+                    self.rows[i].trio_code = encode_trio(child[i], mum[i], dad[i])
+        return self.combine(mask, self.trio_rules)
+
+    def combine(self, mask, rules):
+        keep = bytearray(mask)
+        for i in range(self.table.nrows):
+            row = self.rows[i]
+            if not keep[i] or row is None:
+                continue
+            for rule in rules:
+                if rule.predicate("", row) is not None:
+                    keep[i] = 0
+                    self.counts[rule.name] += 1
+                    # the variant id is only built for rows which fail
+                    logging.info(rule.predicate(self.table.varid(i), row))
+                    break
+        return keep
+
+    def log_counts(self, filename):
+        logging.info(
+            "Pre-inheritance filters failed in " + filename + ": " + str(self.counts) + " (variant objects not created)"
+        )
+
+
+def child_genotype(gt):
+    """
+    Genotype HOM_REF/HET/HOM_ALT as on the proband's SNV, None if it can't
+    be determined
+    """
+    try:
+        return genotype_from_gt(gt)
+    except ValueError:
+        return None
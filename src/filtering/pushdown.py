@@ -0,0 +1,174 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import logging
+
+from variants.consequences import consequence_mask
+from filtering.rules import RuleSet
+
+SPLICE_AI_SCORES = ["SpliceAI_pred_DS_AG", "SpliceAI_pred_DS_AL", "SpliceAI_pred_DS_DG", "SpliceAI_pred_DS_DL"]
+
+
+class PreInheritancePushdown(object):
+    """
+    Pre-inheritance filters applied to the proband VCF while it is loaded,
+    so that rows which would fail PreInheritanceFiltering are never turned
+    into variant objects. Only rows which would certainly fail are excluded,
+    anything which can't be evaluated is kept and PreInheritanceFiltering
+    remains the authoritative check. CNVs are never excluded.
+
+    The thresholds come from a RuleSet. Excluded rows are counted for the
+    first filter they fail, in the built-in rule order
+    """
+
+    REASONS = ["low_gq", "high_ddd_af", "no_functional_consequence", "low_revel"]
+
+    # fields needed to evaluate the filters
+    INFO_TAGS = ["Consequence", "DDD_AF", "REVEL", "DNM", "DNG"] + SPLICE_AI_SCORES
+    FORMAT_TAGS = ["GQ"]
+
+    def __init__(self, rules=None):
+        if rules is None:
+            rules = RuleSet()
+        self.rules = rules
+        self.counts = {}
+        for reason in self.REASONS:
+            self.counts[reason] = 0
+
+    def exclude(self, chrom, alt, values):
+        """
+        Check a query row, values holds the INFO_TAGS and FORMAT_TAGS as
+        they would be set on the variant. Returns True if the row is
+        excluded
+        """
+        reason = self.reason(chrom, alt, values)
+        if reason is None:
+            return False
+        self.counts[reason] += 1
+        return True
+
+    def reason(self, chrom, alt, values):
+        """
+        The first pre-inheritance filter the row fails, or None
+        """
+        if alt in ["<DEL>", "<DUP>", "*"]:
+            return None
+        if chrom.startswith("Chr") or chrom.startswith("chr"):
+            chrom = chrom[3:]
+
+        try:
+            if int(values["GQ"]) < self.rules.min_gq and chrom not in ["X", "Y"]:
+                return "low_gq"
+            ddd_af = 0 if values["DDD_AF"] == "." else float(values["DDD_AF"])
+            if ddd_af > self.rules.max_ddd_af:
+                return "high_ddd_af"
+        except ValueError:
+            return None
+
+        dnm = not values["DNM"] == "." or not values["DNG"] == "."
+        cqs = consequence_mask(values["Consequence"])
+        if not (dnm and self.is_high_spliceAI(cqs, values)):
+            if not cqs & self.rules.functional_mask:
+                return "no_functional_consequence"
+
+        if not dnm and cqs & self.rules.missense_mask and values["REVEL"] != ".":
+            try:
+                if float(values["REVEL"]) < self.rules.min_revel:
+                    return "low_revel"
+            except ValueError:
+                return None
+
+        return None
+
+    def is_high_spliceAI(self, cqs, values):
+        if not cqs & self.rules.splice_ai_mask:
+            return False
+        for tag in SPLICE_AI_SCORES:
+            try:
+                if values[tag] != "." and float(values[tag]) >= self.rules.splice_ai_threshold:
+                    return True
+            except ValueError:
+                # can't tell, keep the variant
+                return True
+        return False
+
+    def bcftools_expression(self, info_types, format_types):
+        """
+        The filters as a bcftools exclude expression for a VCF with the given
+        header definitions. This is more conservative than reason(): rows
+        with a spliceAI rescue consequence are never excluded for lacking a
+        functional consequence, and thresholds are only compared for fields
+        with a numeric header type, the rest are left to reason()
+        """
+        dnm_terms = []
+        for tag in ["DNM", "DNG"]:
+            if tag not in info_types:
+                continue
+            if info_types[tag][1] == "Flag":
+                dnm_terms.append("INFO/" + tag + "=0")
+            else:
+                dnm_terms.append("INFO/" + tag + '="."')
+        not_dnm = (" && ").join(dnm_terms)
+
+        terms = []
+        if is_numeric(format_types, "GQ"):
+            terms.append("(FORMAT/GQ[0]<" + str(self.rules.min_gq) + ' && CHROM!~"^([Cc]hr)?[XY]$")')
+        if is_numeric(info_types, "DDD_AF"):
+            terms.append("INFO/DDD_AF>" + str(self.rules.max_ddd_af))
+        if "Consequence" in info_types:
+            terms.append(
+                '(INFO/Consequence!~"'
+                + consequence_regex(self.rules.functional_consequences)
+                + '" && INFO/Consequence!~"'
+                + consequence_regex(self.rules.splice_ai_consequences)
+                + '")'
+            )
+            if is_numeric(info_types, "REVEL"):
+                revel = "INFO/REVEL<" + str(self.rules.min_revel) + ' && INFO/Consequence~"missense_variant"'
+                if not_dnm:
+                    revel += " && " + not_dnm
+                terms.append("(" + revel + ")")
+
+        if not terms:
+            return None
+        return '(ALT!="<DEL>" && ALT!="<DUP>") && (' + (" || ").join(terms) + ")"
+
+    def log_counts(self, filename):
+        counts = []
+        for reason in self.REASONS:
+            counts.append(reason + "=" + str(self.counts[reason]))
+        logging.info("Excluded while loading " + filename + ": " + (", ").join(counts))
+
+
+def is_numeric(types, tag):
+    """
+    Whether a header defines the tag as a Float or Integer
+    """
+    return tag in types and types[tag][1] in ["Float", "Integer"]
+
+
+def consequence_regex(consequences):
+    """
+    Regex matching any of the consequences as a whole & separated term
+    """
+    return "(^|&)(" + ("|").join(consequences) + ")(&|$)"
@@ -0,0 +1,398 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import copy
+import json
+import logging
+
+from variants.variant import MISSING
+from variants.trio_genotype import not_inherited
+from variants.consequences import terms_mask
+
+# consequences a variant needs at least one of to be kept
+FUNCTIONAL_CONSEQUENCES = [
+    "frameshift_variant",
+    "missense_variant",
+    "splice_donor_variant",
+    "splice_acceptor_variant",
+    "start_lost",
+    "stop_gained",
+    "protein_altering_variant",
+    "transcript_ablation",
+    "transcript_amplification",
+    "inframe_insertion",
+    "inframe_deletion",
+    "stop_lost",
+]
+# DNMs with these consequences are kept if they have a high spliceAI score
+SPLICE_AI_CONSEQUENCES = [
+    "synonymous_variant",
+    "3_prime_UTR_variant",
+    "5_prime_UTR_variant",
+]
+SPLICE_AI_THRESHOLD = 0.8
+MIN_GQ = 40
+MAX_DDD_AF = 0.005
+MIN_REVEL = 0.4
+# stricter allele frequencies on X
+MAX_X_AF = 0.000001
+MAX_X_DDD_FATHER_AF = 0
+# post-inheritance allele frequencies and counts for non-biallelic variants
+MAX_AF_WITH_PARENTS = 0.0005
+MAX_AF_WITHOUT_PARENTS = 0.0001
+MAX_AC_HET = 4
+MAX_AC_HEMI = 0
+MAX_AC_X_LINKED_DOMINANT = 4
+
+# the built-in rule set. A rules file has the same layout and any values it
+# gives replace these. Pre-inheritance rules are applied in two stages, the
+# site rules then the variant rules, each rule has a relative cost
+DEFAULT_RULES = {
+    "preinheritance": {
+        "low_gq": {"stage": "site", "cost": 1, "min_gq": MIN_GQ},
+        "high_ddd_af": {"stage": "site", "cost": 1, "max_ddd_af": MAX_DDD_AF},
+        "no_functional_consequence": {
+            "stage": "site",
+            "cost": 1,
+            "consequences": FUNCTIONAL_CONSEQUENCES,
+            "splice_ai_consequences": SPLICE_AI_CONSEQUENCES,
+            "splice_ai_threshold": SPLICE_AI_THRESHOLD,
+        },
+        "low_revel": {"stage": "variant", "cost": 1, "min_revel": MIN_REVEL},
+        "failed_dnm": {"stage": "variant", "cost": 1},
+        "x_allele_frequency": {
+            "stage": "variant",
+            "cost": 1,
+            "max_af": MAX_X_AF,
+            "max_ddd_father_af": MAX_X_DDD_FATHER_AF,
+        },
+    },
+    "postinheritance": {
+        "max_af_with_parents": MAX_AF_WITH_PARENTS,
+        "max_af_without_parents": MAX_AF_WITHOUT_PARENTS,
+        "max_ac_het": MAX_AC_HET,
+        "max_ac_hemi": MAX_AC_HEMI,
+        "max_ac_x_linked_dominant": MAX_AC_X_LINKED_DOMINANT,
+    },
+    # reorder the rules in each stage from their observed rejection rates,
+    # off by default so that each failing variant logs the reason of the
+    # first rule in the order above
+    "adaptive_order": False,
+}
+STAGES = ["site", "variant"]
+# rules reading the trio genotype, which need the parents' genotypes
+TRIO_RULES = ["failed_dnm"]
+
+# number of variants between updating the counts, and reordering the rules,
+# of a stage
+REORDER_INTERVAL = 1000
+
+
+class Rule(object):
+    """
+    A compiled pre-inheritance rule: predicate(varid, var) returns the log
+    message for a variant failing the rule, otherwise None
+    """
+
+    def __init__(self, name, stage, cost, predicate, index):
+        self.name = name
+        self.stage = stage
+        self.cost = cost
+        self.predicate = predicate
+        # position in the rules as given
+        self.index = index
+        self.evaluated = 0
+        self.rejected = 0
+        # rejections already added to the evaluated counts of later rules
+        self.counted = 0
+        # counts of the families before the current one
+        self.total_evaluated = 0
+        self.total_rejected = 0
+
+    def priority(self):
+        """
+        Smoothed rejection rate per unit cost, higher runs first
+        """
+        return (self.rejected + 1) / ((self.evaluated + 2) * self.cost)
+
+
+class RuleSet(object):
+    """
+    Filter thresholds and pre-inheritance rules, from the built-in rules
+    with any values replaced from a rules file. The pre-inheritance rules
+    are compiled into predicates. A variant passes a stage if it passes
+    every rule in the stage, so the order they are evaluated in only changes
+    which failure is logged. With adaptive_order the rules of each stage are
+    reordered so that cheap rules rejecting the most variants run first.
+    start_family restores the given order and clears the counts used for
+    reordering, so a family's order only depends on its own variants
+    """
+
+    def __init__(self, config=None):
+        self.config = copy.deepcopy(DEFAULT_RULES)
+        if config is not None:
+            merge_rules(self.config, config, [])
+        pre = self.config["preinheritance"]
+        self.min_gq = pre["low_gq"]["min_gq"]
+        self.max_ddd_af = pre["high_ddd_af"]["max_ddd_af"]
+        self.functional_consequences = pre["no_functional_consequence"]["consequences"]
+        self.splice_ai_consequences = pre["no_functional_consequence"]["splice_ai_consequences"]
+        self.splice_ai_threshold = pre["no_functional_consequence"]["splice_ai_threshold"]
+        self.functional_mask = terms_mask(self.functional_consequences)
+        self.splice_ai_mask = terms_mask(self.splice_ai_consequences)
+        self.missense_mask = terms_mask(["missense_variant"])
+        self.min_revel = pre["low_revel"]["min_revel"]
+        self.max_x_af = pre["x_allele_frequency"]["max_af"]
+        self.max_x_ddd_father_af = pre["x_allele_frequency"]["max_ddd_father_af"]
+        post = self.config["postinheritance"]
+        self.max_af_with_parents = post["max_af_with_parents"]
+        self.max_af_without_parents = post["max_af_without_parents"]
+        self.max_ac_het = post["max_ac_het"]
+        self.max_ac_hemi = post["max_ac_hemi"]
+        self.max_ac_x_linked_dominant = post["max_ac_x_linked_dominant"]
+        self.adaptive_order = self.config["adaptive_order"]
+
+        self.stages = {}
+        self.seen = {}
+        for stage in STAGES:
+            self.stages[stage] = []
+            self.seen[stage] = 0
+        for name in pre:
+            if pre[name]["stage"] not in STAGES:
+                raise ValueError("Unknown stage " + str(pre[name]["stage"]) + " for rule " + name)
+            if not pre[name]["cost"] > 0:
+                raise ValueError("Cost of rule " + name + " must be positive")
+            predicate = getattr(self, "compile_" + name)()
+            rule = Rule(name, pre[name]["stage"], pre[name]["cost"], predicate, len(self.stages[pre[name]["stage"]]))
+            self.stages[pre[name]["stage"]].append(rule)
+        self.checks = {}
+        for stage in STAGES:
+            self.checks[stage] = self.compile_stage(stage)
+
+    def failure(self, stage, varid, var):
+        """
+        Log message for the first rule of the stage the variant fails, or
+        None if it passes them all
+        """
+        return self.checks[stage](varid, var)
+
+    def compile_stage(self, stage):
+        """
+        Function checking a variant against the rules of a stage, in their
+        current order
+        """
+        rules = self.stages[stage]
+        seen = self.seen
+
+        def check(varid, var):
+            message = None
+            for rule in rules:
+                message = rule.predicate(varid, var)
+                if message is not None:
+                    rule.rejected += 1
+                    break
+            seen[stage] += 1
+            if seen[stage] == REORDER_INTERVAL:
+                self.update_counts(stage)
+                if self.adaptive_order:
+                    # sorted in place, so check sees the new order
+                    rules.sort(key=lambda rule: rule.priority(), reverse=True)
+            return message
+
+        return check
+
+    def update_counts(self, stage):
+        """
+        Add the variants seen since the last update to the evaluated counts.
+        Each rule evaluated those not rejected by the rules before it
+        """
+        remaining = self.seen[stage]
+        for rule in self.stages[stage]:
+            rule.evaluated += remaining
+            remaining -= rule.rejected - rule.counted
+            rule.counted = rule.rejected
+        self.seen[stage] = 0
+
+    def start_family(self):
+        """
+        Move the counts of the previous family to the run totals and put the
+        rules back in their given order
+        """
+        for stage in STAGES:
+            self.update_counts(stage)
+            for rule in self.stages[stage]:
+                rule.total_evaluated += rule.evaluated
+                rule.total_rejected += rule.rejected
+                rule.evaluated = 0
+                rule.rejected = 0
+                rule.counted = 0
+            # sorted in place, so the stage's check sees the new order
+            self.stages[stage].sort(key=lambda rule: rule.index)
+
+    def order(self, stage):
+        return [rule.name for rule in self.stages[stage]]
+
+    def log_counts(self):
+        for stage in STAGES:
+            self.update_counts(stage)
+            counts = []
+            for rule in self.stages[stage]:
+                rejected = rule.total_rejected + rule.rejected
+                evaluated = rule.total_evaluated + rule.evaluated
+                counts.append(rule.name + "=" + str(rejected) + "/" + str(evaluated))
+            logging.info("Pre-inheritance " + stage + " rules rejected/evaluated: " + (", ").join(counts))
+
+    def compile_low_gq(self):
+        min_gq = self.min_gq
+
+        def low_gq(v, var):
+            # fail if child GQ < 40, outside X and Y
+            gq = var.gq_value
+            if gq is not MISSING and gq < min_gq and var.chrom not in ["X", "Y"]:
+                return v + " failed low GQ: " + var.gq
+            return None
+
+        return low_gq
+
+    def compile_high_ddd_af(self):
+        max_ddd_af = self.max_ddd_af
+
+        def high_ddd_af(v, var):
+            # This is introduced in b38v3 as 22 missing patients are introduced and were not used to calculate DDD
+            # allele frequencies, resulting in variants being assigned a "." for DDD_AF. Those variants are assigned
+            # a ddd_af of 0.
+            ddd_af = var.ddd_af_value
+            ddd_af = 0 if ddd_af is MISSING else ddd_af
+            # fail if DDD_AF > 0.005 (gnomAD AF variants above this threshold
+            # are not loaded)
+            if ddd_af > max_ddd_af:
+                return v + " failed high DDD AF: " + var.ddd_af
+            return None
+
+        return high_ddd_af
+
+    def compile_no_functional_consequence(self):
+        functional_mask = self.functional_mask
+        is_high_spliceAI_DNM = self.is_high_spliceAI_DNM
+
+        def no_functional_consequence(v, var):
+            # If the variant is not a DNM with high spliceAI score, it has to have a functional consequence to be kept
+            if not var.consequence_mask & functional_mask and not is_high_spliceAI_DNM(var):
+                return v + " failed, no functional consequences: " + var.consequence
+            return None
+
+        return no_functional_consequence
+
+    def compile_low_revel(self):
+        missense_mask = self.missense_mask
+        min_revel = self.min_revel
+
+        def low_revel(v, var):
+            # Remove missense variants with REVEL < 0.4 unless DNM
+            if not var.dnm and var.consequence_mask & missense_mask:
+                revel = var.revel_value
+                if revel is not MISSING and revel < min_revel:
+                    return v + " failed REVEL filter: " + str(revel)
+            return None
+
+        return low_revel
+
+    def compile_failed_dnm(self):
+        def failed_dnm(v, var):
+            # Remove DNMs that don't pass filters
+            if var.trio_code is not None and not_inherited(var.trio_code) and var.dnm == False:
+                return v + " triogenotype = " + var.triogenotype + " and failed DNM filter"
+            return None
+
+        return failed_dnm
+
+    def compile_x_allele_frequency(self):
+        max_x_af = self.max_x_af
+        max_x_ddd_father_af = self.max_x_ddd_father_af
+
+        def x_allele_frequency(v, var):
+            # Variants in X have more stringent allele frequencies - fail if
+            # gnomad > 0.000001 or DDD unaffected father > 0
+            if var.chrom != "X":
+                return None
+            max_af = var.max_af_value
+            if max_af is MISSING:
+                max_af = 0
+            ddd_father_af = var.ddd_father_af_value
+            if ddd_father_af is MISSING:
+                ddd_father_af = 0
+            if max_af > max_x_af:
+                return v + " failed X chromosome allele frequency: gnomad AF = " + var.max_af
+            elif ddd_father_af > max_x_ddd_father_af:
+                return v + " failed X chromosome allele frequency: DDD unaffected father AF = " + var.ddd_father_af
+            return None
+
+        return x_allele_frequency
+
+    def is_high_spliceAI_DNM(self, var):
+        """
+        Keep UTR and synonymous DNM variants if they have a high spliceAI score
+        """
+        if not var.dnm:
+            return False
+
+        if var.consequence_mask & self.splice_ai_mask:
+            scores = [
+                var.SpliceAI_pred_DS_AG_value,
+                var.SpliceAI_pred_DS_AL_value,
+                var.SpliceAI_pred_DS_DG_value,
+                var.SpliceAI_pred_DS_DL_value,
+            ]
+            for score in scores:
+                if score is not MISSING and score >= self.splice_ai_threshold:
+                    return True
+
+        return False
+
+
+def merge_rules(rules, config, path):
+    """
+    Replace values in rules with those in config, which must only have keys
+    found in rules
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Rules " + (".").join(path) + " should be an object")
+    for key in config:
+        if key not in rules:
+            raise ValueError("Unknown rule setting " + (".").join(path + [key]))
+        if isinstance(rules[key], dict):
+            merge_rules(rules[key], config[key], path + [key])
+        else:
+            rules[key] = config[key]
+
+
+def load_rules(rulesfile=None):
+    """
+    RuleSet from a JSON rules file, or the built-in rules
+    """
+    if rulesfile is None:
+        return RuleSet()
+    with open(rulesfile) as f:
+        config = json.load(f)
+    logging.info("Filter rules loaded from " + rulesfile)
+    return RuleSet(config)
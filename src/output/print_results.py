@@ -23,6 +23,9 @@ THE SOFTWARE.
 
 import json
 from utils import params
+from filtering.inheritance_report import CELLS, merge_reports
+from variants.variant import MISSING
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT, NA, DEL, DUP, child_state, mum_state, dad_state, not_inherited
 
 
 def create_output(families, variants, inheritance_reports, outdir):
@@ -36,10 +39,12 @@ def create_output(families, variants, inheritance_reports, outdir):
     if len(families.keys()) > 1:
         outfile = outdir + "/" + "clinical_filter.tsv"
         inhreportfile = outdir + "/" + "clinical_filter_inheritance_report.txt"
+        inhsummaryfile = outdir + "/" + "clinical_filter_inheritance_summary.tsv"
     else:
         proband = families[list(families.keys())[0]].proband.person_id
         outfile = outdir + "/" + proband + "_clinical_filter.tsv"
         inhreportfile = outdir + "/" + proband + "_clinical_filter_inheritance_report.txt"
+        inhsummaryfile = outdir + "/" + proband + "_clinical_filter_inheritance_summary.tsv"
 
     header = [
         "family_id",
@@ -117,10 +122,11 @@ def create_output(families, variants, inheritance_reports, outdir):
 
         results[fam] = create_output_data(fam, families, variants, mnvs, variants_in_cis, phased_varids)
 
-        inhreports[fam] = inheritance_reports[fam].__dict__
+        inhreports[fam] = {"inheritance_report": inheritance_reports[fam].as_dict()}
 
     print_output(results, header, outfile)
     print_inh_reports(inhreports, inhreportfile)
+    print_inh_summary([inheritance_reports[fam] for fam in variants.keys()], inhsummaryfile)
 
 
 def print_output(results, header, outfile):
@@ -208,6 +214,34 @@ def print_inh_reports(inhreports, inhreportfile):
         o.write("\n")
 
 
+def print_inh_summary(reports, inhsummaryfile):
+    """
+    Cohort inheritance report, for each count the total over all families
+    and the number of families with at least one variant
+    """
+    cohort = merge_reports(reports)
+    header = [
+        "chrom_type",
+        "mode",
+        "child_genotype",
+        "dad_affected",
+        "mum_affected",
+        "parent_genotypes",
+        "variants",
+        "families",
+    ]
+    with open(inhsummaryfile, "w") as o:
+        o.write(("\t").join(header))
+        o.write("\n")
+        for cell in CELLS:
+            families = 0
+            for report in reports:
+                if report.count(cell) > 0:
+                    families += 1
+            o.write(("\t").join(list(cell) + [str(cohort.count(cell)), str(families)]))
+            o.write("\n")
+
+
 def create_output_data(fam, families, variants, mnvs, variants_in_cis, phased_varids):
     # get family specific info
     results = {}
@@ -463,7 +497,7 @@ def decipher_ready_genotype(var):
         str: decipher ready genotype information
     """
 
-    triogenotype = var["variant"].triogenotype
+    trio_code = var["variant"].trio_code
     chrom = var["variant"].chrom
     sex = var["variant"].sex
 
@@ -471,7 +505,7 @@ def decipher_ready_genotype(var):
     decipher_genotype = params.DECIPHER_GENOTYPE_NA
 
     # Homozygous variants
-    if triogenotype.startswith("2"):
+    if child_state(trio_code) == HOM_ALT:
         # For male with X chromosome variant, we might need to check on PAR region. See with Caroline.
         if (chrom == "X") and (sex == "XY"):
             decipher_genotype = params.DECIPHER_GENOTYPE_NA
@@ -479,7 +513,7 @@ def decipher_ready_genotype(var):
             decipher_genotype = params.DECIPHER_GENOTYPE_HOMOZYGOUS
 
     # Heterozygous variants
-    if triogenotype.startswith("1"):
+    if child_state(trio_code) == HET:
         # For male with X chromosome variant, we might need to check on PAR region. See with Caroline.
         if (chrom == "X") and (sex == "XY"):
             decipher_genotype = params.DECIPHER_GENOTYPE_NA
@@ -503,19 +537,19 @@ def decipher_ready_inheritance(var):
         str: decipher ready inheritance information
     """
 
-    triogenotype = var["variant"].triogenotype
-    allelic_depths = var["variant"].ad
+    trio_code = var["variant"].trio_code
+    allelic_depths = var["variant"].ad_counts
 
     # If the patient is a singleton, we do not have any clue about its inheritance
-    if triogenotype.endswith("NANA"):
+    if mum_state(trio_code) == NA and dad_state(trio_code) == NA:
         return params.DECIPHER_INHERITANCE_UNKNOWN
 
     # CNVS are not handled at the moment
-    if ("DUP" in triogenotype) or ("DEL" in triogenotype):
+    if child_state(trio_code) in [DEL, DUP]:
         return params.DECIPHER_INHERITANCE_NA
 
     # Denovo variants
-    if triogenotype in ["100", "200"]:
+    if not_inherited(trio_code):
         decipher_inheritance = params.DECIPHER_INHERITANCE_DENOVO
 
         if is_mosaic(allelic_depths):
@@ -525,16 +559,16 @@ def decipher_ready_inheritance(var):
     else:
 
         # Biparental
-        if triogenotype.endswith("11"):
+        if mum_state(trio_code) == HET and dad_state(trio_code) == HET:
             decipher_inheritance = params.DECIPHER_INHERITANCE_BIPARENTAL
         # Maternal
-        elif triogenotype[1] != "0":
+        elif mum_state(trio_code) != HOM_REF:
             decipher_inheritance = params.DECIPHER_INHERITANCE_MATERNAL
 
             if is_mosaic(allelic_depths):
                 decipher_inheritance = params.DECIPHER_INHERITANCE_MATERNAL_MOSAIC
         # Paternal
-        elif triogenotype[2] != "0":
+        elif dad_state(trio_code) != HOM_REF:
 
             decipher_inheritance = params.DECIPHER_INHERITANCE_PATERNAL
 
@@ -550,16 +584,17 @@ def is_mosaic(allelic_depths):
     determine whether the variant could be mosaic
 
     Args:
-        allelic_depths (tuple): reference and alternate alleles counts
+        allelic_depths (tuple): reference and alternate alleles counts, or MISSING
 
     Returns:
         bool: mosaic or not
     """
       
-    allelic_depths_split = allelic_depths.split(",")
+    if allelic_depths is MISSING:
+        return False
 
-    ref_allele_count = int(allelic_depths_split[0])
-    alt_allele_count = int(allelic_depths_split[1])
+    ref_allele_count = allelic_depths[0]
+    alt_allele_count = allelic_depths[1]
     tot_allele_count = ref_allele_count + alt_allele_count
 
     return (alt_allele_count / tot_allele_count) < params.THRESHOLD_AD_MOSAICITY
@@ -587,12 +622,12 @@ def max_spliceAI(var):
     ]
 
     splice_scores = [
-        var["variant"].SpliceAI_pred_DS_AG,
-        var["variant"].SpliceAI_pred_DS_AL,
-        var["variant"].SpliceAI_pred_DS_DG,
-        var["variant"].SpliceAI_pred_DS_DL,
+        var["variant"].SpliceAI_pred_DS_AG_value,
+        var["variant"].SpliceAI_pred_DS_AL_value,
+        var["variant"].SpliceAI_pred_DS_DG_value,
+        var["variant"].SpliceAI_pred_DS_DL_value,
     ]
-    splice_scores = [float(x) if x != "." else -1 for x in splice_scores]
+    splice_scores = [x if x is not MISSING else -1 for x in splice_scores]
 
     max_score, max_index = max((score, idx) for idx, score in enumerate(splice_scores))
 
@@ -53,6 +53,77 @@ def get_options():
 
     parser.add_argument("--outdir", help="Output directory.")
 
+    parser.add_argument(
+        "--loader",
+        choices=["python", "bcftools"],
+        help="How to read VCFs: in-process reader (VCF only) or bcftools pipeline. Default is bcftools.",
+    )
+
+    parser.add_argument(
+        "--pushdown",
+        action="store_true",
+        help="Apply the pre-inheritance filters to the child VCF while it is loaded, "
+        "so that failing variants are never created.",
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Number of threads for loading a trio (default 1). With more than one the parental VCFs are "
+        "read by bcftools at the same time as each other. Has no effect with --loader python, "
+        "--cache-dir or --columnar.",
+    )
+
+    parser.add_argument(
+        "--restrict-to-genes",
+        action="store_true",
+        help="Only load child variants in the known genes (plus --gene-padding), "
+        "and CNVs over 1Mb, using the VCF index.",
+    )
+
+    parser.add_argument(
+        "--gene-padding",
+        type=int,
+        default=5000,
+        help="Bases either side of each known gene loaded with --restrict-to-genes (default 5000).",
+    )
+
+    parser.add_argument(
+        "--parent-cache-size",
+        type=int,
+        default=5000000,
+        help="Maximum number of parental sites kept in memory for reuse by other families "
+        "sharing a parent (default 5000000, 0 disables the cache). A parent is dropped once "
+        "no later family needs it.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for a persistent cache of decoded VCF records. Later runs read unchanged "
+        "VCFs from the cache instead of decoding them again.",
+    )
+
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Hold the child's variants in a columnar table and apply the pre-inheritance "
+        "filters to it before creating variants or reading the parents.",
+    )
+
+    parser.add_argument(
+        "--rules",
+        help="JSON file of filter rules and thresholds, replacing the built-in values it gives. "
+        "See filtering/rules.py for the layout.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record wall time, CPU time, resident memory, rows in and out and bcftools time for each "
+        "stage of each family, written to clinical_filter_profile.tsv and .json in the output directory.",
+    )
+
     args = parser.parse_args()
 
     if args.child is not None:
@@ -63,6 +134,17 @@ def get_options():
         if args.sex is None:
             parser.error("--sex must also be used if --child is used")
 
+    if args.restrict_to_genes and args.known_genes is None:
+        parser.error("--known-genes must also be used if --restrict-to-genes is used")
+    if args.gene_padding < 0:
+        parser.error("--gene-padding must not be negative")
+
+    if args.parent_cache_size < 0:
+        parser.error("--parent-cache-size must not be negative")
+
+    if args.threads < 1:
+        parser.error("--threads must be at least 1")
+
     if args.outdir is None:
         args.outdir = os.getcwd()
 
@@ -0,0 +1,243 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+
+# wall time of bcftools pipelines started by streamcommand, across threads
+_subprocess_lock = threading.Lock()
+_subprocess_time = [0.0]
+
+COLUMNS = [
+    "family_id",
+    "proband",
+    "stage",
+    "wall_time",
+    "cpu_time",
+    "rss",
+    "rss_change",
+    "peak_delta",
+    "rows_in",
+    "rows_out",
+    "subprocess_wall_time",
+    "subprocess_cpu_time",
+]
+
+
+def record_subprocess(seconds):
+    """
+    Add the running time of a finished subprocess
+    """
+    with _subprocess_lock:
+        _subprocess_time[0] += seconds
+
+
+PAGE_SIZE = resource.getpagesize()
+
+
+def current_rss():
+    """
+    Resident set size of the process in bytes, None where /proc/self/statm
+    isn't available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process in bytes
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return maxrss
+    return maxrss * 1024
+
+
+# peak resident memory before the high-water mark was last reset
+_peak_lock = threading.Lock()
+_run_peak = [0]
+
+
+def reset_peak_rss():
+    """
+    Reset the process's resident memory high-water mark, which peak_rss then
+    reports from, keeping the peak so far for run_peak_rss. Returns False
+    where /proc/self/clear_refs can't be written and the mark is unchanged
+    """
+    with _peak_lock:
+        peak = peak_rss()
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            return False
+        _run_peak[0] = max(_run_peak[0], peak)
+        return True
+
+
+def run_peak_rss():
+    """
+    Peak resident set size of the process in bytes over the whole run
+    """
+    with _peak_lock:
+        return max(_run_peak[0], peak_rss())
+
+
+def subprocess_totals():
+    """
+    Wall time of subprocesses recorded so far and CPU time of all finished
+    child processes
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    with _subprocess_lock:
+        return _subprocess_time[0], usage.ru_utime + usage.ru_stime
+
+
+class Stage(object):
+    """
+    Measurements of one pipeline stage for one family, used as a context
+    manager around the stage. Set rows_out before the block ends
+    """
+
+    def __init__(self, family, name, rows_in=None, enabled=True):
+        self.family = family
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.enabled = enabled
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.rss = None
+        self.rss_change = None
+        self.peak_delta = None
+        self.subprocess_wall_time = 0.0
+        self.subprocess_cpu_time = 0.0
+
+    def __enter__(self):
+        if self.enabled:
+            self.peak_reset = reset_peak_rss()
+            self.rss_start = current_rss()
+            self.subprocess_start = subprocess_totals()
+            self.cpu_start = time.process_time()
+            self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.enabled:
+            self.wall_time = time.perf_counter() - self.wall_start
+            self.cpu_time = time.process_time() - self.cpu_start
+            subprocess_wall, subprocess_cpu = subprocess_totals()
+            self.subprocess_wall_time = subprocess_wall - self.subprocess_start[0]
+            self.subprocess_cpu_time = subprocess_cpu - self.subprocess_start[1]
+            self.rss = current_rss()
+            if self.rss is not None and self.rss_start is not None:
+                self.rss_change = self.rss - self.rss_start
+            if self.peak_reset and self.rss is not None and self.rss_start is not None:
+                # the high-water mark lags the resident size by a few pages
+                self.peak_delta = max(peak_rss(), self.rss, self.rss_start) - self.rss_start
+        return False
+
+    def record(self):
+        return {
+            "family_id": self.family.proband.family_id,
+            "proband": self.family.proband.person_id,
+            "stage": self.name,
+            "wall_time": round(self.wall_time, 6),
+            "cpu_time": round(self.cpu_time, 6),
+            "rss": self.rss,
+            "rss_change": self.rss_change,
+            "peak_delta": self.peak_delta,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "subprocess_wall_time": round(self.subprocess_wall_time, 6),
+            "subprocess_cpu_time": round(self.subprocess_cpu_time, 6),
+        }
+
+
+class Profile(object):
+    """
+    Per family, per stage wall time, CPU time, the process's resident memory
+    in bytes at the end of the stage, its change over the stage and the
+    stage's peak above its starting memory, rows in and out and time spent
+    in bcftools. Resident memory is read from /proc/self/statm, and the peak
+    from the high-water mark, reset through /proc/self/clear_refs at the
+    start of each stage. These are missing where /proc doesn't provide them.
+    When not enabled stages are still run through stage() but nothing is
+    measured or kept
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = []
+
+    def stage(self, family, name, rows_in=None):
+        stage = Stage(family, name, rows_in, self.enabled)
+        if self.enabled:
+            self.stages.append(stage)
+        return stage
+
+    def records(self):
+        return [stage.record() for stage in self.stages]
+
+    def totals(self):
+        """
+        Each stage's measurements summed over families, and the largest
+        resident memory at the end of the stage and peak above its start
+        """
+        totals = {}
+        for record in self.records():
+            if not record["stage"] in totals.keys():
+                totals[record["stage"]] = {"families": 0}
+            total = totals[record["stage"]]
+            total["families"] += 1
+            for column in COLUMNS[3:]:
+                if record[column] is None:
+                    continue
+                if column in ["rss", "peak_delta"]:
+                    total[column] = max(total.get(column, 0), record[column])
+                else:
+                    total[column] = total.get(column, 0) + record[column]
+        return totals
+
+    def write(self, outfileroot):
+        """
+        Write the measurements to outfileroot.tsv, one line per family and
+        stage, and outfileroot.json with the per stage totals and the peak
+        resident memory of the process
+        """
+        with open(outfileroot + ".tsv", "w") as o:
+            o.write(("\t").join(COLUMNS) + "\n")
+            for record in self.records():
+                values = ["." if record[column] is None else str(record[column]) for column in COLUMNS]
+                o.write(("\t").join(values) + "\n")
+        with open(outfileroot + ".json", "w") as o:
+            json.dump({"stages": self.records(), "totals": self.totals(), "peak_rss": run_peak_rss()}, o, indent=1)
+        logging.info("Profile written to " + outfileroot + ".tsv and " + outfileroot + ".json")
@@ -21,6 +21,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT
+
 
 def common_elements(list1, list2):
     return list(set(list1) & set(list2))
@@ -66,14 +68,14 @@ def add_compound_het_to_candidates(varid, var, hgncid, inh, candidates):
 
 def convert_genotype_to_gt(genotype):
     """
-    Convert 0/1/2 genotype to GATK genotype
+    Convert HOM_REF/HET/HOM_ALT genotype to GATK genotype
     """
     gt = ""
-    if genotype == "0":
+    if genotype == HOM_REF:
         gt = "0/0"
-    elif genotype == "1":
+    elif genotype == HET:
         gt = "0/1"
-    elif genotype == "2":
+    elif genotype == HOM_ALT:
         gt = "1/1"
     else:
         print("Invalid genotype - shouldn't get here")
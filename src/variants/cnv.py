@@ -22,6 +22,7 @@ THE SOFTWARE.
 """
 
 from variants.variant import Variant
+from variants.trio_genotype import HOM_REF, HET, REF, mum_state, dad_state
 
 
 class CNV(Variant):
@@ -29,8 +30,10 @@ class CNV(Variant):
     CNVs
     """
 
-    def __init__(self, vardata):
-        super().__init__(vardata)
+    __slots__ = ["reportable_symbol", "reportable_hgnc_id"]
+
+    def set_derived(self):
+        super().set_derived()
         self.reportable_symbol = []
         self.reportable_hgnc_id = []
 
@@ -71,8 +74,8 @@ class CNV(Variant):
     def get_genotype(self):
         return self.genotype
 
-    def set_triogenotype(self, triogeno):
-        self.triogenotype = triogeno
+    def set_trio_code(self, trio_code):
+        self.trio_code = trio_code
 
     def is_snv(self):
         """
@@ -87,17 +90,17 @@ class CNV(Variant):
         return True
 
     def get_mum_genotype(self):
-        if self.triogenotype[3:6] == "REF":
-            mum_genotype = "0"
+        if mum_state(self.trio_code) == REF:
+            mum_genotype = HOM_REF
         else:
-            mum_genotype = "1"
+            mum_genotype = HET
         return mum_genotype
 
     def get_dad_genotype(self):
-        if self.triogenotype[6:9] == "REF":
-            dad_genotype = "0"
+        if dad_state(self.trio_code) == REF:
+            dad_genotype = HOM_REF
         else:
-            dad_genotype = "1"
+            dad_genotype = HET
         return dad_genotype
 
     def is_het(self):
@@ -0,0 +1,96 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+# every field a variant can have, in query column order, as
+# (variant attribute, INFO or FORMAT, VCF tag)
+FIELDS = [
+    ("consequence", "INFO", "Consequence"),
+    ("ensg", "INFO", "Gene"),
+    ("symbol", "INFO", "SYMBOL"),
+    ("feature", "INFO", "Feature"),
+    ("canonical", "INFO", "CANONICAL"),
+    ("mane", "INFO", "MANE_SELECT"),
+    ("mane_clinical", "INFO", "MANE_PLUS_CLINICAL"),
+    ("hgnc_id", "INFO", "HGNC_ID"),
+    ("max_af", "INFO", "MAX_AF"),
+    ("max_af_pops", "INFO", "MAX_AF_POPS"),
+    ("ddd_af", "INFO", "DDD_AF"),
+    ("ddd_father_af", "INFO", "DDD_father_AF"),
+    ("revel", "INFO", "REVEL"),
+    ("polyphen", "INFO", "PolyPhen"),
+    ("protein_position", "INFO", "Protein_position"),
+    ("hgvsc", "INFO", "HGVSc"),
+    ("hgvsp", "INFO", "HGVSp"),
+    ("DNM", "INFO", "DNM"),
+    ("DNG", "INFO", "DNG"),
+    ("vaf", "INFO", "VAF"),
+    ("cnv_end", "INFO", "END"),
+    ("cnv_type", "INFO", "SVTYPE"),
+    ("cnv_length", "INFO", "SVLEN"),
+    ("cnv_filter", "INFO", "CNVFILTER"),
+    ("hgnc_id_all", "INFO", "HGNC_ID_ALL"),
+    ("symbol_all", "INFO", "SYMBOL_ALL"),
+    ("ac_XX", "INFO", "AC_XX"),
+    ("an_XX", "INFO", "AN_XX"),
+    ("nhomalt_XX", "INFO", "nhomalt_XX"),
+    ("ac_XY", "INFO", "AC_XY"),
+    ("an_XY", "INFO", "AN_XY"),
+    ("nhomalt_XY", "INFO", "nhomalt_XY"),
+    # Added for b38v3
+    ("AlphaMissense_pred", "INFO", "AlphaMissense_pred"),
+    ("AlphaMissense_rankscore", "INFO", "AlphaMissense_rankscore"),
+    ("AlphaMissense_score", "INFO", "AlphaMissense_score"),
+    ("MPC_rankscore", "INFO", "MPC_rankscore"),
+    ("MPC_score", "INFO", "MPC_score"),
+    ("PrimateAI_pred", "INFO", "PrimateAI_pred"),
+    ("PrimateAI_rankscore", "INFO", "PrimateAI_rankscore"),
+    ("PrimateAI_score", "INFO", "PrimateAI_score"),
+    ("EVE_CLASS", "INFO", "EVE_CLASS"),
+    ("EVE_SCORE", "INFO", "EVE_SCORE"),
+    ("pLI_gene_value", "INFO", "pLI_gene_value"),
+    ("SpliceAI_pred_DP_AG", "INFO", "SpliceAI_pred_DP_AG"),
+    ("SpliceAI_pred_DP_AL", "INFO", "SpliceAI_pred_DP_AL"),
+    ("SpliceAI_pred_DP_DG", "INFO", "SpliceAI_pred_DP_DG"),
+    ("SpliceAI_pred_DP_DL", "INFO", "SpliceAI_pred_DP_DL"),
+    ("SpliceAI_pred_DS_AG", "INFO", "SpliceAI_pred_DS_AG"),
+    ("SpliceAI_pred_DS_AL", "INFO", "SpliceAI_pred_DS_AL"),
+    ("SpliceAI_pred_DS_DG", "INFO", "SpliceAI_pred_DS_DG"),
+    ("SpliceAI_pred_DS_DL", "INFO", "SpliceAI_pred_DS_DL"),
+    ("SpliceAI_pred_SYMBOL", "INFO", "SpliceAI_pred_SYMBOL"),
+    ("LoF", "INFO", "LoF"),
+    ("LoF_filter", "INFO", "LoF_filter"),
+    ("LoF_flags", "INFO", "LoF_flags"),
+    ("LoF_info", "INFO", "LoF_info"),
+    ("CADD_PHRED", "INFO", "CADD_PHRED"),
+    ("CLIN_SIG", "INFO", "CLIN_SIG"),
+    # Extra informations on CNVs
+    ("CALLSOURCE", "INFO", "CALLSOURCE"),
+    ("MEANLR2", "INFO", "MEANLR2"),
+    # Format information
+    ("gt", "FORMAT", "GT"),
+    ("gq", "FORMAT", "GQ"),
+    ("pid", "FORMAT", "PID"),
+    ("ad", "FORMAT", "AD"),
+    ("cnv_inh", "FORMAT", "CIFER_INHERITANCE"),
+    ("cn", "FORMAT", "CN"),
+]
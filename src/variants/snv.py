@@ -22,6 +22,7 @@ THE SOFTWARE.
 """
 
 from variants.variant import Variant
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT, mum_state, dad_state
 import logging
 
 
@@ -30,8 +31,10 @@ class SNV(Variant):
     SNVs
     """
 
-    def __init__(self, vardata):
-        super().__init__(vardata)
+    __slots__ = ["AC_het", "AC_hemi", "AC_tot", "AC_het_count", "AC_hemi_count"]
+
+    def set_derived(self):
+        super().set_derived()
         self.standardise_gt()
         self.calculate_ac_het_hemi()
 
@@ -114,6 +117,8 @@ class SNV(Variant):
         self.AC_het = str(AC_het)
         self.AC_hemi = str(AC_hemi)
         self.AC_tot = str(total_AC)
+        self.AC_het_count = AC_het
+        self.AC_hemi_count = AC_hemi
 
     def standardise_gt(self):
         """
@@ -131,69 +136,58 @@ class SNV(Variant):
         """
         Converts genotype to 0/1/2
         """
-        if len(self.gt) != 3:
-            raise ValueError("genotype should be three characters")
-        else:
-            gtsplit = list(self.gt)
-            if gtsplit[0] == "0" and gtsplit[2] == "0":
-                self.genotype = "0"
-            elif gtsplit[0] == gtsplit[2]:
-                self.genotype = "2"
-            else:
-                self.genotype = "1"
+        self.genotype = genotype_from_gt(self.gt)
 
     def get_genotype(self):
         return self.genotype
 
-    def set_triogenotype(self, triogeno):
-        self.triogenotype = triogeno
+    def set_trio_code(self, trio_code):
+        self.trio_code = trio_code
 
     def get_mum_genotype(self):
-        mum_genotype = self.triogenotype[1]
-        return mum_genotype
+        return mum_state(self.trio_code)
 
     def get_dad_genotype(self):
-        dad_genotype = self.triogenotype[2]
-        return dad_genotype
+        return dad_state(self.trio_code)
 
     def is_mum_hom_ref(self):
         genotype = self.get_mum_genotype()
-        if genotype == "0":
+        if genotype == HOM_REF:
             return True
         else:
             return False
 
     def is_dad_hom_ref(self):
         genotype = self.get_dad_genotype()
-        if genotype == "0":
+        if genotype == HOM_REF:
             return True
         else:
             return False
 
     def is_mum_hom_alt(self):
         genotype = self.get_mum_genotype()
-        if genotype == "2":
+        if genotype == HOM_ALT:
             return True
         else:
             return False
 
     def is_dad_hom_alt(self):
         genotype = self.get_dad_genotype()
-        if genotype == "2":
+        if genotype == HOM_ALT:
             return True
         else:
             return False
 
     def is_mum_het(self):
         genotype = self.get_mum_genotype()
-        if genotype == "1":
+        if genotype == HET:
             return True
         else:
             return False
 
     def is_dad_het(self):
         genotype = self.get_dad_genotype()
-        if genotype == "1":
+        if genotype == HET:
             return True
         else:
             return False
@@ -214,7 +208,7 @@ class SNV(Variant):
         """
         Is the variant a het?
         """
-        if self.genotype == 1:
+        if self.genotype == HET:
             return True
         else:
             return False
@@ -223,7 +217,7 @@ class SNV(Variant):
         """
         Is the variant hom alt?
         """
-        if self.genotype == 2:
+        if self.genotype == HOM_ALT:
             return True
         else:
             return False
@@ -232,7 +226,23 @@ class SNV(Variant):
         """
         Is the variant hom ref?
         """
-        if self.genotype == 0:
+        if self.genotype == HOM_REF:
             return True
         else:
             return False
+
+
+def genotype_from_gt(gt):
+    """
+    Converts a GT value to genotype HOM_REF/HET/HOM_ALT
+    """
+    if len(gt) != 3:
+        raise ValueError("genotype should be three characters")
+    else:
+        gtsplit = list(gt)
+        if gtsplit[0] == "0" and gtsplit[2] == "0":
+            return HOM_REF
+        elif gtsplit[0] == gtsplit[2]:
+            return HOM_ALT
+        else:
+            return HET
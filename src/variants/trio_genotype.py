@@ -23,6 +23,59 @@ THE SOFTWARE.
 
 import logging
 
+# genotype state of each member of a trio: 0/1/2 for SNVs, NA where the parent
+# isn't in the family, DEL/DUP for a CNV in the child or inherited by a parent
+# and REF for a parent without the child's CNV
+HOM_REF = 0
+HET = 1
+HOM_ALT = 2
+NA = 3
+REF = 4
+DEL = 5
+DUP = 6
+
+# string form of each state, as in the output triogenotype
+GENOTYPE_STRINGS = ["0", "1", "2", "NA", "REF", "DEL", "DUP"]
+CNV_GENOTYPES = {"DEL": DEL, "DUP": DUP}
+
+# a trio genotype is a single int holding the child, mum and dad states
+STATE_BITS = 3
+STATE_MASK = (1 << STATE_BITS) - 1
+
+
+def encode_trio(child, mum, dad):
+    return child | (mum << STATE_BITS) | (dad << (2 * STATE_BITS))
+
+
+def child_state(trio):
+    return trio & STATE_MASK
+
+
+def mum_state(trio):
+    return (trio >> STATE_BITS) & STATE_MASK
+
+
+def dad_state(trio):
+    return trio >> (2 * STATE_BITS)
+
+
+def trio_string(trio):
+    """
+    Output form of a trio genotype, e.g. "101", "2NANA" or "DELDELREF"
+    """
+    return GENOTYPE_STRINGS[child_state(trio)] + GENOTYPE_STRINGS[mum_state(trio)] + GENOTYPE_STRINGS[dad_state(trio)]
+
+
+def not_inherited(trio):
+    """
+    Child het or hom alt and both parents hom ref (trio genotype 100 or 200)
+    """
+    return child_state(trio) in [HET, HOM_ALT] and mum_state(trio) == HOM_REF and dad_state(trio) == HOM_REF
+
+
+def cnv_genotype(var):
+    return CNV_GENOTYPES[var.alt[1:4]]
+
 
 def add_trio_genotypes(family, variants):
     """
@@ -53,33 +106,31 @@ def add_trio_genotypes_both_parents(variants):
     for v in variants["child"].keys():
         if variants["child"][v].is_snv():
             childgeno = variants["child"][v].genotype
-            mumgeno = "0"
-            dadgeno = "0"
+            mumgeno = HOM_REF
+            dadgeno = HOM_REF
             if v in variants["mum"].keys():
                 mumgeno = variants["mum"][v].genotype
             if v in variants["dad"].keys():
                 dadgeno = variants["dad"][v].genotype
-            triogenotype = childgeno + mumgeno + dadgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+            variants["child"][v].set_trio_code(encode_trio(childgeno, mumgeno, dadgeno))
         elif variants["child"][v].is_cnv():
             # for a CNV trio genotype is determined from cifer inheritance
-            childgeno = variants["child"][v].alt[1:4]
+            childgeno = cnv_genotype(variants["child"][v])
             if variants["child"][v].cnv_inh == "not_inherited":
-                parentgeno = "REFREF"
+                mumgeno, dadgeno = REF, REF
             elif variants["child"][v].cnv_inh == "maternal_inh":
-                parentgeno = childgeno + "REF"
+                mumgeno, dadgeno = childgeno, REF
             elif variants["child"][v].cnv_inh == "paternal_inh":
-                parentgeno = "REF" + childgeno
+                mumgeno, dadgeno = REF, childgeno
             elif variants["child"][v].cnv_inh == "biparental_inh":
-                parentgeno = childgeno + childgeno
+                mumgeno, dadgeno = childgeno, childgeno
             else:
                 logging.info(
                     v + " Error: trio genotype for CNV can't be "
                     "determined, CNV inh = " + variants["child"][v].cnv_inh
                 )
-                parentgeno = "NANA"
-            triogenotype = childgeno + parentgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+                mumgeno, dadgeno = NA, NA
+            variants["child"][v].set_trio_code(encode_trio(childgeno, mumgeno, dadgeno))
         else:
             print("Error: unrecognised variant type " + v)
             exit(1)
@@ -93,14 +144,11 @@ def add_trio_genotypes_no_parents(variants):
         if variants["child"][v].is_snv():
             childgeno = variants["child"][v].genotype
         elif variants["child"][v].is_cnv():
-            childgeno = variants["child"][v].alt[1:4]
+            childgeno = cnv_genotype(variants["child"][v])
         else:
             print("Error: unrecognised variant type " + v)
             exit(1)
-        mumgeno = "NA"
-        dadgeno = "NA"
-        triogenotype = childgeno + mumgeno + dadgeno
-        variants["child"][v].set_triogenotype(triogenotype)
+        variants["child"][v].set_trio_code(encode_trio(childgeno, NA, NA))
 
 
 def add_trio_genotypes_mum_only(variants):
@@ -110,20 +158,16 @@ def add_trio_genotypes_mum_only(variants):
     for v in variants["child"].keys():
         if variants["child"][v].is_snv():
             childgeno = variants["child"][v].genotype
-            mumgeno = "0"
-            dadgeno = "NA"
+            mumgeno = HOM_REF
+            dadgeno = NA
             if v in variants["mum"].keys():
                 mumgeno = variants["mum"][v].genotype
-            triogenotype = childgeno + mumgeno + dadgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+            variants["child"][v].set_trio_code(encode_trio(childgeno, mumgeno, dadgeno))
         elif variants["child"][v].is_cnv():
             # todo improve when there is better inheritence prediction
             # for single parent CNVs
-            childgeno = variants["child"][v].alt[1:4]
-            mumgeno = "NA"
-            dadgeno = "NA"
-            triogenotype = childgeno + mumgeno + dadgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+            childgeno = cnv_genotype(variants["child"][v])
+            variants["child"][v].set_trio_code(encode_trio(childgeno, NA, NA))
         else:
             print("Error: unrecognised variant type " + v)
             exit(1)
@@ -136,20 +180,16 @@ def add_trio_genotypes_dad_only(variants):
     for v in variants["child"].keys():
         if variants["child"][v].is_snv():
             childgeno = variants["child"][v].genotype
-            mumgeno = "NA"
-            dadgeno = "0"
+            mumgeno = NA
+            dadgeno = HOM_REF
             if v in variants["dad"].keys():
                 dadgeno = variants["dad"][v].genotype
-            triogenotype = childgeno + mumgeno + dadgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+            variants["child"][v].set_trio_code(encode_trio(childgeno, mumgeno, dadgeno))
         elif variants["child"][v].is_cnv():
             # todo improve when there is better inheritence prediction
             # for single parent CNVs
-            childgeno = variants["child"][v].alt[1:4]
-            mumgeno = "NA"
-            dadgeno = "NA"
-            triogenotype = childgeno + mumgeno + dadgeno
-            variants["child"][v].set_triogenotype(triogenotype)
+            childgeno = cnv_genotype(variants["child"][v])
+            variants["child"][v].set_trio_code(encode_trio(childgeno, NA, NA))
         else:
             print("Error: unrecognised variant type " + v)
             exit(1)
@@ -21,22 +21,135 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from variants.fields import FIELDS
+from variants.trio_genotype import trio_string
+from variants.consequences import consequence_mask
+
+# typed value of a numeric field which is "." or can't be parsed
+MISSING = None
+
+# numeric fields parsed once when a variant is created, into <field>_value
+# attributes. The string attributes are kept as they are for output
+FLOAT_FIELDS = [
+    "max_af",
+    "ddd_af",
+    "ddd_father_af",
+    "revel",
+    "SpliceAI_pred_DS_AG",
+    "SpliceAI_pred_DS_AL",
+    "SpliceAI_pred_DS_DG",
+    "SpliceAI_pred_DS_DL",
+]
+INT_FIELDS = ["gq"]
+
 
 class Variant(object):
     """
     Generic variant class, inherited by more specific classes such as CNV
-     and SNV
+     and SNV. The loaded and derived attributes are declared as slots, a
+     per-instance dict is only created if any other attribute is set.
+     Variants created from rows holding undecoded INFO for the schema's
+     deferred fields decode them all when one is first used
     """
 
+    __slots__ = (
+        [
+            "chrom",
+            "pos",
+            "ref",
+            "alt",
+            "sex",
+            "dnm",
+            "genotype",
+            "trio_code",
+            "ad_counts",
+            "consequence_mask",
+            "deferred",
+            "__dict__",
+        ]
+        + [f[0] for f in FIELDS]
+        + [field + "_value" for field in FLOAT_FIELDS + INT_FIELDS]
+    )
+
     def __init__(self, vardata):
         for key in vardata:
             setattr(self, key, vardata[key])
+        self.set_derived()
 
+    @classmethod
+    def from_row(cls, schema, row, sex):
+        """
+        Create a variant directly from a query row of CHROM, POS, REF, ALT
+        and the schema's fields, as cls(schema.vardata(row, sex)) would
+        """
+        var = cls.__new__(cls)
+        var.chrom = row[0]
+        var.pos = row[1]
+        var.ref = row[2]
+        var.alt = row[3]
+        for i, attribute in schema.eager:
+            setattr(var, attribute, row[i])
+        if schema.deferred:
+            undecoded = row[schema.deferred[0][0]]
+            if type(undecoded) is str:
+                # rows from bcftools or the variant cache are already decoded
+                for i, attribute in schema.deferred:
+                    setattr(var, attribute, row[i])
+            else:
+                var.deferred = (schema, undecoded)
+        for attribute in schema.defaults:
+            setattr(var, attribute, ".")
+        var.sex = sex
+        var.dnm = not var.DNM == "." or not var.DNG == "."
+        var.set_derived()
+        return var
+
+    def __getattr__(self, name):
+        """
+        Only called for attributes which aren't set, decodes the deferred
+        fields if name is one of them
+        """
+        if name == "deferred":
+            raise AttributeError(name)
+        deferred = getattr(self, "deferred", None)
+        if deferred is None or name not in deferred[0].deferred_attributes:
+            raise AttributeError(type(self).__name__ + " has no attribute " + name)
+        self.decode_fields()
+        return getattr(self, name)
+
+    def decode_fields(self):
+        """
+        Set the deferred fields from the row's undecoded INFO
+        """
+        deferred = getattr(self, "deferred", None)
+        if deferred is None:
+            return
+        schema, undecoded = deferred
+        self.deferred = None
+        values = undecoded.values(schema.deferred_tags)
+        for j in range(len(values)):
+            setattr(self, schema.deferred[j][1], values[j])
+
+    def set_derived(self):
+        """
+        Set the attributes derived from the loaded fields
+        """
         self.genotype = None
-        self.triogenotype = None
+        self.trio_code = None
         self.set_genotype()
         self.standardise_chromosome()
         self.parse_hgnc_id()
+        self.parse_numeric_fields()
+        self.consequence_mask = consequence_mask(self.consequence)
+
+    @property
+    def triogenotype(self):
+        """
+        String form of the trio genotype for output
+        """
+        if self.trio_code is None:
+            return None
+        return trio_string(self.trio_code)
 
     def __eq__(self, other):
         return self.chrom == other.chrom and self.pos == other.pos and self.ref == other.ref and self.alt == other.alt
@@ -54,3 +167,40 @@ class Variant(object):
         """
         if self.hgnc_id.startswith("HGNC:"):
             self.hgnc_id = self.hgnc_id[5:]
+
+    def parse_numeric_fields(self):
+        """
+        Parse numeric annotations into typed <field>_value attributes and
+        allelic depths into ad_counts, MISSING where there is no value
+        """
+        for field in FLOAT_FIELDS:
+            setattr(self, field + "_value", parse_number(getattr(self, field, "."), float))
+        for field in INT_FIELDS:
+            setattr(self, field + "_value", parse_number(getattr(self, field, "."), int))
+        self.ad_counts = parse_allelic_depths(getattr(self, "ad", "."))
+
+
+def parse_number(value, numtype):
+    """
+    Convert a field value to numtype, or MISSING
+    """
+    if value == ".":
+        return MISSING
+    try:
+        return numtype(value)
+    except ValueError:
+        return MISSING
+
+
+def parse_allelic_depths(value):
+    """
+    Reference and alternate allele depths from an AD value as a tuple of
+    ints, or MISSING
+    """
+    adsplit = value.split(",")
+    if len(adsplit) < 2:
+        return MISSING
+    try:
+        return (int(adsplit[0]), int(adsplit[1]))
+    except ValueError:
+        return MISSING
@@ -0,0 +1,203 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from array import array
+
+from variants.snv import SNV
+from variants.cnv import CNV
+from variants.variant import MISSING, parse_number
+from variants.trio_genotype import HOM_REF
+
+# genotype codes in the parent genotype columns, NOT_LOADED where the parent
+# wasn't looked up at the row's site
+NOT_LOADED = -1
+
+
+class Column(object):
+    """
+    Dictionary encoded column of strings
+    """
+
+    def __init__(self):
+        self.values = []
+        self.lookup = {}
+        self.codes = array("I")
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.lookup[value] = code
+            self.values.append(value)
+        self.codes.append(code)
+
+    def value(self, idx):
+        return self.values[self.codes[idx]]
+
+    def decode(self, convert):
+        """
+        Convert each distinct value once, returns a list of the converted
+        value of each row
+        """
+        converted = [convert(v) for v in self.values]
+        return [converted[c] for c in self.codes]
+
+
+class PlainColumn(object):
+    """
+    Column of strings stored as they are, for values which rarely repeat
+    """
+
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def value(self, idx):
+        return self.values[idx]
+
+    def decode(self, convert):
+        return [convert(v) for v in self.values]
+
+
+class VariantTable(object):
+    """
+    Struct of arrays holding a proband's query rows. The query columns other
+    than POS are dictionary encoded, so repeated annotation values are stored
+    and parsed once. Parent genotype columns are aligned to the rows and variant objects
+    are only created for the rows which are asked for
+    """
+
+    def __init__(self, schema, sex):
+        self.schema = schema
+        self.sex = sex
+        self.columns = []
+        for i in range(4 + len(schema.attributes)):
+            # positions are nearly all distinct
+            self.columns.append(PlainColumn() if i == 1 else Column())
+        self.nrows = 0
+        self.mum_genotype = array("b")
+        self.dad_genotype = array("b")
+
+    def append(self, row):
+        for i in range(len(self.columns)):
+            self.columns[i].append(row[i])
+        self.mum_genotype.append(NOT_LOADED)
+        self.dad_genotype.append(NOT_LOADED)
+        self.nrows += 1
+
+    def column(self, attribute):
+        """
+        The column of a schema attribute, or None if it wasn't queried
+        """
+        if attribute not in self.schema.attributes:
+            return None
+        return self.columns[4 + self.schema.attributes.index(attribute)]
+
+    def strings(self, attribute):
+        """
+        Per row values of an attribute, "." where it wasn't queried
+        """
+        column = self.column(attribute)
+        if column is None:
+            return ["."] * self.nrows
+        return column.decode(str)
+
+    def numbers(self, attribute, numtype=float):
+        """
+        Per row typed values of an attribute, MISSING where there is no value
+        """
+        column = self.column(attribute)
+        if column is None:
+            return [MISSING] * self.nrows
+        return column.decode(lambda v: parse_number(v, numtype))
+
+    def chroms(self):
+        """
+        Per row chromosomes, without any chr prefix as on variant objects
+        """
+
+        def standardise(chrom):
+            if chrom.startswith("Chr") or chrom.startswith("chr"):
+                return chrom[3:]
+            return chrom
+
+        return self.columns[0].decode(standardise)
+
+    def is_cnv(self):
+        """
+        Per row True for CNVs
+        """
+        return self.columns[3].decode(lambda alt: alt in ["<DEL>", "<DUP>"])
+
+    def dnm(self):
+        """
+        Per row DNM flag, as set on variant objects
+        """
+        dnm = self.strings("DNM")
+        dng = self.strings("DNG")
+        return [not dnm[i] == "." or not dng[i] == "." for i in range(self.nrows)]
+
+    def row(self, idx):
+        return [column.value(idx) for column in self.columns]
+
+    def varid(self, idx):
+        return ("_").join([self.columns[i].value(idx) for i in range(4)])
+
+    def sites(self, mask):
+        """
+        (chrom, pos, pos) of the rows in mask
+        """
+        sites = []
+        for idx in range(self.nrows):
+            if mask[idx]:
+                sites.append((self.columns[0].value(idx), self.columns[1].value(idx), self.columns[1].value(idx)))
+        return sites
+
+    def set_parent_genotypes(self, mum_vars, dad_vars, mask):
+        """
+        Fill the parent genotype columns for the rows in mask from the parents'
+        variant objects, HOM_REF where a parent doesn't have the variant
+        """
+        for idx in range(self.nrows):
+            if not mask[idx]:
+                continue
+            varid = self.varid(idx)
+            self.mum_genotype[idx] = mum_vars[varid].genotype if varid in mum_vars else HOM_REF
+            self.dad_genotype[idx] = dad_vars[varid].genotype if varid in dad_vars else HOM_REF
+
+    def materialise(self, mask):
+        """
+        Dict of variant id: SNV or CNV object for the rows in mask
+        """
+        vars = {}
+        for idx in range(self.nrows):
+            if not mask[idx]:
+                continue
+            row = self.row(idx)
+            var = SNV
+            if row[3] in ["<DEL>", "<DUP>"]:
+                var = CNV
+            vars[self.varid(idx)] = var.from_row(self.schema, row, self.sex)
+        return vars
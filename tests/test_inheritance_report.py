@@ -0,0 +1,100 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import os
+import tempfile
+import unittest
+
+from filtering.inheritance_report import CELLS, InheritanceReport, merge_reports
+from output.print_results import print_inh_summary
+
+PARENT_GTS = "dad_0/0_mum_0/0"
+
+
+class TestInheritanceReport(unittest.TestCase):
+    def test_blank_report(self):
+        report = InheritanceReport().as_dict()
+        self.assertEqual(list(report.keys()), ["autosomal", "allosomal"])
+        self.assertEqual(list(report["autosomal"].keys()), ["biallelic", "monoallelic", "mosaic", "imprinted"])
+        self.assertEqual(list(report["allosomal"]["hemizygous"].keys()), ["child_het", "child_hemi", "child_hom"])
+        self.assertEqual(list(report["allosomal"]["monoallelic_Y_hemizygous"].keys()), ["child_hemi"])
+        counts = report["autosomal"]["biallelic"]["child_het"]["dad_unaffected"]["mum_affected"]
+        self.assertEqual(len(counts), 9)
+        self.assertEqual(counts["dad_0/1_mum_1/1"], 0)
+        self.assertEqual(len(CELLS), (4 * 2 + 3 * 3 + 1) * 2 * 2 * 9)
+
+    def test_populate(self):
+        report = InheritanceReport()
+        report.populate_inheritance_report("autosomal", "biallelic", "0/1", "0/1", "0/0", False, True)
+        report.populate_inheritance_report("allosomal", "hemizygous", "hemizygous", "0/1", "0/0", False, False)
+        cell = ("autosomal", "biallelic", "child_het", "dad_affected", "mum_unaffected", "dad_0/0_mum_0/1")
+        report.increment(cell, 2)
+        counts = report.inheritance_report
+        expected = {
+            "dad_0/0_mum_0/0": 0,
+            "dad_0/0_mum_0/1": 3,
+            "dad_0/0_mum_1/1": 0,
+            "dad_0/1_mum_0/0": 0,
+            "dad_0/1_mum_0/1": 0,
+            "dad_0/1_mum_1/1": 0,
+            "dad_1/1_mum_0/0": 0,
+            "dad_1/1_mum_0/1": 0,
+            "dad_1/1_mum_1/1": 0,
+        }
+        self.assertEqual(counts["autosomal"]["biallelic"]["child_het"]["dad_affected"]["mum_unaffected"], expected)
+        hemi = counts["allosomal"]["hemizygous"]["child_hemi"]["dad_unaffected"]["mum_unaffected"]
+        self.assertEqual(hemi["dad_0/0_mum_0/1"], 1)
+        self.assertEqual(sum(report.counts), 4)
+        with self.assertRaises(KeyError):
+            report.increment(("autosomal", "biallelic", "child_hemi", "dad_affected", "mum_affected", PARENT_GTS))
+
+    def test_merge(self):
+        reports = []
+        for i in range(3):
+            report = InheritanceReport()
+            for j in range(i + 1):
+                report.increment(CELLS[j])
+            reports.append(report)
+        cohort = merge_reports(reports)
+        self.assertEqual([cohort.count(cell) for cell in CELLS[0:4]], [3, 2, 1, 0])
+        self.assertEqual(reports[0].count(CELLS[0]), 1)
+
+    def test_summary(self):
+        reports = [InheritanceReport(), InheritanceReport()]
+        reports[0].increment(CELLS[1], 2)
+        reports[1].increment(CELLS[1])
+        reports[1].increment(CELLS[5])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            summaryfile = os.path.join(tmpdir, "summary.tsv")
+            print_inh_summary(reports, summaryfile)
+            with open(summaryfile) as f:
+                lines = [line.rstrip("\n").split("\t") for line in f]
+        self.assertEqual(len(lines), len(CELLS) + 1)
+        self.assertEqual(lines[0][-2:], ["variants", "families"])
+        self.assertEqual(lines[2], list(CELLS[1]) + ["3", "2"])
+        self.assertEqual(lines[6][-2:], ["1", "1"])
+        self.assertEqual(lines[1][-2:], ["0", "0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import unittest
+
+from filtering.inheritance_table import (
+    MODE_TABLE,
+    CHILD_TABLE,
+    BOTH_PARENT_RULES,
+    PARENT_GENOTYPES,
+    AFFECTED_STATES,
+    SINGLE,
+    COMPOUND_HET,
+    FAIL,
+    lookup,
+)
+from filtering.inheritance_filtering import InheritanceFiltering
+from filtering.inheritance_report import InheritanceReport
+from tests.test_utils import create_test_family
+from tests.test_utils import create_test_person
+from tests.test_utils import create_test_variants_per_gene
+from variants.trio_genotype import HOM_REF, HET, HOM_ALT
+
+MODES = [
+    "Biallelic",
+    "Monoallelic",
+    "Hemizygous",
+    "X-linked dominant",
+    "X-linked over-dominance",
+    "Imprinted",
+    "Mosaic",
+    "Unknown",
+]
+
+
+class TestInheritanceTable(unittest.TestCase):
+    def test_complete(self):
+        """every combination of parental genotypes and affected status has an outcome"""
+        for chromtype, child, mode in BOTH_PARENT_RULES.keys():
+            chroms = ["autosomal"] if chromtype == "autosomal" else ["X", "Y"]
+            for chrom in chroms:
+                for mum in PARENT_GENOTYPES:
+                    for dad in PARENT_GENOTYPES:
+                        for mum_aff in AFFECTED_STATES:
+                            for dad_aff in AFFECTED_STATES:
+                                outcome = lookup(chrom, "both", child, mode, mum, dad, mum_aff, dad_aff)
+                                self.assertIn(outcome.action, [SINGLE, COMPOUND_HET, FAIL])
+        self.assertEqual(len(MODE_TABLE), (8 + 12 * 2) * 3 * 3 * 2 * 2 + 17)
+
+    def test_outcomes(self):
+        # het in biallelic gene, unaffected parents: compound het unless a parent is hom alt
+        outcome = lookup("autosomal", "both", "het", "Biallelic", HET, HOM_REF, False, False)
+        self.assertEqual((outcome.action, outcome.mode, outcome.reason), (COMPOUND_HET, "biallelic", "compatible"))
+        outcome = lookup("autosomal", "both", "het", "Biallelic", HOM_ALT, HOM_REF, False, False)
+        self.assertEqual((outcome.action, outcome.reason), (FAIL, "unaffected_parent_hom_alt"))
+        self.assertEqual(
+            outcome.report_cell,
+            ("autosomal", "biallelic", "child_het", "dad_unaffected", "mum_unaffected", "dad_0/0_mum_1/1"),
+        )
+        # hom in biallelic gene with one het parent is a compound het candidate
+        outcome = lookup("autosomal", "both", "hom", "Biallelic", HOM_REF, HET, False, False)
+        self.assertEqual((outcome.action, outcome.reason), (COMPOUND_HET, "one_het_parent"))
+        # hemizygous, unaffected hom alt mum
+        outcome = lookup("X", "both", "hemi", "Hemizygous", HOM_ALT, HOM_REF, False, True)
+        self.assertEqual((outcome.action, outcome.reason), (FAIL, "unaffected_mum_hom_alt"))
+        outcome = lookup("X", "both", "het", "X-linked over-dominance", HOM_REF, HOM_REF, False, True)
+        self.assertEqual((outcome.action, outcome.mode, outcome.reason), (SINGLE, "X-linked over-dominance", "de_novo"))
+        # mosaic genes with a hom proband aren't screened or reported
+        outcome = lookup("autosomal", "both", "hom", "Mosaic", HET, HET, True, True)
+        self.assertEqual((outcome.action, outcome.message, outcome.report_cell), (FAIL, None, None))
+        # without parents every mode passes on X, keeping the gene's mode
+        outcome = lookup("X", "none", "het", "Something new")
+        self.assertEqual((outcome.action, outcome.mode), (SINGLE, None))
+        outcome = lookup("Y", "none", "het", "Hemizygous")
+        self.assertEqual(outcome.action, FAIL)
+        self.assertIsNone(lookup("autosomal", "both", "het", "Unknown", HET, HET, True, True))
+
+    def test_child_table(self):
+        # one X: 0/1 is hemizygous with a high VAF or DNM, otherwise fails
+        self.assertEqual(CHILD_TABLE[("X", "both", 1, HET, True)], ("hemi", None))
+        self.assertIsNone(CHILD_TABLE[("X", "both", 1, HET, False)][0])
+        self.assertEqual(CHILD_TABLE[("X", "both", 1, HOM_ALT, False)], ("hemi", None))
+        self.assertEqual(CHILD_TABLE[("X", "both", 2, HOM_ALT, False)], ("hom", None))
+        self.assertIsNone(CHILD_TABLE[("X", "none", 0, HET, False)][0])
+        self.assertEqual(CHILD_TABLE[("Y", "both", 1, HOM_ALT, False)], ("hemi", None))
+        self.assertEqual(CHILD_TABLE[("autosomal", "none", 2, HOM_REF, False)], ("invalid", None))
+        self.assertIsNone(CHILD_TABLE[("autosomal", "both", 2, HOM_REF, False)][0])
+
+    def test_batch_matches_per_gene(self):
+        """classifying a family's variants in one batch gives the same candidates and report as gene by gene"""
+        genes = {}
+        for chrom, hgncid in [("5", "1"), ("X", "2"), ("Y", "3"), ("X", "4")]:
+            genes[hgncid] = {"chr": chrom, "start": "1", "end": "1000000", "symbol": "G" + hgncid, "mode": set(MODES)}
+        genes["2"]["mode"] = {"Hemizygous", "Monoallelic"}
+        vardata = {
+            "chrom": "5",
+            "pos": "1",
+            "ref": "A",
+            "alt": "G",
+            "consequence": "missense_variant",
+            "ensg": "ensg",
+            "symbol": "G1",
+            "feature": "feature",
+            "canonical": "YES",
+            "mane": "MANE",
+            "hgnc_id": "1",
+            "ddd_father_af": ".",
+            "max_af": "0",
+            "max_af_pops": ".",
+            "ddd_af": "0",
+            "revel": ".",
+            "polyphen": ".",
+            "hgvsc": ".",
+            "hgvsp": ".",
+            "sex": "XY",
+            "dnm": ".",
+            "gt": "0/1",
+            "gq": "50",
+            "pid": ".",
+            "protein_position": "1",
+            "ad": "4,4",
+            "ac_XX": "0",
+            "ac_XY": "0",
+            "an_XX": "0",
+            "an_XY": "0",
+            "nhomalt_XX": "0",
+            "nhomalt_XY": "0",
+        }
+        variants = {"child": {}, "mum": {}, "dad": {}}
+        pos = 0
+        for chrom, hgncid in [("5", "1"), ("X", "2"), ("Y", "3"), ("X", "4"), ("1", "5")]:
+            for child_gt in ["0/0", "0/1", "1/1"]:
+                for ad in ["4,4", "1,9"]:
+                    for mum_gt in ["0/0", "0/1", "1/1"]:
+                        for dad_gt in ["0/0", "0/1", "1/1"]:
+                            pos += 1
+                            var = dict(vardata, chrom=chrom, pos=str(pos), hgnc_id=hgncid, gt=child_gt, ad=ad)
+                            vid = chrom + "_" + str(pos) + "_A_G"
+                            variants["child"][vid] = var
+                            if mum_gt != "0/0":
+                                variants["mum"][vid] = dict(var, gt=mum_gt, sex="XX")
+                            if dad_gt != "0/0":
+                                variants["dad"][vid] = dict(var, gt=dad_gt)
+
+        families = []
+        for sex in ["XX", "XY", "XXY"]:
+            child = create_test_person("fam", "child_id", "dad_id", "mum_id", sex, "2", "/vcf/path")
+            for mum_aff in ["1", "2"]:
+                for dad_aff in ["1", "2"]:
+                    mum = create_test_person("fam", "mum_id", "0", "0", "XX", mum_aff, "/vcf/path")
+                    dad = create_test_person("fam", "dad_id", "0", "0", "XY", dad_aff, "/vcf/path")
+                    families.append(create_test_family(child, mum, dad))
+            child = create_test_person("fam", "child_id", "0", "0", sex, "2", "/vcf/path")
+            families.append(create_test_family(child, None, None))
+
+        for family in families:
+            variants_per_gene = create_test_variants_per_gene(variants, family)
+            results = []
+            for batch in [True, False]:
+                candidates = {"single_variants": {}, "compound_hets": {}}
+                report = InheritanceReport()
+                InheritanceFiltering(
+                    variants_per_gene, family, genes, None, None, candidates, report, batch
+                ).inheritance_filter_genes()
+                results.append((candidates, report.inheritance_report))
+            self.assertEqual(results[0], results[1])
+            self.assertTrue(results[0][0]["single_variants"])
+
+if __name__ == "__main__":
+    unittest.main()
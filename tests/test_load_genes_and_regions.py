@@ -21,10 +21,12 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import pickle
 import unittest
 import tempfile
 
-from file_loading.load_genes_and_regions import load_genes
+from file_loading.gene_catalog import GeneCatalog
+from file_loading.load_genes_and_regions import load_genes, gene_regions
 
 
 class TestLoadGenesRegions(unittest.TestCase):
@@ -68,6 +70,62 @@ class TestLoadGenesRegions(unittest.TestCase):
             },
         )
 
+    def test_gene_regions(self):
+        """padded gene regions are merged where they overlap"""
+        genes = load_genes(self.path)
+        genes["1"] = {"chr": "4", "start": "8880000", "end": "8890000"}
+        genes["2"] = {"chr": "X", "start": "100", "end": "200"}
+        self.assertEqual(gene_regions(genes), ["4\t8846076\t8871839", "4\t8880000\t8890000", "X\t100\t200"])
+        self.assertEqual(gene_regions(genes, 5000), ["4\t8841076\t8895000", "X\t1\t5200"])
+
+    def test_gene_catalog(self):
+        """the catalog is a read-only mapping of the genes in the file"""
+        with open(self.path, "a") as f:
+            f.write(("\t").join(["4", "8846076", "8871839", "HMX1", "5017", "Confirmed DD gene", "Monoallelic"]))
+            f.write("\t" + ("\t").join(["Loss of function", "SYNDROME"]) + "\n")
+            f.write(("\t").join(["4", "100", "200", "G2", "2", "Confirmed DD gene", "Monoallelic", "Loss of function"]))
+            f.write("\tSYNDROME\n")
+        catalog = GeneCatalog.from_file(self.path)
+        self.assertEqual(list(catalog.keys()), ["5017", "2"])
+        self.assertEqual(catalog["5017"]["mode"], frozenset({"Biallelic", "Monoallelic"}))
+        self.assertEqual(catalog["5017"]["status"], {"Probable DD gene", "Confirmed DD gene"})
+        self.assertEqual(catalog.get("1"), None)
+        self.assertIn("2", catalog)
+        self.assertEqual(catalog.as_dict(), load_genes(self.path))
+        self.assertIs(catalog["5017"]["chr"], catalog["2"]["chr"])
+        self.assertEqual(catalog.chromosomes(), ["4"])
+        self.assertEqual(catalog.genes_on("4"), ("2", "5017"))
+        self.assertEqual(catalog.genes_on("X"), ())
+        self.assertEqual(gene_regions(catalog), ["4\t100\t200", "4\t8846076\t8871839"])
+        # regions from the index match those merged from the genes
+        rows = []
+        for chrom, start, end, hgnc_id in [
+            ("4", "8846076", "8871839", "5017"),
+            ("X", "5000", "9000", "3"),
+            ("4", "150", "300", "4"),
+            ("4", "100", "200", "2"),
+            ("X", "10", "20", "5"),
+        ]:
+            rows.append([chrom, start, end, "G" + hgnc_id, hgnc_id, "Confirmed DD gene", "Biallelic", "Other"])
+        for padding in [0, 5000, 10000000]:
+            for genes in [catalog, GeneCatalog(rows)]:
+                self.assertEqual(gene_regions(genes, padding), gene_regions(genes.as_dict(), padding))
+        self.assertEqual(
+            gene_regions(GeneCatalog(rows)), ["4\t100\t300", "4\t8846076\t8871839", "X\t10\t20", "X\t5000\t9000"]
+        )
+
+        with self.assertRaises(TypeError):
+            catalog["3"] = catalog["2"]
+        with self.assertRaises(TypeError):
+            catalog["2"]["symbol"] = "G3"
+        with self.assertRaises(AttributeError):
+            catalog["2"]["mode"].add("Biallelic")
+
+        copy = pickle.loads(pickle.dumps(catalog))
+        self.assertEqual(copy, catalog)
+        self.assertEqual(copy["2"]["mode"], frozenset({"Monoallelic"}))
+        self.assertEqual(copy.genes_on("4"), ("2", "5017"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -24,7 +24,7 @@ THE SOFTWARE.
 import unittest
 import tempfile
 from family.families import Person, Family
-from file_loading.ped_files import openped
+from file_loading.ped_files import openped, order_families, vcfs_done
 
 
 class TestLoadPed(unittest.TestCase):
@@ -398,6 +398,42 @@ class TestLoadPed(unittest.TestCase):
         self.assertTrue(affstatus)
         self.assertFalse(unaffstatus)
 
+    def test_open_ped_sample_ids(self):
+        """the optional eighth column names the sample in a multi-sample VCF"""
+        pedfile = tempfile.NamedTemporaryFile(mode="w")
+        pedfile.write("fam_ID   proband   dad   mum   XX  2  /path/to/trio_vcf.gz  proband_s\n")
+        pedfile.write("fam_ID   dad       0     0     XY  1  /path/to/trio_vcf.gz  dad_s\n")
+        pedfile.write("fam_ID   mum       0     0     XX  1  /path/to/mum_vcf.gz\n")
+        pedfile.flush()
+        family = openped(pedfile.name, None)["fam_ID_proband"]
+        self.assertEqual(family.proband.get_sample_id(), "proband_s")
+        self.assertEqual(family.dad.get_sample_id(), "dad_s")
+        self.assertEqual(family.mum.get_sample_id(), None)
+        # the mother's genotypes are in another VCF
+        self.assertFalse(family.is_joint())
+        family.mum = Person("fam_ID", "mum", "0", "0", "XX", "1", "/path/to/trio_vcf.gz", "mum_s")
+        self.assertTrue(family.is_joint())
+
+    def test_order_families(self):
+        """families sharing a parent are analysed one after another"""
+        mum1 = Person("fam1", "mum1", "0", "0", "XX", "1", "/path/to/mum1_vcf.gz")
+        mum2 = Person("fam2", "mum2", "0", "0", "XX", "1", "/path/to/mum2_vcf.gz")
+        dad = Person("fam1", "dad", "0", "0", "XY", "1", "/path/to/dad_vcf.gz")
+        families = {
+            "fam1_a": Family(Person("fam1", "a", "dad", "mum1", "XX", "2", "/path/to/a_vcf.gz"), mum1, dad),
+            "fam2_b": Family(Person("fam2", "b", "0", "mum2", "XX", "2", "/path/to/b_vcf.gz"), mum2, None),
+            "fam3_c": Family(Person("fam3", "c", "0", "0", "XX", "2", "/path/to/c_vcf.gz"), None, None),
+            "fam2_d": Family(Person("fam2", "d", "0", "mum2", "XY", "2", "/path/to/d_vcf.gz"), mum2, None),
+            "fam1_e": Family(Person("fam1", "e", "dad", "0", "XY", "2", "/path/to/e_vcf.gz"), None, dad),
+        }
+        self.assertEqual(order_families(families), ["fam1_a", "fam1_e", "fam2_b", "fam2_d", "fam3_c"])
+        # each VCF is released after the last family using it
+        done = vcfs_done(families, order_families(families))
+        self.assertEqual(done["fam1_a"], ["/path/to/a_vcf.gz", "/path/to/mum1_vcf.gz"])
+        self.assertEqual(done["fam1_e"], ["/path/to/dad_vcf.gz", "/path/to/e_vcf.gz"])
+        self.assertEqual(done["fam2_b"], ["/path/to/b_vcf.gz"])
+        self.assertEqual(done["fam2_d"], ["/path/to/mum2_vcf.gz", "/path/to/d_vcf.gz"])
+        self.assertEqual(done["fam3_c"], ["/path/to/c_vcf.gz"])
 
 if __name__ == "__main__":
     unittest.main()
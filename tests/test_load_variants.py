@@ -21,12 +21,38 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+import os
+import shutil
+import subprocess
 import unittest
 import tempfile
+from unittest import mock
 
 from variants.snv import SNV
 from variants.cnv import CNV
-from file_loading.load_vcfs import readvcf
+from file_loading.load_vcfs import readvcf, load_variants, query_bcftools, streamcommand, sort_regions, decode_all
+from file_loading.load_vcfs import load_trio_concurrent, query_rows
+from file_loading.vcf_reader import VcfReader, match_contigs, merge_regions, plan_lookup
+from file_loading.vcf_schema import child_schema, PARENT_ATTRIBUTES
+from variants.fields import FIELDS
+from file_loading.parent_cache import ParentCache
+from file_loading.variant_cache import VariantCache
+from filtering.pushdown import PreInheritancePushdown
+from filtering.preinheritance_filtering import PreInheritanceFiltering
+from variants.trio_genotype import add_trio_genotypes, HOM_ALT
+from tests.test_utils import create_test_person, create_test_family
+from family.families import Person
+from file_loading.tabix import write_bgzf, write_tabix_index
+
+
+def variant_values(var):
+    """all attributes of a variant object, decoding any deferred fields"""
+    values = dict(var.__dict__)
+    for cls in type(var).__mro__:
+        for attribute in getattr(cls, "__slots__", []):
+            if attribute not in ["__dict__", "deferred"] and hasattr(var, attribute):
+                values[attribute] = getattr(var, attribute)
+    return values
 
 
 class TestLoadVariants(unittest.TestCase):
@@ -199,7 +225,7 @@ class TestLoadVariants(unittest.TestCase):
         self.tempfile.flush()
 
         self.assertEqual(
-            readvcf(self.path, None, "XY"),
+            readvcf(self.path, None, "XY", loader="python"),
             {
                 "1_1339911_A_G": SNV(
                     {
@@ -224,6 +250,10 @@ class TestLoadVariants(unittest.TestCase):
                         "dnm": ".",
                         "gt": "1/1",
                         "gq": "99",
+                        "ac_XX": ".",
+                        "ac_XY": ".",
+                        "nhomalt_XX": ".",
+                        "nhomalt_XY": ".",
                         "sex": "XY",
                     }
                 ),
@@ -250,6 +280,10 @@ class TestLoadVariants(unittest.TestCase):
                         "dnm": ".",
                         "gt": "1/1",
                         "gq": "99",
+                        "ac_XX": ".",
+                        "ac_XY": ".",
+                        "nhomalt_XX": ".",
+                        "nhomalt_XY": ".",
                         "sex": "XY",
                     }
                 ),
@@ -265,7 +299,7 @@ class TestLoadVariants(unittest.TestCase):
         self.tempfile.flush()
 
         self.assertEqual(
-            readvcf(self.path, None, "XY"),
+            readvcf(self.path, None, "XY", loader="python"),
             {
                 "1_123456_T_<DEL>": CNV(
                     {
@@ -291,6 +325,596 @@ class TestLoadVariants(unittest.TestCase):
             },
         )
 
+    def test_load_projection(self):
+        """fields not queried are set to ".", parents only get genotypes"""
+        self.tempfile = tempfile.NamedTemporaryFile(mode="w")
+        self.path = self.tempfile.name
+        self.tempfile.write(self.vcfheader)
+        self.tempfile.write(self.variantline)
+        self.tempfile.flush()
+
+        child = readvcf(self.path, None, "XY", loader="python")["1_1339911_A_G"]
+        self.assertEqual(child.symbol, "MECP1")
+        self.assertEqual(child.revel, "0.8")
+        self.assertEqual(child.gq, "99")
+        self.assertEqual(child.vaf, ".")
+        self.assertEqual(child.cnv_end, ".")
+
+        parent = readvcf(self.path, None, "F", parent=True, loader="python")["1_1339911_A_G"]
+        self.assertEqual(parent.gt, "1/1")
+        self.assertEqual(parent.genotype, HOM_ALT)
+        self.assertEqual(parent.symbol, ".")
+        self.assertEqual(parent.gq, ".")
+
+    def test_load_pushdown(self):
+        """rows failing pre-inheritance filters are excluded and counted"""
+        self.tempfile = tempfile.NamedTemporaryFile(mode="w")
+        self.path = self.tempfile.name
+        self.tempfile.write(self.vcfheader)
+        self.tempfile.write(self.variantline)
+        self.tempfile.write(self.var3variantline.replace("REVEL=0.8", "REVEL=0.1"))
+        self.tempfile.write(self.cnvline)
+        self.tempfile.flush()
+
+        pushdown = PreInheritancePushdown()
+        variants = readvcf(self.path, None, "XY", pushdown=pushdown, loader="python")
+        self.assertEqual(list(variants.keys()), ["1_1339911_A_G", "1_123456_T_<DEL>"])
+        self.assertEqual(
+            pushdown.counts, {"low_gq": 0, "high_ddd_af": 0, "no_functional_consequence": 0, "low_revel": 1}
+        )
+
+    def test_deferred_fields(self):
+        """output only fields are not decoded for variants which are filtered out"""
+        self.tempfile = tempfile.NamedTemporaryFile(mode="w")
+        self.path = self.tempfile.name
+        self.tempfile.write(self.vcfheader)
+        self.tempfile.write(self.variantline)
+        self.tempfile.write(self.var3variantline.replace("REVEL=0.8", "REVEL=0.1"))
+        self.tempfile.flush()
+
+        variants = readvcf(self.path, None, "XY", loader="python")
+        for var in variants.values():
+            with self.assertRaises(AttributeError):
+                object.__getattribute__(var, "hgvsc")
+        per_gene = PreInheritanceFiltering({"child": variants, "mum": {}, "dad": {}}).preinheritance_filter()
+        self.assertEqual(list(per_gene["123"].keys()), ["1_1339911_A_G"])
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(variants["1_1449915_A_G"], "hgvsc")
+
+        kept = variants["1_1339911_A_G"]
+        self.assertEqual(kept.hgvsc, "string")
+        self.assertEqual(object.__getattribute__(kept, "feature"), "ENST01234")
+        self.assertEqual(kept.deferred, None)
+        with self.assertRaises(AttributeError):
+            kept.not_a_field
+
+    def test_from_row(self):
+        """variants built from query rows match those built from a dict"""
+        info_types = {}
+        for attribute, column, tag in FIELDS:
+            if column == "INFO":
+                info_types[tag] = ("1", "String")
+        schema = child_schema(info_types, {"GT": ("1", "String"), "GQ": ("1", "Integer")})
+        row = ["chr1", "100", "A", "G"] + ["." for tag in schema.infofields] + ["1|0", "99"]
+        row[4 + schema.infofields.index("HGNC_ID")] = "HGNC:123"
+        for var in [SNV, CNV]:
+            fromrow = var.from_row(schema, row, "XX")
+            fromdict = var(schema.vardata(row, "XX"))
+            self.assertEqual(variant_values(fromrow), variant_values(fromdict))
+            self.assertEqual(fromrow.__dict__, {})
+        self.assertEqual(fromrow.chrom, "1")
+        self.assertEqual(fromrow.hgnc_id, "123")
+        self.assertEqual(SNV.from_row(schema, row, "XX").gt, "0/1")
+
+    def test_missing_required_field(self):
+        """a VCF without a required header field fails before loading"""
+        self.tempfile = tempfile.NamedTemporaryFile(mode="w")
+        self.path = self.tempfile.name
+        self.tempfile.write(self.vcfheader.replace("##INFO=<ID=HGNC_ID,", "##INFO=<ID=HGNC,"))
+        self.tempfile.write(self.variantline)
+        self.tempfile.flush()
+
+        with self.assertRaises(ValueError):
+            readvcf(self.path, None, "XY", loader="python")
+        # parents only need GT
+        self.assertEqual(list(readvcf(self.path, None, "F", parent=True, loader="python").keys()), ["1_1339911_A_G"])
+
+
+class TestVcfReader(unittest.TestCase):
+    """compare the in-process VCF reader with the bcftools pipeline"""
+
+    def setUp(self):
+        self.maxDiff = None
+        self.tempdir = tempfile.mkdtemp()
+        self.header = [
+            "##fileformat=VCFv4.2",
+            "##contig=<ID=1,length=248956422>",
+            "##contig=<ID=X,length=156040895>",
+            '##INFO=<ID=Consequence,Number=A,Type=String,Description="Consequence">',
+            '##INFO=<ID=SYMBOL,Number=A,Type=String,Description="SYMBOL">',
+            '##INFO=<ID=HGNC_ID,Number=A,Type=String,Description="HGNC_ID">',
+            '##INFO=<ID=MAX_AF,Number=A,Type=Float,Description="MAX_AF">',
+            '##INFO=<ID=DDD_AF,Number=A,Type=Float,Description="DDD_AF">',
+            '##INFO=<ID=DNG,Number=0,Type=Flag,Description="DNG">',
+            '##INFO=<ID=END,Number=1,Type=Integer,Description="END">',
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+            '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype Quality">',
+            '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">',
+            '##FORMAT=<ID=CN,Number=1,Type=Integer,Description="Copy number">',
+            "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "sample1"]),
+        ]
+        self.records = [
+            # multiallelic, second allele is common
+            [
+                "1",
+                "1000",
+                ".",
+                "A",
+                "G,T",
+                ".",
+                ".",
+                "Consequence=missense_variant,stop_gained;HGNC_ID=HGNC:1,HGNC:1;MAX_AF=0.001,0.1;DDD_AF=0.50,.",
+                "GT:GQ:AD",
+                "1/2:60:3,5,6",
+            ],
+            # hom ref after splitting for the G allele
+            ["1", "2000", ".", "C", "G,CT", ".", ".", "MAX_AF=.,.;DNG", "GT:GQ:AD", "2/2:99:0,0,20"],
+            # hom ref
+            ["1", "3000", ".", "G", "A", ".", ".", "MAX_AF=0", "GT:GQ", "0/0:99"],
+            ["1", "4000", ".", "TTA", "T", ".", ".", "MAX_AF=1e-06;DDD_AF=0.00010", "GT:GQ:AD", "0|1:050:7,2"],
+            ["1", "5000", ".", "G", "<DEL>", ".", ".", "END=90000", "GT:CN", "0/1:1"],
+            ["X", "100", ".", "A", "C", ".", ".", ".", "GT", "1"],
+        ]
+
+    def write_vcf(self):
+        """write the test records to a bgzipped and tabix indexed VCF"""
+        path = os.path.join(self.tempdir, "test.vcf.gz")
+        lines = [l + "\n" for l in self.header] + ["\t".join(r) + "\n" for r in self.records]
+        offsets = write_bgzf(path, lines)
+        index = []
+        for i, r in enumerate(self.records):
+            beg = int(r[1]) - 1
+            end = beg + len(r[3])
+            if r[7].startswith("END="):
+                end = int(r[7][4:])
+            index.append((r[0], beg, end, offsets[len(self.header) + i], offsets[len(self.header) + i + 1]))
+        write_tabix_index(path, index)
+        return path
+
+    def query(self, path, regions, infofields, formatfields, loader="python"):
+        """the child's query rows from the loader, reduced to the given fields"""
+        info_types, format_types, rows, loader = query_rows(path, regions, loader, False, None, None, None, None)
+        schema = child_schema(info_types, format_types)
+        columns = ["CHROM", "POS", "REF", "ALT"] + schema.infofields + schema.formatfields
+        selected = [0, 1, 2, 3] + [columns.index(field) for field in infofields + formatfields]
+        return [[row[i] for i in selected] for row in rows if len(row) > 1]
+
+    def test_query_vcf(self):
+        """multiallelic records are split and common/hom ref alleles excluded"""
+        path = self.write_vcf()
+        rows = self.query(path, None, ["Consequence", "MAX_AF", "DDD_AF", "DNG", "END"], ["GT", "GQ", "AD", "CN"])
+        self.assertEqual(
+            rows,
+            [
+                ["1", "1000", "A", "G", "missense_variant", "0.001", "0.5", ".", ".", "1/0", "60", "3,5", "."],
+                ["1", "2000", "C", "CT", ".", ".", ".", "1", ".", "1/1", "99", "0,20", "."],
+                ["1", "4000", "TTA", "T", ".", "1e-06", "0.0001", ".", ".", "0|1", "50", "7,2", "."],
+                ["1", "5000", "G", "<DEL>", ".", ".", ".", ".", "90000", "0/1", ".", ".", "1"],
+                ["X", "100", "A", "C", ".", ".", ".", ".", ".", "1", ".", ".", "."],
+            ],
+        )
+
+    @mock.patch("file_loading.vcf_reader.SEEK_COST", 0)
+    def test_query_vcf_regions(self):
+        """indexed region queries include records overlapping the regions"""
+        path = self.write_vcf()
+        regions = [("1", 4001, 4001), ("1", 60000, 60000), ("X", 50, 150)]
+        rows = self.query(path, regions, ["MAX_AF"], ["GT"])
+        self.assertEqual(
+            rows,
+            [
+                ["1", "4000", "TTA", "T", "1e-06", "0|1"],
+                ["1", "5000", "G", "<DEL>", ".", "0/1"],
+                ["X", "100", "A", "C", ".", "1"],
+            ],
+        )
+        # same records without using the index
+        os.remove(path + ".tbi")
+        self.assertEqual(self.query(path, regions, ["MAX_AF"], ["GT"]), rows)
+
+    @unittest.skipIf(
+        shutil.which("bcftools") is None and not os.environ.get("CLINICAL_FILTER_REQUIRE_BCFTOOLS"),
+        "bcftools not available",
+    )
+    def test_bcftools_differential(self):
+        """in-process reader output, and region queries using the written tabix index, match the bcftools pipeline"""
+        path = self.write_vcf()
+        reader = VcfReader(path)
+        schema = child_schema(reader.info_types, reader.format_types)
+        infofields = schema.infofields
+        formatfields = schema.formatfields
+        self.assertEqual(
+            self.query(path, None, infofields, formatfields),
+            [r for r in query_bcftools(path, None, infofields, formatfields) if len(r) > 1],
+        )
+        regions = [("1", 4001, 4001), ("1", 60000, 60000), ("X", 50, 150)]
+        self.assertEqual(
+            self.query(path, regions, infofields, formatfields),
+            [r for r in query_bcftools(path, regions, infofields, formatfields) if len(r) > 1],
+        )
+        # both loaders give the same rows through query_rows
+        self.assertEqual(
+            self.query(path, regions, infofields, formatfields),
+            self.query(path, regions, infofields, formatfields, loader="bcftools"),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+
+class TestLargeCnvs(unittest.TestCase):
+    """large CNVs are found outside the regions through the index"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write_vcf(self):
+        header = [
+            "##fileformat=VCFv4.2",
+            "##contig=<ID=chr1>",
+            "##contig=<ID=chr2>",
+            '##INFO=<ID=END,Number=1,Type=Integer,Description="END">',
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+            "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "sample1"]),
+        ]
+        records = []
+        for chrom in ["chr1", "chr2"]:
+            for pos in range(1000, 6000000, 2500):
+                records.append([chrom, str(pos), ".", "A", "G", ".", ".", ".", "GT", "0/1"])
+        # CNVs of 1Mb + 1, 1Mb and one spanning a 1Mb bin boundary
+        records.append(["chr2", "3000000", ".", "T", "<DEL>", ".", ".", "END=4000000", "GT", "0/1"])
+        records.append(["chr2", "3000001", ".", "T", "<DUP>", ".", ".", "END=4000000", "GT", "0/1"])
+        records.append(["chr2", "4194000", ".", "T", "<DEL>", ".", ".", "END=4195000", "GT", "0/1"])
+        records.sort(key=lambda r: (r[0], int(r[1])))
+        path = os.path.join(self.tempdir, "test.vcf.gz")
+        offsets = write_bgzf(path, [l + "\n" for l in header] + ["\t".join(r) + "\n" for r in records])
+        index = []
+        for i, r in enumerate(records):
+            beg = int(r[1]) - 1
+            end = int(r[7][4:]) if r[7].startswith("END=") else beg + len(r[3])
+            index.append((r[0], beg, end, offsets[len(header) + i], offsets[len(header) + i + 1]))
+        write_tabix_index(path, index)
+        return path
+
+    @mock.patch("file_loading.vcf_reader.SEEK_COST", 0)
+    def test_large_cnvs(self):
+        path = self.write_vcf()
+        regions = match_contigs([("1", 2000, 6000), ("3", 1, 100)], VcfReader(path).contigs)
+        self.assertEqual(regions, [("chr1", 2000, 6000), ("3", 1, 100)])
+        rows = list(VcfReader(path).query([], ["GT"], regions, large_cnvs=1000000))
+        self.assertEqual(
+            [r[:4] for r in rows],
+            [["chr1", "3500", "A", "G"], ["chr1", "6000", "A", "G"], ["chr2", "3000000", "T", "<DEL>"]],
+        )
+        # same records when streaming without the index
+        os.remove(path + ".tbi")
+        self.assertEqual(list(VcfReader(path).query([], ["GT"], regions, large_cnvs=1000000)), rows)
+
+    @mock.patch("file_loading.vcf_reader.SEEK_COST", 4000)
+    def test_plan_lookup(self):
+        """sparse sites are read through the index, dense sites by streaming"""
+        path = self.write_vcf()
+        sparse = merge_regions([("chr1", 1000, 1000), ("chr1", 3500, 3500), ("chr2", 5998500, 5998500)])
+        plan = plan_lookup(path, sparse)
+        self.assertEqual(list(plan.keys()), ["chr1", "chr2"])
+        # nearby sites are coalesced into one window
+        self.assertEqual(len(plan["chr1"]), 1)
+        sites = []
+        for chrom in ["chr1", "chr2"]:
+            sites.extend([(chrom, pos, pos) for pos in range(1000, 6000000, 25000)])
+        self.assertEqual(plan_lookup(path, merge_regions(sites)), None)
+        # streaming gives the same records as the index, including the two
+        # CNVs overlapping sites
+        streamed = list(VcfReader(path).query([], ["GT"], sites))
+        self.assertEqual(len(streamed), len(sites) + 2)
+        with mock.patch("file_loading.vcf_reader.SEEK_COST", 0):
+            self.assertNotEqual(plan_lookup(path, merge_regions(sites)), None)
+            self.assertEqual(list(VcfReader(path).query([], ["GT"], sites)), streamed)
+
+    def test_variant_cache_table(self):
+        """cached tables select the same rows as the reader"""
+        path = self.write_vcf()
+        cache = VariantCache(os.path.join(self.tempdir, "cache"))
+        table = cache.table(path, PARENT_ATTRIBUTES, lambda: decode_all(path, "python", True))
+        reader = VcfReader(path)
+        self.assertEqual(list(table.query()), list(reader.query([], ["GT"])))
+        regions = [("chr1", 2000, 6000), ("chr2", 3999000, 4194500)]
+        self.assertEqual(
+            list(table.query(regions, large_cnvs=1000000)),
+            list(reader.query([], ["GT"], regions, large_cnvs=1000000)),
+        )
+        sites = []
+        for chrom in ["chr1", "chr2"]:
+            sites.extend([(chrom, pos, pos) for pos in range(1000, 6000000, 25000)])
+        self.assertEqual(list(table.query(sites)), list(reader.query([], ["GT"], sites)))
+
+        # reopened from the file, the distinct values are decoded when used
+        table = VariantCache(os.path.join(self.tempdir, "cache")).table(path, PARENT_ATTRIBUTES, None)
+        self.assertEqual(table.values[0].decoded, [None] * len(table.values[0]))
+        self.assertEqual(list(table.query()), list(reader.query([], ["GT"])))
+        self.assertNotIn(None, table.values[0].decoded)
+
+
+class TestLoadTrio(unittest.TestCase):
+    """load a trio sequentially and concurrently"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.header = [
+            "##fileformat=VCFv4.2",
+            '##INFO=<ID=Consequence,Number=A,Type=String,Description="Consequence">',
+            '##INFO=<ID=SYMBOL,Number=A,Type=String,Description="SYMBOL">',
+            '##INFO=<ID=HGNC_ID,Number=A,Type=String,Description="HGNC_ID">',
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+            '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype Quality">',
+            "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "sample1"]),
+        ]
+        info = "Consequence=missense_variant;SYMBOL=MECP1;HGNC_ID=HGNC:123"
+        self.child = [
+            ["1", "100", ".", "A", "G", ".", ".", info, "GT:GQ", "0/1:99"],
+            ["1", "200", ".", "C", "T", ".", ".", info, "GT:GQ", "0/1:99"],
+            ["2", "300", ".", "G", "A", ".", ".", info, "GT:GQ", "1/1:99"],
+            ["X", "400", ".", "T", "C", ".", ".", info, "GT:GQ", "0/1:99"],
+        ]
+        self.mum = [
+            ["1", "100", ".", "A", "G", ".", ".", ".", "GT", "0/1"],
+            ["1", "150", ".", "A", "G", ".", ".", ".", "GT", "0/1"],
+            ["2", "300", ".", "G", "A", ".", ".", ".", "GT", "0/1"],
+        ]
+        self.dad = [
+            ["1", "200", ".", "C", "T", ".", ".", ".", "GT", "1/1"],
+            ["X", "400", ".", "T", "C", ".", ".", ".", "GT", "0/1"],
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write_vcf(self, name, records):
+        path = os.path.join(self.tempdir, name + ".vcf")
+        with open(path, "w") as f:
+            for line in self.header:
+                f.write(line + "\n")
+            for r in records:
+                f.write("\t".join(r) + "\n")
+        return path
+
+    def create_family(self):
+        child = create_test_person("fam1", "child", "dad", "mum", "XX", "2", self.write_vcf("child", self.child))
+        mum = create_test_person("fam1", "mum", "0", "0", "XX", "1", self.write_vcf("mum", self.mum))
+        dad = create_test_person("fam1", "dad", "0", "0", "XY", "1", self.write_vcf("dad", self.dad))
+        return create_test_family(child, mum, dad)
+
+    def test_load_concurrent(self):
+        """concurrent loading gives the same variants as sequential loading"""
+        family = self.create_family()
+        sequential = load_variants(family, loader="python")
+        concurrent = dict(zip(["child", "mum", "dad"], load_trio_concurrent(family, None, "python", None, 3)))
+        self.assertEqual(list(sequential["mum"].keys()), ["1_100_A_G", "2_300_G_A"])
+        self.assertEqual(list(sequential["dad"].keys()), ["1_200_C_T", "X_400_T_C"])
+        # child restricted to regions, given in any order
+        regional = load_variants(family, ["2\t1\t1000", "1\t150\t250"], threads=3, loader="python")
+        self.assertEqual(list(regional["child"].keys()), ["1_200_C_T", "2_300_G_A"])
+        self.assertEqual(list(regional["mum"].keys()), ["2_300_G_A"])
+        self.assertEqual(list(regional["dad"].keys()), ["1_200_C_T"])
+        for person in ["child", "mum", "dad"]:
+            self.assertEqual(sorted(concurrent[person].keys()), sorted(sequential[person].keys()))
+            for varid in sequential[person].keys():
+                self.assertEqual(concurrent[person][varid].gt, sequential[person][varid].gt)
+
+    def test_parent_cache(self):
+        """cached parental variants match uncached loading and are reused"""
+        family = self.create_family()
+        uncached = load_variants(family, loader="python")
+        cache = ParentCache(100)
+        regional = load_variants(family, ["1\t150\t250"], parent_cache=cache, loader="python")
+        self.assertEqual(list(regional["dad"].keys()), ["1_200_C_T"])
+        self.assertEqual(cache.misses, 2)
+        for threads in [1, 3]:
+            cached = load_variants(family, threads=threads, parent_cache=cache, loader="python")
+            for person in ["mum", "dad"]:
+                self.assertEqual(sorted(cached[person].keys()), sorted(uncached[person].keys()))
+        # only the sites outside the first region were read
+        self.assertEqual(cache.misses, 8)
+        self.assertEqual(cache.hits, 10)
+
+        # a changed file is read again
+        self.mum[0][2] = "rs1"
+        self.mum[0][9] = "1/1"
+        self.write_vcf("mum", self.mum)
+        cached = load_variants(family, parent_cache=cache, loader="python")
+        self.assertEqual(cached["mum"]["1_100_A_G"].gt, "1/1")
+
+        # least recently used parents are evicted
+        cache = ParentCache(4)
+        load_variants(family, parent_cache=cache, loader="python")
+        self.assertEqual(list(cache.entries.keys()), [(family.dad.get_vcf_path(), None, "M")])
+        self.assertEqual(cache.size, 4)
+
+        # a parent no other family needs is released after its family
+        cache = ParentCache(100)
+        load_variants(family, parent_cache=cache, loader="python")
+        cache.release(family.mum.get_vcf_path())
+        self.assertEqual(list(cache.entries.keys()), [(family.dad.get_vcf_path(), None, "M")])
+        self.assertEqual(cache.size, 4)
+
+    def test_variant_cache(self):
+        """variants read from the cache match those decoded from the VCFs"""
+        family = self.create_family()
+        cachedir = os.path.join(self.tempdir, "cache")
+        uncached = load_variants(family, loader="python")
+        uncached_regional = load_variants(family, ["1\t150\t250"], pushdown=PreInheritancePushdown(), loader="python")
+        load_variants(family, variant_cache=VariantCache(cachedir), loader="python")
+        self.assertEqual(len(os.listdir(cachedir)), 3)
+
+        # a later run reads the cache without decoding the VCFs
+        with mock.patch("file_loading.load_vcfs.decode_all") as decode:
+            for threads in [1, 3]:
+                cached = load_variants(family, threads=threads, variant_cache=VariantCache(cachedir), loader="python")
+                for person in ["child", "mum", "dad"]:
+                    self.assertEqual(list(cached[person].keys()), list(uncached[person].keys()))
+                    for varid in uncached[person].keys():
+                        self.assertEqual(variant_values(cached[person][varid]), variant_values(uncached[person][varid]))
+            regional = load_variants(
+                family,
+                ["1\t150\t250"],
+                loader="python",
+                pushdown=PreInheritancePushdown(),
+                variant_cache=VariantCache(cachedir),
+            )
+            self.assertEqual(decode.call_count, 0)
+        for person in ["child", "mum", "dad"]:
+            self.assertEqual(list(regional[person].keys()), list(uncached_regional[person].keys()))
+
+        # a changed VCF is decoded again
+        self.child.append(["X", "500", "rs1", "T", "C", ".", ".", self.child[0][7], "GT:GQ", "0/1:99"])
+        self.write_vcf("child", self.child)
+        cached = load_variants(family, variant_cache=VariantCache(cachedir), loader="python")
+        self.assertIn("X_500_T_C", cached["child"])
+        self.assertEqual(len(os.listdir(cachedir)), 3)
+
+        # released tables are dropped, so open tables don't build up across families
+        cache = VariantCache(cachedir)
+        for i in range(3):
+            load_variants(family, variant_cache=cache, loader="python")
+            self.assertEqual(len(cache.tables), 3)
+            for person in [family.proband, family.mum, family.dad]:
+                cache.release(person.get_vcf_path())
+            self.assertEqual(cache.tables, {})
+
+    def write_joint_vcf(self):
+        """the trio as one multi-sample VCF, samples not in trio order"""
+        header = self.header[:-1] + [self.header[-1].replace("sample1", "dad_s\tchild_s\tmum_s")]
+        sites = {}
+        for person, records in [("child", self.child), ("mum", self.mum), ("dad", self.dad)]:
+            for r in records:
+                site = sites.setdefault((r[0], int(r[1])), r[:8] + ["GT:GQ"])
+                if person == "child":
+                    site[7] = r[7]
+                site.append((person, r[9].split(":")[0] + ":99"))
+        path = os.path.join(self.tempdir, "joint.vcf")
+        with open(path, "w") as f:
+            for line in header:
+                f.write(line + "\n")
+            for key in sorted(sites.keys()):
+                site = sites[key]
+                gts = dict(site[9:])
+                samples = [gts.get(p, "0/0:99") for p in ["dad", "child", "mum"]]
+                f.write("\t".join(site[:9] + samples) + "\n")
+        return path
+
+    def test_load_joint(self):
+        """a joint-called trio gives the same variants as one VCF per person"""
+        separate = load_variants(self.create_family(), loader="python")
+        path = self.write_joint_vcf()
+        child = Person("fam1", "child", "dad", "mum", "XX", "2", path, "child_s")
+        mum = Person("fam1", "mum", "0", "0", "XX", "1", path, "mum_s")
+        dad = Person("fam1", "dad", "0", "0", "XY", "1", path, "dad_s")
+        family = create_test_family(child, mum, dad)
+        self.assertTrue(family.is_joint())
+        cachedir = os.path.join(self.tempdir, "cache")
+        for cache in [None, VariantCache(cachedir), VariantCache(cachedir)]:
+            joint = load_variants(family, variant_cache=cache, loader="python")
+            for person in ["child", "mum", "dad"]:
+                self.assertEqual(list(joint[person].keys()), list(separate[person].keys()))
+                for varid in separate[person].keys():
+                    self.assertEqual(joint[person][varid].gt, separate[person][varid].gt)
+
+        self.assertTrue(create_test_family(child, mum, None).is_joint())
+        self.assertFalse(create_test_family(child, None, None).is_joint())
+
+        # a single sample can be selected from a multi-sample VCF
+        mum_vars = readvcf(path, None, "F", parent=True, sample="mum_s", loader="python")
+        self.assertEqual(sorted(mum_vars.keys()), ["1_100_A_G", "1_150_A_G", "2_300_G_A"])
+        with self.assertRaises(ValueError):
+            readvcf(path, None, "F", parent=True, sample="missing", loader="python")
+
+    def test_load_columnar(self):
+        """columnar loading keeps the variants passing the pre-inheritance filters"""
+        info = self.child[0][7]
+        self.child.append(["1", "300", ".", "A", "G", ".", ".", info, "GT:GQ", "0/1:20"])
+        self.child.append(["3", "100", ".", "A", "G", ".", ".", info, "GT:GQ", "0/1:99"])
+        self.child.append(["3", "200", ".", "A", "G", ".", ".", "Consequence=intron_variant", "GT:GQ", "0/1:99"])
+        family = self.create_family()
+        objects = load_variants(family, loader="python")
+        add_trio_genotypes(family, objects)
+        with self.assertLogs(level="INFO") as logs:
+            expected = PreInheritanceFiltering(objects).preinheritance_filter()
+        expected_failures = sorted(failure_messages(logs.output))
+        for threads in [1, 3]:
+            with self.assertLogs(level="INFO") as logs:
+                columnar = load_variants(family, threads=threads, columnar=True, loader="python")
+            # the variants removed while loading are logged as the filter logs them
+            self.assertEqual(sorted(failure_messages(logs.output)), expected_failures)
+            self.assertEqual(list(columnar["child"].keys()), ["1_100_A_G", "1_200_C_T", "2_300_G_A", "X_400_T_C"])
+            # parents are only read at the sites passing the site filters
+            self.assertEqual(list(columnar["mum"].keys()), ["1_100_A_G", "2_300_G_A"])
+            add_trio_genotypes(family, columnar)
+            variants_per_gene = PreInheritanceFiltering(columnar).preinheritance_filter()
+            self.assertEqual(variants_per_gene.keys(), expected.keys())
+            for gene in expected.keys():
+                self.assertEqual(sorted(variants_per_gene[gene].keys()), sorted(expected[gene].keys()))
+                for varid in expected[gene].keys():
+                    self.assertEqual(
+                        variant_values(variants_per_gene[gene][varid]["child"]),
+                        variant_values(expected[gene][varid]["child"]),
+                    )
+
+        # a joint-called trio gives the same variants
+        path = self.write_joint_vcf()
+        child = Person("fam1", "child", "dad", "mum", "XX", "2", path, "child_s")
+        mum = Person("fam1", "mum", "0", "0", "XX", "1", path, "mum_s")
+        dad = Person("fam1", "dad", "0", "0", "XY", "1", path, "dad_s")
+        joint = load_variants(create_test_family(child, mum, dad), columnar=True, loader="python")
+        for person in ["child", "mum", "dad"]:
+            self.assertEqual(list(joint[person].keys()), list(columnar[person].keys()))
+
+
+def failure_messages(output):
+    """the per variant lines logged by the pre-inheritance filters"""
+    messages = [line.split(":", 2)[2] for line in output]
+    return [message for message in messages if " failed" in message and not message.startswith("Pre-inheritance")]
+
+
+class TestStreamCommand(unittest.TestCase):
+    def test_streamcommand(self):
+        """output is yielded line by line"""
+        self.assertEqual(list(streamcommand("printf 'a\\tb\\nc\\n'")), ["a\tb", "c"])
+
+    def test_streamcommand_failure(self):
+        """a failure anywhere in the pipeline raises an error"""
+        with self.assertRaises(subprocess.CalledProcessError):
+            list(streamcommand("false | cat"))
+
+    def test_streamcommand_input(self):
+        """input lines are fed to the pipeline through /dev/stdin"""
+        lines = [str(i) + "\n" for i in range(100000)]
+        self.assertEqual(list(streamcommand("tail -n 2 /dev/stdin", lines)), ["99998", "99999"])
+        # the pipeline exiting without reading its input is not an error
+        self.assertEqual(list(streamcommand("echo done", lines)), ["done"])
+
+
+class TestSortRegions(unittest.TestCase):
+    def test_sort_regions(self):
+        """chromosomes are sorted naturally then by position"""
+        regions = ["X\t5\t10", "10\t1\t2", "2\t300\t400", "2\t30\t40", "chr1\t7", "1\t9\t9"]
+        self.assertEqual(
+            sort_regions(regions),
+            [("1", 9, 9), ("2", 30, 40), ("2", 300, 400), ("10", 1, 2), ("X", 5, 10), ("chr1", 7, 7)],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -25,6 +25,8 @@ import unittest
 
 from tests.test_utils import create_test_snv
 from filtering.preinheritance_filtering import PreInheritanceFiltering
+from variants.variant import MISSING
+from variants.consequences import SO_BITS, consequence_mask, terms_mask
 
 
 class TestPreInheritanceFilter(unittest.TestCase):
@@ -63,6 +65,38 @@ class TestPreInheritanceFilter(unittest.TestCase):
         self.vardataX["chrom"] = "X"
         self.vardataX["ddd_father_af"] = "0.004"
 
+    def test_typed_fields(self):
+        """numeric fields are parsed once, keeping the strings for output"""
+        self.vardata["ad"] = "10,5"
+        self.vardata["SpliceAI_pred_DS_AG"] = "0.85"
+        testvar = create_test_snv(self.vardata)
+        self.assertEqual(testvar.gq_value, 50)
+        self.assertEqual(testvar.revel_value, 1.0)
+        self.assertEqual(testvar.SpliceAI_pred_DS_AG_value, 0.85)
+        self.assertEqual(testvar.ad_counts, (10, 5))
+        self.assertEqual(testvar.AC_het_count, -759)
+        self.assertIs(testvar.ddd_father_af_value, MISSING)
+        self.assertIs(testvar.SpliceAI_pred_DS_DL_value, MISSING)
+        self.assertEqual(testvar.revel, "1")
+
+        self.vardata["ad"] = "."
+        self.vardata["gq"] = "."
+        testvar = create_test_snv(self.vardata)
+        self.assertIs(testvar.ad_counts, MISSING)
+        self.assertIs(testvar.gq_value, MISSING)
+
+    def test_consequence_mask(self):
+        """consequences are encoded once as a mask of whole terms"""
+        self.vardata["consequence"] = "splice_region_variant&missense_variant&unknown_term"
+        testvar = create_test_snv(self.vardata)
+        self.assertEqual(testvar.consequence_mask, SO_BITS["splice_region_variant"] | SO_BITS["missense_variant"])
+        self.assertEqual(consequence_mask("."), 0)
+        self.assertEqual(consequence_mask("missense_variant_like"), 0)
+        self.assertTrue(testvar.consequence_mask & terms_mask(["stop_gained", "missense_variant"]))
+        self.assertFalse(testvar.consequence_mask & terms_mask(["synonymous_variant"]))
+        with self.assertRaises(ValueError):
+            terms_mask(["unknown_term"])
+
     def test_min_gq(self):
         # if GQ < 40 a variant should fail if in an autosome
         testvar = create_test_snv(self.vardata)
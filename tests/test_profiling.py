@@ -0,0 +1,148 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.test_utils import create_test_person, create_test_family
+from filtering.filter import Filter
+from utils.profiling import Profile, COLUMNS, run_peak_rss
+
+
+class TestProfile(unittest.TestCase):
+    """per stage measurements of filtering a trio"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        header = [
+            "##fileformat=VCFv4.2",
+            '##INFO=<ID=Consequence,Number=A,Type=String,Description="Consequence">',
+            '##INFO=<ID=SYMBOL,Number=A,Type=String,Description="SYMBOL">',
+            '##INFO=<ID=HGNC_ID,Number=A,Type=String,Description="HGNC_ID">',
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+            '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype Quality">',
+            "\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "sample1"]),
+        ]
+        info = "Consequence=missense_variant;SYMBOL=MECP1;HGNC_ID=HGNC:123"
+        records = {
+            "child": [
+                ["1", "100", ".", "A", "G", ".", ".", info, "GT:GQ", "0/1:99"],
+                ["1", "200", ".", "C", "T", ".", ".", info, "GT:GQ", "0/1:20"],
+                ["2", "300", ".", "G", "A", ".", ".", "Consequence=intron_variant", "GT:GQ", "1/1:99"],
+            ],
+            "mum": [["1", "100", ".", "A", "G", ".", ".", ".", "GT", "0/1"]],
+            "dad": [["1", "200", ".", "C", "T", ".", ".", ".", "GT", "1/1"]],
+        }
+        paths = {}
+        for name in records.keys():
+            paths[name] = os.path.join(self.tempdir, name + ".vcf")
+            with open(paths[name], "w") as f:
+                for line in header:
+                    f.write(line + "\n")
+                for r in records[name]:
+                    f.write("\t".join(r) + "\n")
+        child = create_test_person("fam1", "child", "dad", "mum", "XX", "2", paths["child"])
+        mum = create_test_person("fam1", "mum", "0", "0", "XX", "1", paths["mum"])
+        dad = create_test_person("fam1", "dad", "0", "0", "XY", "1", paths["dad"])
+        self.family = create_test_family(child, mum, dad)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def filter_trio(self, profile):
+        varfilter = Filter(self.family, None, None, None, self.tempdir, loader="python", profile=profile)
+        return varfilter.filter_trio()[0]
+
+    def test_profile(self):
+        profile = Profile(True)
+        candidates = self.filter_trio(profile)
+        self.assertEqual(self.filter_trio(Profile()).keys(), candidates.keys())
+        records = profile.records()
+        stages = [record["stage"] for record in records]
+        self.assertEqual(
+            stages,
+            [
+                "load",
+                "trio_genotypes",
+                "preinheritance",
+                "snv_inheritance",
+                "cnv_inheritance",
+                "compound_hets",
+                "postinheritance",
+            ],
+        )
+        rows = {}
+        for record in records:
+            rows[record["stage"]] = (record["rows_in"], record["rows_out"])
+            self.assertEqual(record["family_id"], "fam1")
+            self.assertEqual(record["proband"], "child")
+            self.assertGreaterEqual(record["wall_time"], 0)
+            self.assertGreater(record["rss"], 0)
+            self.assertEqual(type(record["rss_change"]), int)
+            self.assertGreaterEqual(record["peak_delta"], 0)
+        self.assertEqual(rows["load"], (None, 3))
+        self.assertEqual(rows["preinheritance"], (3, 1))
+        self.assertEqual(rows["cnv_inheritance"], (0, 0))
+
+        root = os.path.join(self.tempdir, "child_clinical_filter_profile")
+        profile.write(root)
+        with open(root + ".tsv") as f:
+            lines = [line.rstrip("\n").split("\t") for line in f]
+        self.assertEqual(lines[0], COLUMNS)
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[1][8:10], [".", "3"])
+        with open(root + ".json") as f:
+            written = json.load(f)
+        self.assertEqual(written["stages"], records)
+        self.assertEqual(written["totals"]["preinheritance"]["rows_out"], 1)
+        self.assertEqual(written["totals"]["load"]["families"], 1)
+        self.assertNotIn("rows_in", written["totals"]["load"])
+        self.assertGreaterEqual(written["peak_rss"], written["totals"]["postinheritance"]["rss"])
+
+    def test_peak_delta(self):
+        """a stage's peak memory includes what it allocated and freed"""
+        profile = Profile(True)
+        with profile.stage(self.family, "allocate"):
+            block = bytearray(64 * 1024 * 1024)
+            del block
+        with profile.stage(self.family, "idle"):
+            pass
+        allocate, idle = profile.records()
+        self.assertGreaterEqual(allocate["peak_delta"], 60 * 1024 * 1024)
+        self.assertLess(allocate["rss_change"], 60 * 1024 * 1024)
+        self.assertLess(idle["peak_delta"], 60 * 1024 * 1024)
+        # the run's peak is kept when the high-water mark is reset
+        self.assertGreaterEqual(run_peak_rss(), allocate["rss"] - allocate["rss_change"] + allocate["peak_delta"])
+
+    def test_disabled(self):
+        """nothing is kept when profiling isn't enabled"""
+        profile = Profile()
+        self.filter_trio(profile)
+        self.assertEqual(profile.records(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import itertools
+import unittest
+
+from tests.test_utils import create_test_snv
+from filtering.preinheritance_filtering import PreInheritanceFiltering
+from filtering.pushdown import PreInheritancePushdown
+
+
+class TestPreInheritancePushdown(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.vardata = {
+            "chrom": "1",
+            "pos": "100000",
+            "ref": "A",
+            "alt": "G",
+            "consequence": "missense_variant",
+            "ensg": "ensg",
+            "symbol": "KMTD2",
+            "feature": "feature",
+            "canonical": "YES",
+            "mane": "MANE",
+            "hgnc_id": "123",
+            "max_af": "0",
+            "max_af_pops": ".",
+            "ddd_af": "0",
+            "revel": "1",
+            "polyphen": ".",
+            "hgvsc": ".",
+            "hgvsp": ".",
+            "sex": "XY",
+            "dnm": False,
+            "gt": "0/1",
+            "gq": "50",
+            "ac_XX": "2",
+            "ac_XY": "5",
+            "nhomalt_XX": "379",
+            "nhomalt_XY": "4",
+            "ddd_father_af": ".",
+            "SpliceAI_pred_DS_AG": ".",
+            "SpliceAI_pred_DS_AL": ".",
+            "SpliceAI_pred_DS_DG": ".",
+            "SpliceAI_pred_DS_DL": ".",
+        }
+
+    def values(self, vardata, dnm):
+        """pushdown values for a variant"""
+        values = {
+            "Consequence": vardata["consequence"],
+            "DDD_AF": vardata["ddd_af"],
+            "REVEL": vardata["revel"],
+            "DNM": "1" if dnm else ".",
+            "DNG": ".",
+            "GQ": vardata["gq"],
+        }
+        for tag in PreInheritancePushdown.INFO_TAGS:
+            if tag.startswith("SpliceAI"):
+                values[tag] = vardata[tag]
+        return values
+
+    def test_matches_preinheritance_filter(self):
+        """pushdown excludes exactly the variants PreInheritanceFiltering removes"""
+        pushdown = PreInheritancePushdown()
+        for chrom, gq, ddd_af, cq, revel, dnm, splice in itertools.product(
+            ["1", "chrX"],
+            ["30", "40", "99"],
+            ["0", ".", "0.005", "0.0051"],
+            ["missense_variant", "synonymous_variant", "intron_variant&stop_gained", "3_prime_UTR_variant"],
+            [".", "0.39", "0.4"],
+            [False, True],
+            [".", "0.8"],
+        ):
+            vardata = self.vardata.copy()
+            vardata["chrom"] = chrom
+            vardata["gq"] = gq
+            vardata["ddd_af"] = ddd_af
+            vardata["consequence"] = cq
+            vardata["revel"] = revel
+            vardata["dnm"] = dnm
+            vardata["SpliceAI_pred_DS_DL"] = splice
+            testvar = create_test_snv(vardata)
+            variants = {"child": {"1_100000_A_G": testvar}, "mum": {}, "dad": {}}
+            kept = PreInheritanceFiltering(variants).preinheritance_filter() != {}
+            excluded = pushdown.exclude(chrom, "G", self.values(vardata, dnm))
+            self.assertEqual(kept, not excluded, str(vardata))
+
+        self.assertEqual(
+            pushdown.counts,
+            {"low_gq": 192, "high_ddd_af": 240, "no_functional_consequence": 270, "low_revel": 30},
+        )
+
+    def test_cnvs_not_excluded(self):
+        pushdown = PreInheritancePushdown()
+        values = self.values(self.vardata, False)
+        values["GQ"] = "10"
+        self.assertEqual(pushdown.reason("1", "<DEL>", values), None)
+        self.assertEqual(pushdown.reason("1", "G", values), "low_gq")
+
+    def test_unparseable_kept(self):
+        pushdown = PreInheritancePushdown()
+        values = self.values(self.vardata, False)
+        values["GQ"] = "."
+        self.assertEqual(pushdown.reason("1", "G", values), None)
+
+    def test_bcftools_expression(self):
+        pushdown = PreInheritancePushdown()
+        info_types = {
+            "Consequence": ("A", "String"),
+            "DDD_AF": ("A", "Float"),
+            "REVEL": ("A", "Float"),
+            "DNG": ("0", "Flag"),
+        }
+        expression = pushdown.bcftools_expression(info_types, {"GQ": ("1", "Integer")})
+        self.assertTrue(expression.startswith('(ALT!="<DEL>" && ALT!="<DUP>") && ('))
+        self.assertIn('(FORMAT/GQ[0]<40 && CHROM!~"^([Cc]hr)?[XY]$")', expression)
+        self.assertIn("INFO/DDD_AF>0.005", expression)
+        self.assertIn('INFO/REVEL<0.4 && INFO/Consequence~"missense_variant" && INFO/DNG=0', expression)
+        self.assertNotIn("'", expression)
+        self.assertEqual(pushdown.bcftools_expression({}, {}), None)
+
+        # thresholds aren't compared on fields the header doesn't type as numbers
+        info_types["REVEL"] = ("A", "String")
+        expression = pushdown.bcftools_expression(info_types, {"GQ": ("1", "String")})
+        self.assertNotIn("REVEL", expression)
+        self.assertNotIn("GQ", expression)
+        self.assertIn("INFO/DDD_AF>0.005", expression)
+        self.assertIn("INFO/Consequence!~", expression)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Copyright (c) 2021 Genome Research Limited
+Author: Ruth Eberhardt <re3@sanger.ac.uk>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.test_utils import create_test_snv, create_test_person, create_test_family
+from filtering import rules as rules_module
+from filtering.rules import RuleSet, load_rules, DEFAULT_RULES
+from filtering.preinheritance_filtering import PreInheritanceFiltering
+from filtering.postinheritance_filter import PostInheritanceFiltering
+from filtering.pushdown import PreInheritancePushdown
+
+
+class TestRuleSet(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.vardata = {
+            "chrom": "1",
+            "pos": "100000",
+            "ref": "A",
+            "alt": "G",
+            "consequence": "missense_variant",
+            "symbol": "KMTD2",
+            "hgnc_id": "123",
+            "max_af": "0",
+            "ddd_af": "0",
+            "revel": "1",
+            "sex": "XY",
+            "dnm": False,
+            "gt": "0/1",
+            "gq": "50",
+            "ac_XX": "2",
+            "ac_XY": "5",
+            "nhomalt_XX": "1",
+            "nhomalt_XY": "0",
+            "ddd_father_af": ".",
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def create_variants(self, values):
+        variants = {"child": {}, "mum": {}, "dad": {}}
+        for i in range(len(values)):
+            vardata = self.vardata.copy()
+            vardata["pos"] = str(100000 + i)
+            vardata.update(values[i])
+            variants["child"]["1_" + vardata["pos"] + "_A_G"] = create_test_snv(vardata)
+        return variants
+
+    def write_rules(self, config):
+        path = os.path.join(self.tempdir, "rules.json")
+        with open(path, "w") as f:
+            json.dump(config, f)
+        return path
+
+    def test_defaults(self):
+        """the built-in rules are the default thresholds"""
+        rules = load_rules()
+        self.assertEqual(rules.config, DEFAULT_RULES)
+        self.assertEqual(rules.min_gq, 40)
+        self.assertEqual(rules.max_ddd_af, 0.005)
+        self.assertEqual(rules.min_revel, 0.4)
+        self.assertEqual(rules.splice_ai_threshold, 0.8)
+        self.assertEqual(rules.max_x_af, 0.000001)
+        self.assertEqual(rules.max_af_with_parents, 0.0005)
+        self.assertEqual(rules.max_af_without_parents, 0.0001)
+        self.assertEqual(rules.max_ac_het, 4)
+        self.assertFalse(rules.adaptive_order)
+        self.assertEqual(rules.order("site"), ["low_gq", "high_ddd_af", "no_functional_consequence"])
+        self.assertEqual(rules.order("variant"), ["low_revel", "failed_dnm", "x_allele_frequency"])
+
+    def test_rules_file(self):
+        """values in a rules file replace the built-in ones"""
+        path = self.write_rules({"preinheritance": {"low_gq": {"min_gq": 60}}, "postinheritance": {"max_ac_het": 2}})
+        rules = load_rules(path)
+        self.assertEqual(rules.min_gq, 60)
+        self.assertEqual(rules.max_ac_het, 2)
+        self.assertEqual(rules.max_ddd_af, 0.005)
+        self.assertEqual(DEFAULT_RULES["preinheritance"]["low_gq"]["min_gq"], 40)
+
+        variants = self.create_variants([{"gq": "50"}, {"gq": "70"}])
+        for ruleset, expected in [(RuleSet(), 2), (rules, 1)]:
+            variants_per_gene = PreInheritanceFiltering(variants, ruleset).preinheritance_filter()
+            self.assertEqual(len(variants_per_gene["123"]), expected)
+        self.assertEqual(PreInheritancePushdown(rules).reason("1", "G", {"GQ": "50"}), "low_gq")
+
+        for config in [{"preinheritance": {"low_gq": {"max_gq": 60}}}, {"unknown": 1}, {"preinheritance": 1}]:
+            with self.assertRaises(ValueError):
+                load_rules(self.write_rules(config))
+        with self.assertRaises(ValueError):
+            RuleSet({"preinheritance": {"no_functional_consequence": {"consequences": ["not_a_term"]}}})
+
+    def test_postinheritance_thresholds(self):
+        variants = self.create_variants([{"max_af": "0.0002"}])
+        var = variants["child"]["1_100000_A_G"]
+        child = create_test_person("fam", "child", "dad", "mum", "XY", "2", "child.vcf")
+        family = create_test_family(child, None, None)
+        for max_af, expected in [(0.0001, 0), (0.001, 1)]:
+            candidates = {"single_variants": {"1_100000_A_G": {"variant": var, "mode": {"monoallelic"}}}}
+            rules = RuleSet({"postinheritance": {"max_af_without_parents": max_af}})
+            PostInheritanceFiltering(candidates, family, rules).postinheritance_filter()
+            self.assertEqual(len(candidates["single_variants"]), expected)
+
+    def test_adaptive_order(self):
+        """rules rejecting the most variants move first, the kept variants don't change"""
+        values = []
+        for i in range(300):
+            if i % 3 == 0:
+                values.append({"consequence": "intron_variant"})
+            elif i % 10 == 1:
+                values.append({"gq": "20"})
+            else:
+                values.append({})
+        variants = self.create_variants(values)
+        interval = rules_module.REORDER_INTERVAL
+        rules_module.REORDER_INTERVAL = 50
+        try:
+            adaptive = RuleSet({"adaptive_order": True})
+            kept = PreInheritanceFiltering(variants, adaptive).preinheritance_filter()
+            fixed = RuleSet()
+            expected = PreInheritanceFiltering(variants, fixed).preinheritance_filter()
+        finally:
+            rules_module.REORDER_INTERVAL = interval
+        self.assertEqual(adaptive.order("site")[0], "no_functional_consequence")
+        self.assertEqual(fixed.order("site"), ["low_gq", "high_ddd_af", "no_functional_consequence"])
+        self.assertEqual(sorted(kept["123"].keys()), sorted(expected["123"].keys()))
+        self.assertEqual(len(kept["123"]), 180)
+        rejected = {}
+        for rule in adaptive.stages["site"]:
+            rejected[rule.name] = rule.rejected
+        self.assertEqual(rejected["high_ddd_af"], 0)
+        self.assertEqual(rejected["no_functional_consequence"] + rejected["low_gq"], 120)
+
+        # the next family starts from the given order, the run totals are kept
+        adaptive.start_family()
+        self.assertEqual(adaptive.order("site"), ["low_gq", "high_ddd_af", "no_functional_consequence"])
+        self.assertEqual([rule.rejected for rule in adaptive.stages["site"]], [0, 0, 0])
+        self.assertEqual(sum([rule.total_rejected for rule in adaptive.stages["site"]]), 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,7 +27,19 @@ from tests.test_utils import create_test_snv
 from tests.test_utils import create_test_person
 from tests.test_utils import create_test_family
 
-from variants.trio_genotype import add_trio_genotypes
+from variants.trio_genotype import (
+    add_trio_genotypes,
+    encode_trio,
+    trio_string,
+    not_inherited,
+    HOM_REF,
+    HET,
+    HOM_ALT,
+    NA,
+    REF,
+    DEL,
+    DUP,
+)
 
 
 class TestTrioGenotypes(unittest.TestCase):
@@ -191,6 +203,31 @@ class TestTrioGenotypes(unittest.TestCase):
             add_trio_genotypes(family, variants)
             self.assertEqual(self.childvar.triogenotype, triostring)
 
+    def test_trio_codes(self):
+        """trio genotypes are coded as one int and only made strings for output"""
+        states = [HOM_REF, HET, HOM_ALT, NA, REF, DEL, DUP]
+        codes = set()
+        for child in states:
+            for mum in states:
+                for dad in states:
+                    codes.add(encode_trio(child, mum, dad))
+        self.assertEqual(len(codes), len(states) ** 3)
+        self.assertEqual(trio_string(encode_trio(HET, HOM_REF, HOM_ALT)), "102")
+        self.assertEqual(trio_string(encode_trio(HOM_ALT, NA, NA)), "2NANA")
+        self.assertEqual(trio_string(encode_trio(DEL, DEL, REF)), "DELDELREF")
+        self.assertTrue(not_inherited(encode_trio(HET, HOM_REF, HOM_REF)))
+        self.assertTrue(not_inherited(encode_trio(HOM_ALT, HOM_REF, HOM_REF)))
+        self.assertFalse(not_inherited(encode_trio(HET, HOM_REF, NA)))
+        self.assertFalse(not_inherited(encode_trio(DEL, REF, REF)))
+
+        family = create_test_family(self.child, self.mum, None)
+        variants = {"child": {"1_100000_A_G": self.hetvar}, "mum": {"1_100000_A_G": self.homaltvar}, "dad": {}}
+        add_trio_genotypes(family, variants)
+        self.assertEqual(self.hetvar.get_mum_genotype(), HOM_ALT)
+        self.assertEqual(self.hetvar.get_dad_genotype(), NA)
+        self.assertTrue(self.hetvar.is_het())
+        self.assertTrue(self.hetvar.is_mum_hom_alt())
+
 
 if __name__ == "__main__":
     unittest.main()